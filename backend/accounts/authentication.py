@@ -0,0 +1,23 @@
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .revocation import revocations
+
+
+class RevocationCheckMixin:
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revocations.is_revoked(token):
+            raise InvalidToken('Token has been revoked')
+        return token
+
+
+class JWTAuthentication(RevocationCheckMixin, authentication.JWTAuthentication):
+    """Loads the User row of the token on every request."""
+
+
+class StatelessJWTAuthentication(RevocationCheckMixin, authentication.JWTStatelessUserAuthentication):
+    """
+    Takes the user from the token claims (a TokenUser with id, is_staff and
+    the PROFILE_CLAIMS as attributes) without querying the database.
+    """
@@ -0,0 +1,16 @@
+from django.db import models
+
+class RevokedToken(models.Model):
+    """
+    A revoked access token (``jti``), or every token of a user issued up to
+    ``revoked_at`` (``user_id``). Kept until ``expires_at``, when the tokens
+    it covers have expired anyway. Checked from memory by revocation.py.
+    """
+    jti = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    # Not a foreign key: revocations must outlive deleted users
+    user_id = models.BigIntegerField(null=True, blank=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"jti {self.jti}" if self.jti else f"user {self.user_id} before {self.revoked_at}"
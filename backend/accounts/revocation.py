@@ -0,0 +1,97 @@
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .models import RevokedToken
+
+
+class RevocationList:
+    """
+    The unexpired revocations, held in memory by each process so checking a
+    token costs no query. The list is reloaded from the database at most
+    every JWT_REVOCATION_REFRESH_SECONDS; revocations made by this process
+    apply at once, those made by others within that interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._jtis = set()
+        self._users = {}
+
+    def _load(self):
+        jtis = set()
+        users = {}
+        rows = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+        for jti, user_id, revoked_at in rows.values_list('jti', 'user_id', 'revoked_at'):
+            if jti:
+                jtis.add(jti)
+            else:
+                users[user_id] = max(users.get(user_id, 0), revoked_at.timestamp())
+        self._jtis, self._users = jtis, users
+
+    def _refresh(self):
+        interval = settings.JWT_REVOCATION_REFRESH_SECONDS
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < interval:
+            return
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= interval:
+                self._load()
+                self._loaded_at = time.monotonic()
+
+    def is_revoked(self, token):
+        self._refresh()
+        if token.get(api_settings.JTI_CLAIM) in self._jtis:
+            return True
+        cutoff = self._users.get(token.get(api_settings.USER_ID_CLAIM))
+        # iat has one-second resolution, so a token from the same second is revoked too
+        return cutoff is not None and token.get('iat', 0) <= cutoff
+
+    def add(self, jti=None, user_id=None, revoked_at=None):
+        with self._lock:
+            if jti:
+                self._jtis.add(jti)
+            else:
+                self._users[user_id] = max(self._users.get(user_id, 0), revoked_at.timestamp())
+
+    def clear(self):
+        with self._lock:
+            self._loaded_at = None
+            self._jtis, self._users = set(), {}
+
+
+revocations = RevocationList()
+
+
+def _purge():
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+
+
+def revoke_token(token):
+    """Revoke one access token until it expires."""
+    _purge()
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    RevokedToken.objects.get_or_create(jti=jti, defaults={'expires_at': expires_at})
+    revocations.add(jti=jti)
+
+
+def revoke_user(user_id):
+    """
+    Revoke every token issued to a user so far: the refresh tokens in the
+    blacklist, and the access and rotated refresh tokens by their issue
+    time, for as long as any of them can still be valid.
+    """
+    _purge()
+    outstanding = OutstandingToken.objects.filter(user_id=user_id, expires_at__gt=timezone.now())
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token=token) for token in outstanding], ignore_conflicts=True
+    )
+    lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+    revocation = RevokedToken.objects.create(user_id=user_id, expires_at=timezone.now() + lifetime)
+    revocations.add(user_id=user_id, revoked_at=revocation.revoked_at)
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, pre_save
+from django.dispatch import receiver
+
+from .revocation import revoke_user
+
+# Fields whose change must not be outlived by tokens issued before it
+REVOKING_FIELDS = {'is_active', 'is_staff', 'is_superuser', 'password'}
+
+
+@receiver(pre_save, sender=User)
+def revoke_changed_user_tokens(sender, instance, update_fields=None, **kwargs):
+    # Stateless authentication trusts the staff flags of a token until it expires
+    fields = REVOKING_FIELDS if update_fields is None else REVOKING_FIELDS & set(update_fields)
+    if not instance.pk or not fields:
+        return
+    old = User.objects.filter(pk=instance.pk).values(*fields).first()
+    if old is None:
+        return
+    changed = {field for field in fields if old[field] != getattr(instance, field)}
+    # check_password() upgrading the hash of an unchanged password on login
+    # saves it alone after clearing _password, as Django does not count it as a change
+    if update_fields is not None and set(update_fields) == {'password'} and instance._password is None:
+        changed.discard('password')
+    if changed - {'is_active'} or ('is_active' in changed and not instance.is_active):
+        user_id = instance.pk
+        transaction.on_commit(lambda: revoke_user(user_id))
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: revoke_user(user_id))
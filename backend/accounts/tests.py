@@ -0,0 +1,38 @@
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from accounts.revocation import revocations
+from accounts.tokens import ProfileRefreshToken
+
+
+class UserTokenRevocationTests(TestCase):
+    def setUp(self):
+        # Reloaded from the rolled back database, so earlier tests' revocations do not leak
+        revocations._loaded_at = None
+        self.user = User.objects.create_user('revoked', password='old-password')
+        self.token = ProfileRefreshToken.for_user(self.user)
+
+    def test_password_change_saved_alone(self):
+        self.user.set_password('new-password')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['password'])
+        self.assertTrue(revocations.is_revoked(self.token.access_token))
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_hash_upgrade_on_login(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('old-password', hasher='md5'))
+        self.user.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(self.user.check_password('old-password'))
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        self.assertFalse(revocations.is_revoked(self.token.access_token))
+
+    def test_staff_change(self):
+        self.user.is_staff = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertTrue(revocations.is_revoked(self.token.access_token))
@@ -0,0 +1,50 @@
+from django.contrib.auth.models import User
+from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocation import revocations
+
+# User fields carried in the tokens, so authenticated requests need not load the user
+PROFILE_CLAIMS = ['username', 'email', 'first_name', 'last_name', 'is_staff', 'is_superuser']
+PROFILE_DATE_CLAIMS = ['date_joined', 'last_login']
+
+
+def set_profile_claims(token, user):
+    for claim in PROFILE_CLAIMS:
+        token[claim] = getattr(user, claim)
+    # Rendered as the API renders datetimes
+    for claim in PROFILE_DATE_CLAIMS:
+        value = getattr(user, claim)
+        token[claim] = serializers.DateTimeField().to_representation(value) if value else None
+
+
+class ProfileRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the user's profile claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_profile_claims(token, user)
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """
+    Refuses revoked tokens and tokens of users who were deleted or
+    deactivated, and renews the profile claims from the user row. Refreshing
+    is the only point where a user is loaded.
+    """
+    token_class = ProfileRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if revocations.is_revoked(refresh):
+            raise InvalidToken('Token has been revoked')
+        user = User.objects.filter(pk=refresh[api_settings.USER_ID_CLAIM], is_active=True).first()
+        if user is None:
+            raise InvalidToken('User not found or inactive')
+        set_profile_claims(refresh, user)
+        return super().validate({'refresh': str(refresh)})
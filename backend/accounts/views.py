@@ -2,11 +2,14 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from .revocation import revoke_token, revoke_user
+from .tokens import ProfileRefreshToken
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -22,7 +25,7 @@ def login(request):
     user = authenticate(username=username, password=password)
     
     if user:
-        refresh = RefreshToken.for_user(user)
+        refresh = ProfileRefreshToken.for_user(user)
         return Response({
             'access': str(refresh.access_token),
             'refresh': str(refresh),
@@ -86,7 +89,7 @@ def register(request):
         last_name=last_name
     )
     
-    refresh = RefreshToken.for_user(user)
+    refresh = ProfileRefreshToken.for_user(user)
     return Response({
         'access': str(refresh.access_token),
         'refresh': str(refresh),
@@ -102,6 +105,7 @@ def register(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_profile(request):
+    # With stateless authentication these come from the token claims
     user = request.user
     return Response({
         'id': user.id,
@@ -112,3 +116,29 @@ def user_profile(request):
         'date_joined': user.date_joined,
         'last_login': user.last_login,
     })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout(request):
+    """
+    Revoke the access token of the request and the given ``refresh`` token,
+    or every token of the user with ``all``.
+    """
+    if request.data.get('all'):
+        revoke_user(request.user.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    refresh = request.data.get('refresh')
+    if refresh:
+        try:
+            token = ProfileRefreshToken(refresh)
+        except TokenError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if token[api_settings.USER_ID_CLAIM] != request.user.id:
+            return Response({'error': 'The refresh token belongs to another user'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        token.blacklist()
+    # Session-authenticated requests carry no token
+    if request.auth is not None:
+        revoke_token(request.auth)
+    return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from properties import async_views
 from properties.views import AgentViewSet
 
 router = DefaultRouter()
@@ -8,3 +9,8 @@ router.register(r'agents', AgentViewSet)
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+# Async agent list, served ahead of the router by premium_realty.async_urls
+async_urlpatterns = [
+    path('agents/', async_views.agent_collection_view, name='agent-list'),
+]
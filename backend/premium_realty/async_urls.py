@@ -0,0 +1,10 @@
+from django.urls import path, include
+from agents.urls import async_urlpatterns as agent_async_urlpatterns
+from properties.urls import async_urlpatterns as property_async_urlpatterns
+from .urls import urlpatterns as sync_urlpatterns
+
+# Used instead of premium_realty.urls when ASYNC_VIEWS is on: the async read
+# endpoints match first and everything else falls through to the DRF views
+urlpatterns = [
+    path('api/', include(property_async_urlpatterns + agent_async_urlpatterns)),
+] + sync_urlpatterns
@@ -0,0 +1,78 @@
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Replica serving the current read-only view, if any
+_replica = ContextVar('replica', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica')]
+
+
+@contextmanager
+def use_replica():
+    # One replica per request, so all its queries see the same snapshot;
+    # nested uses keep the replica already chosen
+    replicas = replica_aliases()
+    token = _replica.set(_replica.get() or (random.choice(replicas) if replicas else None))
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def read_from_replica(view_method):
+    """Serve the queries of a read-only view method from a replica, when configured."""
+    if asyncio.iscoroutinefunction(view_method):
+        # sync_to_async copies the context, so ORM calls see the chosen replica
+        @wraps(view_method)
+        async def async_wrapper(*args, **kwargs):
+            with use_replica():
+                return await view_method(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(view_method)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return view_method(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Send reads made inside read_from_replica views to the replica chosen for
+    the request and everything else to the primary. Without replicas this is
+    a no-op.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _replica.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Apply SQLITE_PRAGMAS to new SQLite connections (connection_created handler)."""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            # Replicas are opened read-only and cannot change the journal mode
+            if name == 'journal_mode' and connection.alias != DEFAULT_DB_ALIAS:
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
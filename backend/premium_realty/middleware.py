@@ -0,0 +1,117 @@
+import zlib
+
+import brotli
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+# Content types worth compressing. HTML (the browsable API) is left out: it
+# reflects the request next to a CSRF token, which BREACH could recover
+COMPRESSIBLE_TYPES = ('application/json', 'application/msgpack', 'application/x-ndjson', 'text/csv')
+# Preferred first when the client accepts both equally
+ENCODINGS = ('br', 'gzip')
+
+
+def accepted_encoding(header):
+    """The encoding of ENCODINGS with the highest quality in an Accept-Encoding header, if any."""
+    qualities = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().lower().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip()] = quality
+
+    best = None
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+
+class BrotliCompressor:
+    # The zlib.compressobj() interface over brotli.Compressor
+    def __init__(self, quality):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+def compressor(encoding):
+    if encoding == 'br':
+        return BrotliCompressor(settings.COMPRESSION_BROTLI_QUALITY)
+    # wbits 16 + 15: gzip container
+    return zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+
+def compress(encoding, content):
+    encoder = compressor(encoding)
+    return encoder.compress(content) + encoder.flush()
+
+
+def compress_sequence(encoding, chunks):
+    encoder = compressor(encoding)
+    for chunk in chunks:
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.flush()
+
+
+async def acompress_sequence(encoding, chunks):
+    encoder = compressor(encoding)
+    async for chunk in chunks:
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.flush()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Brotli or gzip encoding of API responses, as negotiated by the request's
+    Accept-Encoding. Bodies under COMPRESSION_MIN_SIZE bytes are sent as they
+    are; streamed responses (exports) are compressed as they are produced.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES or response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_sequence(encoding, response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(encoding, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            content = compress(encoding, response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        # A strong ETag cannot be shared by two encodings (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
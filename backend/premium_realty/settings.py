@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
-from decouple import config
+from corsheaders.defaults import default_headers
+from decouple import Csv, config
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -26,6 +27,7 @@ INSTALLED_APPS = [
     # Third party apps
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     'django_filters',
     
@@ -37,6 +39,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    # Compresses the final body, so it runs last on the way out
+    'premium_realty.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -46,7 +50,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'premium_realty.urls'
+# Async views for the read-heavy endpoints (properties/async_views.py). On by
+# default under ASGI (see asgi.py); under WSGI each async view would run in
+# its own event loop, so the plain DRF views are used there.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=os.environ.get('DJANGO_SERVER_INTERFACE') == 'asgi', cast=bool)
+ROOT_URLCONF = 'premium_realty.async_urls' if ASYNC_VIEWS else 'premium_realty.urls'
 
 TEMPLATES = [
     {
@@ -67,13 +75,85 @@ TEMPLATES = [
 WSGI_APPLICATION = 'premium_realty.wsgi.application'
 
 # Database
-DATABASES = {
-    'default': {
+# DATABASE_PROFILE=production turns on persistent connections and the SQLite
+# tuning below. DATABASE_REPLICAS lists read replicas: SQLite file paths
+# (opened read-only) or, with DATABASE_ENGINE=postgresql, host names.
+DATABASE_PROFILE = config('DATABASE_PROFILE', default='development')
+DATABASE_ENGINE = config('DATABASE_ENGINE', default='sqlite')
+DATABASE_REPLICAS = config('DATABASE_REPLICAS', default='', cast=Csv())
+
+if DATABASE_ENGINE == 'postgresql':
+    PRIMARY_DATABASE = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': config('DATABASE_NAME', default='premium_realty'),
+        'USER': config('DATABASE_USER', default=''),
+        'PASSWORD': config('DATABASE_PASSWORD', default=''),
+        'HOST': config('DATABASE_HOST', default='localhost'),
+        'PORT': config('DATABASE_PORT', default='5432'),
+    }
+    REPLICA_DATABASES = [{**PRIMARY_DATABASE, 'HOST': host} for host in DATABASE_REPLICAS]
+else:
+    PRIMARY_DATABASE = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': config('DATABASE_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+    }
+    REPLICA_DATABASES = [
+        {**PRIMARY_DATABASE, 'NAME': f'file:{path}?mode=ro', 'OPTIONS': {'uri': True}}
+        for path in DATABASE_REPLICAS
+    ]
+
+DATABASES = {'default': PRIMARY_DATABASE}
+for number, replica in enumerate(REPLICA_DATABASES, start=1):
+    DATABASES[f'replica{number}'] = {**replica, 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['premium_realty.database.ReplicaRouter']
+
+if DATABASE_PROFILE == 'production':
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 600
+        database['CONN_HEALTH_CHECKS'] = True
+    # Applied to every new SQLite connection by premium_realty.database.configure_sqlite.
+    # WAL lets readers run while the view counters are being written.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -64000,  # KiB
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    }
+else:
+    SQLITE_PRAGMAS = {}
+
+# Cache
+# Local memory is per process; use a shared backend (e.g. Redis or memcached)
+# in production so response/tile caches and their invalidation are shared
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'premium-realty',
     }
 }
 
+# Per-endpoint overrides for cached API responses, in seconds
+RESPONSE_CACHE_TIMEOUTS = {
+    'properties:list': 60,
+    'properties:featured': 60 * 5,
+    'properties:map_data': 60,
+    'agents:list': 60 * 5,
+    'properties:search': 60,
+}
+
+# Ordered ids kept per cached property search (properties.search_cache);
+# deeper pages run the search query. 0 disables the search result cache
+SEARCH_CACHE_MAX_IDS = config('SEARCH_CACHE_MAX_IDS', default=1000, cast=int)
+
+# Response compression (premium_realty.middleware): smallest body worth
+# compressing, in bytes, and the brotli (0-11) and gzip (1-9) levels
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -104,18 +184,45 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Worker processes rendering image derivatives after upload (0 renders inline)
+IMAGE_WORKERS = config('IMAGE_WORKERS', default=2, cast=int)
+
+# Email (saved search alerts); printed to the console unless an SMTP host is set
+EMAIL_HOST = config('EMAIL_HOST', default='')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_BACKEND = (
+    'django.core.mail.backends.smtp.EmailBackend' if EMAIL_HOST
+    else 'django.core.mail.backends.console.EmailBackend'
+)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='alerts@premiumrealty.com')
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Take the user of JWT-authenticated requests from the token claims instead
+# of loading it from the database (see accounts/authentication.py)
+JWT_STATELESS = config('JWT_STATELESS', default=True, cast=bool)
+# How often each process reloads the token revocation list
+JWT_REVOCATION_REFRESH_SECONDS = config('JWT_REVOCATION_REFRESH_SECONDS', default=30, cast=int)
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.StatelessJWTAuthentication' if JWT_STATELESS
+        else 'accounts.authentication.JWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'premium_realty.renderers.ORJSONRenderer',
+        'premium_realty.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -131,6 +238,7 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.tokens.TokenRefreshSerializer',
 }
 
 # CORS Settings
@@ -143,4 +251,8 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Conditional GETs of the listing endpoints (ETag / If-None-Match)
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match', 'if-modified-since')
+CORS_EXPOSE_HEADERS = ['ETag']
+
 CORS_ALLOW_ALL_ORIGINS = DEBUG  # Only in development
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Property, PropertyImage, PropertyAmenity, Agent
+from .models import Property, PropertyImage, PropertyAmenity, Agent, SavedSearch
 
 class PropertyImageInline(admin.TabularInline):
     model = PropertyImage
@@ -15,7 +15,7 @@ class PropertyAdmin(admin.ModelAdmin):
     list_filter = ['category', 'listing_type', 'status', 'featured', 'premium_listing', 'city', 'state']
     search_fields = ['title', 'description', 'address', 'city']
     inlines = [PropertyImageInline, PropertyAmenityInline]
-    readonly_fields = ['views', 'days_on_market', 'created_at', 'updated_at']
+    readonly_fields = ['price_per_sqft', 'views', 'days_on_market', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Basic Information', {
@@ -50,7 +50,7 @@ class PropertyAdmin(admin.ModelAdmin):
 @admin.register(Agent)
 class AgentAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'phone', 'agency', 'rating', 'total_sales']
-    list_filter = ['agency', 'specializations']
+    list_filter = ['agency', 'specialization_index__name']
     search_fields = ['name', 'email', 'agency', 'license_number']
     readonly_fields = ['created_at']
 
@@ -63,3 +63,9 @@ class PropertyImageAdmin(admin.ModelAdmin):
 class PropertyAmenityAdmin(admin.ModelAdmin):
     list_display = ['property', 'name', 'icon']
     list_filter = ['name']
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ['name', 'user', 'created_at']
+    search_fields = ['name', 'user__username']
+    readonly_fields = ['created_at']
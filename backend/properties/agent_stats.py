@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import Agent, AgentListingStat, AgentSpecialization
+from .summaries import SummaryTable
+
+STAT_FIELDS = {'status', 'agent_id', 'category', 'price'}
+
+
+def contributions(values):
+    if values['status'] != 'active' or values['agent_id'] is None:
+        return {}
+    return {(values['agent_id'], values['category']): Decimal(values['price'])}
+
+
+table = SummaryTable(AgentListingStat, ['agent_id', 'category'], STAT_FIELDS, contributions, ['agents:list'])
+record = table.record
+remove = table.remove
+
+
+def specialization_names(specializations):
+    if not isinstance(specializations, list):
+        return set()
+    return {str(name).strip().lower()[:100] for name in specializations if str(name).strip()}
+
+
+def index_specializations(agent):
+    with transaction.atomic():
+        agent.specialization_index.all().delete()
+        AgentSpecialization.objects.bulk_create(
+            AgentSpecialization(agent=agent, name=name) for name in specialization_names(agent.specializations)
+        )
+
+
+def rebuild():
+    """Rebuild the specialization index and the listing stats. Returns the number of rows of each."""
+    index = [
+        AgentSpecialization(agent_id=pk, name=name)
+        for pk, specializations in Agent.objects.values_list('pk', 'specializations').iterator(chunk_size=2000)
+        for name in specialization_names(specializations)
+    ]
+    with transaction.atomic():
+        AgentSpecialization.objects.all().delete()
+        AgentSpecialization.objects.bulk_create(index, batch_size=1000)
+    return len(index), table.rebuild()
+
+
+def summary(stats):
+    """Directory figures of an agent from its AgentListingStat rows."""
+    count = sum(stat.count for stat in stats)
+    total = sum((stat.total for stat in stats), Decimal(0))
+    return {
+        'active_listings': count,
+        # A string, like the serialized listing prices
+        'average_price': str((total / count).quantize(Decimal('0.01'))) if count else None,
+        'category_mix': {stat.category: stat.count for stat in stats if stat.count},
+    }
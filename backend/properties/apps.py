@@ -3,3 +3,12 @@ from django.apps import AppConfig
 class PropertiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'properties'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+        from premium_realty.database import configure_sqlite
+        from . import signals
+
+        post_migrate.connect(signals.create_search_index, sender=self)
+        connection_created.connect(configure_sqlite)
@@ -0,0 +1,142 @@
+from asgiref.sync import sync_to_async
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from premium_realty.database import read_from_replica
+from premium_realty.renderers import MessagePackRenderer
+from .caching import acache_response, aconditional_response
+from .reads import arun
+from .views import AgentViewSet, PropertySearchView, PropertyViewSet
+
+
+def async_view(view_class, handlers, actions=None, **initkwargs):
+    """
+    Serve the methods in ``handlers`` with async handlers and every other
+    method with the regular DRF view.
+
+    DRF's request setup (authentication, permissions, throttling and content
+    negotiation) may hit the database, so it runs in a worker thread. The
+    handler then reads with the async ORM and returns a DRF Response, which is
+    finalized by the view as usual: output, headers and errors match the sync
+    views.
+    """
+    if actions:
+        sync_view = view_class.as_view(actions, **initkwargs)
+    else:
+        sync_view = view_class.as_view(**initkwargs)
+    sync_view = sync_to_async(sync_view)
+
+    def initial(request, args, kwargs):
+        view = view_class(action_map=actions, **initkwargs) if actions else view_class(**initkwargs)
+        view.args, view.kwargs = args, kwargs
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        try:
+            view.initial(view.request, *args, **kwargs)
+        except Exception as exc:
+            return view, view.handle_exception(exc)
+        return view, None
+
+    async def dispatch(request, *args, **kwargs):
+        handler = handlers.get(request.method.lower())
+        if handler is None:
+            return await sync_view(request, *args, **kwargs)
+
+        view, response = await sync_to_async(initial)(request, args, kwargs)
+        if response is None:
+            try:
+                response = await handler(view, view.request, *args, **kwargs)
+            except Exception as exc:
+                response = view.handle_exception(exc)
+        response = view.finalize_response(view.request, response, *args, **kwargs)
+        if response.streaming and not response.is_async:
+            # Django would read a sync stream (exports) into memory under ASGI
+            response.streaming_content = iterate_in_thread(response.streaming_content)
+        # Other renderers (the browsable API) are rendered by Django in a thread
+        if isinstance(response, Response) and isinstance(response.accepted_renderer, (JSONRenderer, MessagePackRenderer)):
+            response.render()
+        return response
+
+    # Set directly: csrf_exempt() does not keep views async on Django 4.2
+    dispatch.csrf_exempt = True
+    return dispatch
+
+
+async def iterate_in_thread(iterator):
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(iterator, None)) is not None:
+        yield chunk
+
+
+async def property_list(view, request):
+    if request.query_params.get('export'):
+        # Exports are streamed by the sync view
+        return await sync_to_async(view.list)(request)
+    return await property_page(view, request)
+
+
+# The handlers are those of the DRF views, run with the async ORM
+
+@aconditional_response('properties:list')
+@acache_response('properties:list', timeout=60)
+@read_from_replica
+async def property_page(view, request):
+    return await arun(view.list_page(request))
+
+
+@aconditional_response('properties:detail', version_of='properties:list')
+@read_from_replica
+async def property_detail(view, request, pk):
+    return await arun(view.detail_page(request, pk))
+
+
+@aconditional_response('properties:featured')
+@acache_response('properties:featured', timeout=60 * 5)
+@read_from_replica
+async def featured_properties(view, request):
+    return await arun(view.featured_page(request))
+
+
+@aconditional_response('properties:map_data')
+@acache_response('properties:map_data', timeout=60)
+@read_from_replica
+async def map_data(view, request):
+    return await arun(view.map_page(request))
+
+
+@read_from_replica
+async def property_search(view, request):
+    if request.data.get('export'):
+        # Exports are streamed by the sync view
+        return await sync_to_async(view.post)(request)
+    return await arun(view.search_page(request))
+
+
+@aconditional_response('agents:list')
+@acache_response('agents:list', timeout=60 * 5)
+@read_from_replica
+async def agent_list(view, request):
+    return await arun(view.list_page(request))
+
+
+property_collection_view = async_view(
+    PropertyViewSet, {'get': property_list}, {'get': 'list', 'post': 'create'},
+    basename='property', detail=False,
+)
+property_detail_view = async_view(
+    PropertyViewSet, {'get': property_detail},
+    {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'},
+    basename='property', detail=True,
+)
+featured_view = async_view(
+    PropertyViewSet, {'get': featured_properties}, {'get': 'featured'},
+    basename='property', detail=False,
+)
+map_data_view = async_view(
+    PropertyViewSet, {'get': map_data}, {'get': 'map_data'},
+    basename='property', detail=False,
+)
+search_view = async_view(PropertySearchView, {'post': property_search})
+agent_collection_view = async_view(
+    AgentViewSet, {'get': agent_list}, {'get': 'list', 'post': 'create'},
+    basename='agent', detail=False,
+)
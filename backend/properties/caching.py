@@ -0,0 +1,272 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+from premium_realty.database import use_replica
+from .models import ResourceVersion
+
+# Endpoint name -> default timeout, filled in by @cache_response
+CACHED_ENDPOINTS = {}
+# Endpoints whose data is versioned in the database for ETag and
+# Last-Modified validators (see conditional_response)
+VERSIONED_ENDPOINTS = {'properties:list', 'properties:featured', 'properties:map_data', 'agents:list'}
+
+
+def _generation_key(endpoint):
+    return f'responses:{endpoint}:generation'
+
+
+def _stats_key(endpoint, outcome):
+    return f'responses:{endpoint}:{outcome}'
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+async def _aincr(key):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, None)
+
+
+def record_lookup(endpoint, hit):
+    """Count a cache hit or miss of an endpoint in cache_stats()."""
+    _incr(_stats_key(endpoint, 'hits' if hit else 'misses'))
+
+
+async def arecord_lookup(endpoint, hit):
+    await _aincr(_stats_key(endpoint, 'hits' if hit else 'misses'))
+
+
+def endpoint_generation(endpoint):
+    return cache.get_or_set(_generation_key(endpoint), 1, None)
+
+
+async def aendpoint_generation(endpoint):
+    return await cache.aget_or_set(_generation_key(endpoint), 1, None)
+
+
+def _advance(endpoints):
+    for endpoint in endpoints:
+        _incr(_generation_key(endpoint))
+
+    versioned = sorted(VERSIONED_ENDPOINTS.intersection(endpoints))
+    if not versioned:
+        return
+    now = timezone.now()
+    rows = ResourceVersion.objects.filter(name__in=versioned)
+    if rows.update(version=F('version') + 1, updated_at=now) < len(versioned):
+        ResourceVersion.objects.bulk_create(
+            [ResourceVersion(name=endpoint, version=1, updated_at=now) for endpoint in versioned],
+            ignore_conflicts=True,
+        )
+
+
+def invalidate(*endpoints):
+    """
+    Drop every cached response of the given endpoints and advance their
+    versions. Deferred until the current transaction commits, so requests
+    served in the meantime cannot store or validate the old data under the
+    new generation.
+    """
+    transaction.on_commit(lambda: _advance(endpoints))
+
+
+def normalized_query(request):
+    params = sorted(
+        (key, sorted(request.query_params.getlist(key)))
+        for key in request.query_params
+    )
+    return '&'.join(f'{key}={",".join(values)}' for key, values in params)
+
+
+def _request_digest(request, kwargs):
+    # Payloads hold absolute URLs, so the host is part of the request too
+    parts = [request.build_absolute_uri('/'), normalized_query(request)]
+    parts.extend(f'{key}={value}' for key, value in sorted(kwargs.items()))
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def response_cache_key(endpoint, request, kwargs):
+    return f'responses:{endpoint}:{endpoint_generation(endpoint)}:{_request_digest(request, kwargs)}'
+
+
+async def aresponse_cache_key(endpoint, request, kwargs):
+    generation = await aendpoint_generation(endpoint)
+    return f'responses:{endpoint}:{generation}:{_request_digest(request, kwargs)}'
+
+
+def cache_response(endpoint, timeout):
+    """
+    Cache the data of successful GET responses of a view method, keyed by
+    the normalized query string. Entries are invalidated by bumping the
+    endpoint's generation from model signals (see signals.py).
+    """
+    CACHED_ENDPOINTS[endpoint] = timeout
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != 'GET':
+                return view_method(self, request, *args, **kwargs)
+
+            key = response_cache_key(endpoint, request, kwargs)
+            cached = cache.get(key)
+            if cached is not None:
+                _incr(_stats_key(endpoint, 'hits'))
+                return Response(cached)
+
+            _incr(_stats_key(endpoint, 'misses'))
+            response = view_method(self, request, *args, **kwargs)
+            # Streamed responses (exports) have no data to cache
+            if response.status_code == 200 and isinstance(response, Response):
+                timeouts = getattr(settings, 'RESPONSE_CACHE_TIMEOUTS', {})
+                cache.set(key, response.data, timeouts.get(endpoint, timeout))
+            return response
+        return wrapper
+    return decorator
+
+
+def acache_response(endpoint, timeout):
+    """
+    cache_response for async view handlers (see async_views.py). Uses the same
+    keys as the sync decorator, so both share entries and statistics.
+    """
+    CACHED_ENDPOINTS[endpoint] = timeout
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(self, request, *args, **kwargs):
+            if request.method != 'GET':
+                return await view(self, request, *args, **kwargs)
+
+            key = await aresponse_cache_key(endpoint, request, kwargs)
+            cached = await cache.aget(key)
+            if cached is not None:
+                await _aincr(_stats_key(endpoint, 'hits'))
+                return Response(cached)
+
+            await _aincr(_stats_key(endpoint, 'misses'))
+            response = await view(self, request, *args, **kwargs)
+            if response.status_code == 200 and isinstance(response, Response):
+                timeouts = getattr(settings, 'RESPONSE_CACHE_TIMEOUTS', {})
+                await cache.aset(key, response.data, timeouts.get(endpoint, timeout))
+            return response
+        return wrapper
+    return decorator
+
+
+def _version(endpoint):
+    return ResourceVersion.objects.filter(name=endpoint).values_list('version', 'updated_at').first()
+
+
+async def _aversion(endpoint):
+    return await ResourceVersion.objects.filter(name=endpoint).values_list('version', 'updated_at').afirst()
+
+
+def _conditional(endpoint, version, request, kwargs):
+    """
+    The ETag and Last-Modified of a request at ``version``, as the headers of
+    an empty response, and the 304 (or 412) response its preconditions call
+    for, if any.
+    """
+    number, updated_at = version or (0, None)
+    # Payloads are rendered per media type; the digest covers the host
+    parts = [
+        endpoint, str(number), updated_at.isoformat() if updated_at else '',
+        request.accepted_media_type or '', _request_digest(request, kwargs),
+    ]
+    # Weak: the buffered view and favorite counters are not versioned
+    etag = f'W/"{hashlib.sha1("|".join(parts).encode()).hexdigest()}"'
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+
+    validators = HttpResponse()
+    validators['ETag'] = etag
+    if last_modified:
+        validators['Last-Modified'] = http_date(last_modified)
+    # Shared caches must revalidate before reusing a response
+    patch_cache_control(validators, no_cache=True)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified, response=validators)
+    return validators, response if response is not validators else None
+
+
+def _add_validators(response, validators):
+    if response.status_code == 200:
+        for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+            if header in validators:
+                response[header] = validators[header]
+    return response
+
+
+def conditional_response(endpoint, version_of=None):
+    """
+    Answer GET requests of a view method whose If-None-Match or
+    If-Modified-Since validators are still current with 304 Not Modified,
+    without running it. Validators are derived from the version of
+    ``version_of`` (default: ``endpoint``), read in one query, and the
+    normalized request; the response body is never hashed.
+    """
+    version_of = version_of or endpoint
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_method(self, request, *args, **kwargs)
+
+            # On the view's replica, so the version is never ahead of the data
+            with use_replica():
+                validators, not_modified = _conditional(endpoint, _version(version_of), request, kwargs)
+                if not_modified is not None:
+                    return not_modified
+                return _add_validators(view_method(self, request, *args, **kwargs), validators)
+        return wrapper
+    return decorator
+
+
+def aconditional_response(endpoint, version_of=None):
+    """conditional_response for async view handlers (see async_views.py)."""
+    version_of = version_of or endpoint
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view(self, request, *args, **kwargs)
+
+            with use_replica():
+                validators, not_modified = _conditional(endpoint, await _aversion(version_of), request, kwargs)
+                if not_modified is not None:
+                    return not_modified
+                return _add_validators(await view(self, request, *args, **kwargs), validators)
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    stats = {}
+    for endpoint, timeout in sorted(CACHED_ENDPOINTS.items()):
+        hits = cache.get(_stats_key(endpoint, 'hits'), 0)
+        misses = cache.get(_stats_key(endpoint, 'misses'), 0)
+        total = hits + misses
+        stats[endpoint] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None,
+            'timeout': getattr(settings, 'RESPONSE_CACHE_TIMEOUTS', {}).get(endpoint, timeout),
+            'generation': endpoint_generation(endpoint),
+        }
+    return stats
@@ -0,0 +1,103 @@
+import atexit
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from .models import Property
+
+COUNTER_FIELDS = ('views', 'favorites')
+FLUSH_BATCH_SIZE = 500
+
+
+class CounterBuffer:
+    """
+    Write-behind buffer for the Property view and favorite counters.
+
+    Increments are accumulated in process memory and written back with one
+    ``UPDATE ... SET views = views + CASE ...`` per field and batch, either
+    every ``flush_interval`` seconds or once ``max_pending`` listings are
+    waiting. At most one interval of increments is lost if the process dies
+    without running its exit hook.
+    """
+
+    def __init__(self, flush_interval=None, max_pending=None):
+        self.flush_interval = flush_interval or getattr(settings, 'PROPERTY_COUNTER_FLUSH_INTERVAL', 5)
+        self.max_pending = max_pending or getattr(settings, 'PROPERTY_COUNTER_MAX_PENDING', 1000)
+        self.lock = threading.Lock()
+        self.pending = {field: defaultdict(int) for field in COUNTER_FIELDS}
+        self.timer = None
+        atexit.register(self.flush)
+
+    def increment(self, property_id, field, amount=1):
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f'Unknown counter: {field}')
+        with self.lock:
+            self.pending[field][property_id] += amount
+            should_flush = len(self.pending[field]) >= self.max_pending
+            if not should_flush:
+                self._schedule()
+        if should_flush:
+            self.flush()
+
+    def pending_value(self, property_id, field):
+        with self.lock:
+            return self.pending[field].get(property_id, 0)
+
+    def current_value(self, instance, field):
+        """Persisted value of ``field`` on ``instance`` plus unflushed increments."""
+        return max(getattr(instance, field) + self.pending_value(instance.pk, field), 0)
+
+    def _schedule(self):
+        if self.timer is None:
+            self.timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # Timer threads get their own database connections
+            connections.close_all()
+
+    def flush(self):
+        with self.lock:
+            pending = {field: dict(values) for field, values in self.pending.items() if values}
+            self.pending = {field: defaultdict(int) for field in COUNTER_FIELDS}
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not pending:
+            return 0
+
+        try:
+            with transaction.atomic():
+                for field, values in pending.items():
+                    items = list(values.items())
+                    for start in range(0, len(items), FLUSH_BATCH_SIZE):
+                        batch = items[start:start + FLUSH_BATCH_SIZE]
+                        delta = Case(
+                            *[When(pk=pk, then=Value(amount)) for pk, amount in batch],
+                            default=Value(0),
+                            output_field=IntegerField(),
+                        )
+                        # Counters never go below zero
+                        Property.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                            **{field: Greatest(F(field) + delta, Value(0))}
+                        )
+        except Exception:
+            # Put the increments back so the next flush retries them
+            with self.lock:
+                for field, values in pending.items():
+                    for pk, amount in values.items():
+                        self.pending[field][pk] += amount
+                self._schedule()
+            raise
+        return sum(len(values) for values in pending.values())
+
+
+counters = CounterBuffer()
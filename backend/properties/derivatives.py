@@ -0,0 +1,52 @@
+import io
+
+from PIL import Image, ImageOps
+
+# Bounding boxes; images are scaled down to fit and never enlarged
+DERIVATIVE_SIZES = {
+    'full': (1920, 1440),
+    'card': (800, 600),
+    'thumbnail': (320, 240),
+}
+# WebP first, JPEG for clients without WebP support
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def _flatten(image):
+    # JPEG has no alpha channel
+    if image.mode == 'RGB':
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+    return background
+
+
+def render_derivatives(data):
+    """
+    Resize the encoded image ``data`` to every size in DERIVATIVE_SIZES and
+    encode each in every format. Returns ``{size: {'width', 'height', format:
+    bytes}}``.
+
+    Runs in the image worker processes, so it only depends on Pillow. Sizes
+    are produced largest first, each from the previous one, and JPEG sources
+    are decoded at the smallest scale that still covers the largest size.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        source.draft('RGB', DERIVATIVE_SIZES['full'])
+        image = ImageOps.exif_transpose(source)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    rendered = {}
+    for size, box in DERIVATIVE_SIZES.items():
+        image = image.copy()
+        image.thumbnail(box, Image.LANCZOS)
+        result = {'width': image.width, 'height': image.height}
+        for extension, (format, options) in DERIVATIVE_FORMATS.items():
+            buffer = io.BytesIO()
+            (image if format == 'WEBP' else _flatten(image)).save(buffer, format, **options)
+            result[extension] = buffer.getvalue()
+        rendered[size] = result
+    return rendered
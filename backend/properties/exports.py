@@ -0,0 +1,84 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .readers import PropertyReader
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_CHUNK_SIZE = 2000
+# A small first chunk gets the first rows out before the bulk of the query is read
+FIRST_CHUNK_SIZE = 100
+
+# Nested objects that are flattened (agent) or duplicated by other columns in CSV
+CSV_SKIPPED_FIELDS = {'agent', 'coordinates', 'dimensions'}
+CSV_AGENT_FIELDS = ['name', 'email', 'phone']
+
+
+class Echo:
+    """File-like object that hands back what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def chunks(rows):
+    chunk = []
+    size = FIRST_CHUNK_SIZE
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+            size = EXPORT_CHUNK_SIZE
+    if chunk:
+        yield chunk
+
+
+def _json(value):
+    return json.dumps(value, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def stream_ndjson(reader, rows):
+    for chunk in chunks(rows):
+        yield ''.join(_json(item) + '\n' for item in reader.serialize(chunk))
+
+
+def stream_csv(reader, rows):
+    columns = [name for name in reader.flat_field_names if name not in CSV_SKIPPED_FIELDS]
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns + [f'agent_{field}' for field in CSV_AGENT_FIELDS])
+
+    for chunk in chunks(rows):
+        lines = []
+        for item in reader.serialize(chunk, nested=False):
+            values = [
+                _json(item[name]) if isinstance(item[name], (list, dict)) else item[name]
+                for name in columns
+            ]
+            agent = item['agent'] or {}
+            values.extend(agent.get(field) for field in CSV_AGENT_FIELDS)
+            lines.append(writer.writerow(values))
+        yield ''.join(lines)
+
+
+def export_response(queryset, format, request=None, filename='properties'):
+    """
+    Stream every row of ``queryset`` as CSV or newline-delimited JSON.
+
+    Rows are read with ``iterator()`` and rendered a chunk at a time by
+    PropertyReader, so memory use does not depend on the size of the export.
+    The database is resolved here, since the stream is read after the view
+    (and its read_from_replica context) has returned.
+    """
+    alias = queryset.db
+    reader = PropertyReader(request, using=alias)
+    rows = reader.values(queryset.using(alias)).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    stream = stream_csv(reader, rows) if format == 'csv' else stream_ndjson(reader, rows)
+    response = StreamingHttpResponse(stream, content_type=EXPORT_CONTENT_TYPES[format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{format}"'
+    return response
@@ -0,0 +1,109 @@
+import hashlib
+import json
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, CharField, Count, Value, When
+
+from .models import Property
+from .search import canonical_filters, filter_conditions, search_queryset
+
+FACETS_CACHE_TIMEOUT = 60 * 10
+FACETS_GENERATION_KEY = 'facets:generation'
+
+# Facet name -> (grouped column, filter it is excluded from)
+FACETS = {
+    'category': ('category', 'category'),
+    'real_estate_type': ('real_estate_type', 'real_estate_type'),
+    'land_type': ('land_type', 'land_type'),
+    'listing_type': ('listing_type', 'listing_type'),
+    'city': ('city', 'city'),
+    'bedrooms': ('bedrooms', 'bedrooms'),
+    'price': ('price_bucket', 'price_range'),
+}
+
+PRICE_BUCKETS = [100000, 250000, 500000, 750000, 1000000, 2000000, 5000000]
+
+
+def price_bucket_expression():
+    whens = []
+    lower = 0
+    for upper in PRICE_BUCKETS:
+        whens.append(When(price__lt=upper, then=Value(f'{lower}-{upper}')))
+        lower = upper
+    return Case(*whens, default=Value(f'{lower}+'), output_field=CharField())
+
+
+def _generation():
+    return cache.get_or_set(FACETS_GENERATION_KEY, 1, None)
+
+
+def bump_generation():
+    try:
+        cache.incr(FACETS_GENERATION_KEY)
+    except ValueError:
+        cache.set(FACETS_GENERATION_KEY, 1, None)
+
+
+def compute_facets(filters):
+    """
+    Count listings per facet value in one grouped query.
+
+    Each facet is counted with every filter applied except its own, so a
+    sidebar can show how many results selecting another value would give.
+    Filters that do not belong to a facet narrow the base queryset; facet
+    filters become boolean columns in the GROUP BY so the per-facet
+    exclusion can be done on the grouped rows.
+    """
+    conditions = filter_conditions(filters)
+    facet_filters = {filter_key for _, filter_key in FACETS.values()}
+
+    queryset = Property.objects.filter(status='active')
+    queryset = queryset.filter(*[q for key, q in conditions.items() if key not in facet_filters])
+    search = filters.get('search')
+    if isinstance(search, str):
+        queryset = search_queryset(queryset, search, ranked=False)
+
+    flags = {}
+    for key, condition in conditions.items():
+        if key in facet_filters:
+            flags[f'match_{key}'] = Case(
+                When(condition, then=Value(True)), default=Value(False), output_field=BooleanField()
+            )
+
+    columns = [column for column, _ in FACETS.values()]
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=price_bucket_expression(), **flags)
+        .values(*columns, *flags)
+        .annotate(count=Count('id'))
+    )
+
+    counts = {name: defaultdict(int) for name in FACETS}
+    for row in rows:
+        failed = [name for name in flags if not row[name]]
+        for name, (column, filter_key) in FACETS.items():
+            # A row counts towards a facet if it passes every other facet filter
+            if any(flag != f'match_{filter_key}' for flag in failed):
+                continue
+            if row[column] is not None:
+                counts[name][row[column]] += row['count']
+
+    return {
+        name: [
+            {'value': value, 'count': count}
+            for value, count in sorted(values.items(), key=lambda item: (-item[1], str(item[0])))
+        ]
+        for name, values in counts.items()
+    }
+
+
+def get_facets(filters):
+    canonical = json.dumps(canonical_filters(filters), sort_keys=True, separators=(',', ':'), default=str)
+    digest = hashlib.sha1(canonical.encode()).hexdigest()
+    key = f'facets:{_generation()}:{digest}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(filters)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
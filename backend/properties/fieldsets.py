@@ -0,0 +1,85 @@
+from functools import lru_cache
+
+from rest_framework.exceptions import APIException
+
+
+class InvalidFieldset(APIException):
+    status_code = 400
+    default_code = 'invalid_fieldset'
+
+    def __init__(self, message):
+        super().__init__({'error': message})
+
+
+@lru_cache(maxsize=None)
+def field_names(serializer_class):
+    return list(serializer_class().fields)
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def select_fields(query_params, serializer_class):
+    """
+    Names of the fields of ``serializer_class`` a response renders, in
+    serializer order, or None for all of them.
+
+    Without ``?fields=`` or ``?expand=`` every field is rendered. Otherwise
+    the response holds the fields listed in ``?fields=`` (every field but the
+    ``expandable_fields`` of the serializer when it is absent or empty) plus
+    the relations listed in ``?expand=``.
+    """
+    if 'fields' not in query_params and 'expand' not in query_params:
+        return None
+    available = field_names(serializer_class)
+    expandable = serializer_class.expandable_fields
+    fields = _names(query_params.get('fields', ''))
+    expand = _names(query_params.get('expand', ''))
+
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise InvalidFieldset(f'Unknown fields: {", ".join(unknown)}')
+    unknown = [name for name in expand if name not in expandable]
+    if unknown:
+        raise InvalidFieldset(f'Cannot expand {", ".join(unknown)}; use {", ".join(expandable)}')
+
+    selected = set(fields) if fields else set(available) - set(expandable)
+    selected.update(expand)
+    return [name for name in available if name in selected]
+
+
+class SparseFieldsMixin:
+    """ModelSerializer taking a ``fields`` list; the other fields are dropped before rendering."""
+
+    expandable_fields = []
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """
+    ``?fields=`` and ``?expand=`` on the read actions of a viewset. The
+    serializer renders only the selected fields, and get_queryset() loads
+    only the relations for which ``expanded()`` is true.
+    """
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            read = self.request.method in ('GET', 'HEAD')
+            self._fieldset = select_fields(self.request.query_params, self.get_serializer_class()) if read else None
+        return self._fieldset
+
+    def expanded(self, relation):
+        fieldset = self.get_fieldset()
+        return fieldset is None or relation in fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            kwargs['fields'] = fieldset
+        return super().get_serializer(*args, **kwargs)
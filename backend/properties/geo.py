@@ -0,0 +1,147 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Avg, Count, Max, Min, Q
+from django.db.models.functions import Substr
+
+GEOHASH_PRECISION = 12
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# At this zoom level and above the map shows individual listings
+CLUSTER_MAX_ZOOM = 14
+MAX_ZOOM = 22
+# Most individual listings a map_data response carries
+MAP_POINT_LIMIT = 1000
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude = float(latitude)
+    longitude = float(longitude)
+
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(geohash) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits = bits << 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits = bits << 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(geohash)
+
+
+def limit_points(rows):
+    """Split up to MAP_POINT_LIMIT + 1 fetched rows into the rows sent and whether any were left out."""
+    return rows[:MAP_POINT_LIMIT], len(rows) > MAP_POINT_LIMIT
+
+
+def cluster_precision(zoom):
+    # Roughly one geohash character per two zoom levels keeps clusters
+    # at a similar on-screen size across the zoom range
+    return max(1, min(7, zoom // 2 + 1))
+
+
+class Viewport:
+    def __init__(self, south, west, north, east, zoom):
+        self.south = south
+        self.west = west
+        self.north = north
+        self.east = east
+        self.zoom = zoom
+
+    @classmethod
+    def from_query_params(cls, params):
+        """
+        Build a viewport from ``sw_lat``, ``sw_lng``, ``ne_lat``, ``ne_lng``
+        and ``zoom``. Returns None when no viewport was requested and raises
+        ValueError for incomplete or malformed values.
+        """
+        keys = ['sw_lat', 'sw_lng', 'ne_lat', 'ne_lng']
+        if not any(params.get(key) for key in keys):
+            return None
+        if not all(params.get(key) for key in keys):
+            raise ValueError('sw_lat, sw_lng, ne_lat and ne_lng are all required')
+
+        try:
+            south, west, north, east = (Decimal(params[key]) for key in keys)
+            zoom = int(params.get('zoom', CLUSTER_MAX_ZOOM))
+        except (InvalidOperation, ValueError):
+            raise ValueError('Viewport coordinates and zoom must be numeric')
+        # NaN and infinities parse but cannot be compared or queried
+        if not all(value.is_finite() for value in (south, west, north, east)):
+            raise ValueError('Viewport coordinates must be finite numbers')
+
+        if not (-90 <= south <= north <= 90):
+            raise ValueError('Latitudes must satisfy -90 <= sw_lat <= ne_lat <= 90')
+        if not (-180 <= west <= 180 and -180 <= east <= 180):
+            raise ValueError('Longitudes must be between -180 and 180')
+        if not (0 <= zoom <= MAX_ZOOM):
+            raise ValueError(f'zoom must be between 0 and {MAX_ZOOM}')
+
+        return cls(south, west, north, east, zoom)
+
+    @property
+    def clustered(self):
+        return self.zoom < CLUSTER_MAX_ZOOM
+
+    def filter(self, queryset):
+        queryset = queryset.filter(latitude__range=(self.south, self.north))
+        if self.west <= self.east:
+            return queryset.filter(longitude__range=(self.west, self.east))
+        # Viewport crosses the antimeridian
+        return queryset.filter(Q(longitude__gte=self.west) | Q(longitude__lte=self.east))
+
+    def cluster_rows(self, queryset):
+        precision = cluster_precision(self.zoom)
+        return (
+            self.filter(queryset)
+            .order_by()
+            .prefetch_related(None)
+            .annotate(cell=Substr('geohash', 1, precision))
+            .values('cell')
+            .annotate(
+                count=Count('id'),
+                latitude=Avg('latitude'),
+                longitude=Avg('longitude'),
+                min_price=Min('price'),
+                max_price=Max('price'),
+            )
+            .order_by('cell')
+        )
+
+    @staticmethod
+    def cluster(row):
+        return {
+            'geohash': row['cell'],
+            'count': row['count'],
+            'coordinates': {
+                'lat': float(row['latitude']),
+                'lng': float(row['longitude'])
+            },
+            'price_range': {
+                'min': row['min_price'],
+                'max': row['max_price']
+            },
+        }
+
+    def clusters(self, queryset):
+        return [self.cluster(row) for row in self.cluster_rows(queryset)]
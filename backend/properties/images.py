@@ -0,0 +1,141 @@
+import logging
+import multiprocessing
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+
+from . import caching
+from .derivatives import DERIVATIVE_FORMATS, DERIVATIVE_SIZES, render_derivatives
+from .models import Agent, PropertyImage
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_ROOT = 'derivatives'
+
+# Image field, derivatives field and the cached endpoints rendering them
+IMAGE_FIELDS = {
+    PropertyImage: ('image', 'derivatives', ['properties:list', 'properties:map_data', 'properties:featured']),
+    Agent: ('profile_image', 'profile_image_derivatives', ['agents:list', 'properties:list', 'properties:featured']),
+}
+
+_upload_pool = None
+
+
+def worker_pool(max_workers=None):
+    # Spawned, not forked: workers must not inherit database connections or
+    # the threads of the server process
+    return ProcessPoolExecutor(
+        max_workers=max_workers or settings.IMAGE_WORKERS,
+        mp_context=multiprocessing.get_context('spawn'),
+    )
+
+
+def upload_pool():
+    global _upload_pool
+    if _upload_pool is None:
+        _upload_pool = worker_pool()
+    return _upload_pool
+
+
+def needs_derivatives(instance):
+    field, derivatives_field, _ = IMAGE_FIELDS[type(instance)]
+    file = getattr(instance, field)
+    return bool(file) and getattr(instance, derivatives_field).get('source') != file.name
+
+
+def read_source(file):
+    """The encoded bytes of an image, or None when the file cannot be read."""
+    try:
+        with file.open('rb'):
+            return file.read()
+    except OSError:
+        logger.warning('Image %s could not be read', file.name)
+        return None
+
+
+def rendered_or_none(render, name):
+    try:
+        return render()
+    except Exception:
+        logger.exception('Could not render derivatives of %s', name)
+        return None
+
+
+def store_derivatives(model, pk, name, rendered):
+    """
+    Save the rendered files and record them on the row, unless its image was
+    replaced or deleted in the meantime. ``rendered`` is None when rendering
+    failed; the row is then marked as done so it is not retried on every save
+    (the backfill command's --force retries it). Returns whether the row was
+    updated.
+    """
+    field, derivatives_field, _ = IMAGE_FIELDS[model]
+    storage = model._meta.get_field(field).storage
+    derivatives = {'source': name}
+    stem = posixpath.splitext(name)[0]
+    for size, result in (rendered or {}).items():
+        entry = {'width': result['width'], 'height': result['height']}
+        for extension in DERIVATIVE_FORMATS:
+            path = posixpath.join(DERIVATIVE_ROOT, f'{stem}-{size}.{extension}')
+            if storage.exists(path):
+                storage.delete(path)
+            entry[extension] = storage.save(path, ContentFile(result[extension]))
+        derivatives[size] = entry
+    # A queryset update keeps this from firing post_save and scheduling again
+    return model.objects.filter(pk=pk, **{field: name}).update(**{derivatives_field: derivatives}) > 0
+
+
+def schedule(instance):
+    """
+    Render the derivatives of a new upload in the worker pool and store them
+    when done. With IMAGE_WORKERS = 0 they are rendered inline.
+    """
+    model = type(instance)
+    field, _, endpoints = IMAGE_FIELDS[model]
+    file = getattr(instance, field)
+    name = file.name
+    data = read_source(file)
+
+    if data is None or not settings.IMAGE_WORKERS:
+        rendered = data and rendered_or_none(lambda: render_derivatives(data), name)
+        if store_derivatives(model, instance.pk, name, rendered):
+            caching.invalidate(*endpoints)
+        return
+
+    def finish(future):
+        # Runs on the pool's result thread, which has its own connection
+        try:
+            if store_derivatives(model, instance.pk, name, rendered_or_none(future.result, name)):
+                caching.invalidate(*endpoints)
+        finally:
+            connection.close()
+
+    upload_pool().submit(render_derivatives, data).add_done_callback(finish)
+
+
+def _absolute(url, request):
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def derivative_urls(derivatives, request=None):
+    """``{size: {'width', 'height', 'webp', 'jpg'}}`` for the rendered sizes of an image."""
+    urls = {}
+    for size in DERIVATIVE_SIZES:
+        entry = derivatives.get(size)
+        if entry:
+            urls[size] = {'width': entry['width'], 'height': entry['height']}
+            for extension in DERIVATIVE_FORMATS:
+                urls[size][extension] = _absolute(default_storage.url(entry[extension]), request)
+    return urls
+
+
+def image_url(file, derivatives, size, format='webp'):
+    """URL of one derivative of ``file``, or of the original while none is rendered."""
+    entry = derivatives.get(size) if derivatives.get('source') == file.name else None
+    if entry:
+        return file.storage.url(entry[format])
+    return file.url
@@ -0,0 +1,245 @@
+import csv
+import json
+import os
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, models, transaction
+from django.utils import timezone
+
+from . import agent_stats, caching, facets, market, percolator, similarity, tiles
+from .models import Agent, Property
+from .search import get_search_backend
+
+IMPORT_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+# Columns a feed cannot set: maintained by the database, save() or the API
+EXCLUDED_FIELDS = {'id', 'geohash', 'agent', 'created_at', 'updated_at', 'views', 'favorites'}
+IMPORT_FIELDS = {
+    field.name: field for field in Property._meta.concrete_fields if field.name not in EXCLUDED_FIELDS
+}
+AGENT_COLUMN = 'agent_license'
+CSV_BOOLEANS = {'true': True, 'yes': True, '1': True, 'false': False, 'no': False, '0': False}
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension not in IMPORT_FORMATS:
+        raise ValueError(f'Unsupported file type {extension or "(none)"}; use .csv, .jsonl or .ndjson')
+    return IMPORT_FORMATS[extension]
+
+
+def read_csv(stream):
+    """Yield (line number, row, errors) for each record of a CSV feed."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        values = {}
+        errors = {}
+        if row.pop(None, None) is not None:
+            errors['__all__'] = ['Row has more columns than the header.']
+        for name, value in row.items():
+            field = IMPORT_FIELDS.get(name)
+            if value in ('', None):
+                # Empty cells clear nullable fields and leave the rest at their default
+                if field is None or field.null:
+                    values[name] = None
+                continue
+            if isinstance(field, models.BooleanField) and value.lower() in CSV_BOOLEANS:
+                value = CSV_BOOLEANS[value.lower()]
+            elif isinstance(field, models.JSONField):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    errors[name] = ['Enter valid JSON.']
+            values[name] = value
+        yield reader.line_num, values, errors
+
+
+def read_jsonl(stream):
+    """Yield (line number, row, errors) for each non-blank line of a JSON Lines feed."""
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as e:
+            yield line, None, {'__all__': [f'Invalid JSON: {e}']}
+            continue
+        if not isinstance(row, dict):
+            yield line, None, {'__all__': ['Each line must be a JSON object.']}
+            continue
+        yield line, row, {}
+
+
+class ImportResult:
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, external_id, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'external_id': external_id, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'dry_run': self.dry_run,
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+
+class ListingImporter:
+    """
+    Upsert listings from a CSV or JSON Lines feed, keyed by ``external_id``.
+
+    Rows are read lazily and processed in batches: each batch is validated
+    with the Property field constraints, then inserted with ``bulk_create``
+    and updated with ``bulk_update`` in one transaction. Agents are resolved
+    by license number from a map built once per import. Only one batch is
+    held in memory, whatever the size of the feed. Invalid rows are skipped
+    and reported with their line number.
+
+    Bulk writes bypass the model signals, so the market and agent listing
+    statistics are updated and the listings queued for similar-listing
+    updates in each batch's transaction, the search index, tiles and saved
+    search matches are synced after it commits, and the response, search
+    result and facet caches are invalidated at the end.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.agents = dict(Agent.objects.values_list('license_number', 'id'))
+
+    def run(self, stream, format):
+        result = ImportResult(self.dry_run)
+        reader = read_csv(stream) if format == 'csv' else read_jsonl(stream)
+        batch = {}
+        for line, row, errors in reader:
+            result.rows += 1
+            external_id = row.get('external_id') if row else None
+            external_id = str(external_id) if external_id not in (None, '') else None
+            if external_id is None and not errors:
+                errors = {'external_id': ['This field is required.']}
+            if errors:
+                result.add_error(line, external_id, errors)
+                continue
+
+            if external_id in batch or len(batch) >= self.batch_size:
+                # A repeated id is applied on top of the earlier row
+                self.write_batch(batch, result)
+                batch = {}
+            batch[external_id] = (line, row)
+
+        if batch:
+            self.write_batch(batch, result)
+        if result.created or result.updated:
+            self.finish()
+        result.errors.sort(key=lambda error: error['line'])
+        return result
+
+    def build(self, row, existing):
+        errors = {}
+        unknown = sorted(set(row) - set(IMPORT_FIELDS) - {AGENT_COLUMN})
+        if unknown:
+            errors['__all__'] = [f'Unknown fields: {", ".join(unknown)}']
+
+        license_number = row.get(AGENT_COLUMN)
+        agent_id = self.agents.get(str(license_number)) if license_number else None
+        if agent_id is None and (existing is None or license_number):
+            errors[AGENT_COLUMN] = [f'No agent with license number "{license_number}".'
+                                    if license_number else 'This field is required.']
+
+        values = {name: value for name, value in row.items() if name in IMPORT_FIELDS}
+        if existing is None:
+            instance = Property(**values)
+            validated = set(IMPORT_FIELDS)
+        else:
+            instance = existing
+            for name, value in values.items():
+                setattr(instance, IMPORT_FIELDS[name].attname, value)
+            validated = set(values)
+        if agent_id is not None:
+            instance.agent_id = agent_id
+        # Defaults are valid by definition, even the empty JSON ones blank=False rejects
+        validated = {
+            name for name in validated
+            if not (IMPORT_FIELDS[name].has_default()
+                    and getattr(instance, IMPORT_FIELDS[name].attname) == IMPORT_FIELDS[name].get_default())
+        }
+
+        try:
+            instance.clean_fields(exclude=[field.name for field in Property._meta.fields
+                                           if field.name not in validated])
+        except ValidationError as e:
+            errors.update(e.message_dict)
+        if errors:
+            raise ValidationError(errors)
+        instance.set_derived_fields()
+        return instance, set(values) | ({'agent'} if agent_id is not None else set())
+
+    def write_batch(self, batch, result):
+        existing = Property.objects.in_bulk(list(batch), field_name='external_id')
+        created = []
+        updated = []
+        update_fields = {'geohash', 'price_per_sqft', 'updated_at'}
+        lines = {}
+        for external_id, (line, row) in batch.items():
+            current = existing.get(external_id)
+            try:
+                instance, fields = self.build(row, current)
+            except ValidationError as e:
+                result.add_error(line, external_id, e.message_dict)
+                continue
+            lines[external_id] = line
+            if current is None:
+                created.append(instance)
+            else:
+                instance.updated_at = timezone.now()
+                update_fields |= fields
+                updated.append(instance)
+
+        if self.dry_run:
+            result.created += len(created)
+            result.updated += len(updated)
+            return
+
+        try:
+            with transaction.atomic():
+                Property.objects.bulk_create(created)
+                if updated:
+                    Property.objects.bulk_update(updated, sorted(update_fields))
+                market.record(created + updated)
+                agent_stats.record(created + updated)
+                similarity.enqueue([instance.pk for instance in created + updated])
+                transaction.on_commit(lambda: self.sync(created + updated))
+        except DatabaseError as e:
+            for instance in created + updated:
+                result.add_error(lines[instance.external_id], instance.external_id, {'__all__': [str(e)]})
+            return
+        result.created += len(created)
+        result.updated += len(updated)
+
+    def sync(self, instances):
+        backend = get_search_backend()
+        for instance in instances:
+            backend.index(instance)
+            old_latitude = instance.loaded_value('latitude')
+            old_longitude = instance.loaded_value('longitude')
+            if old_latitude is not None and old_longitude is not None:
+                tiles.invalidate_point(old_latitude, old_longitude)
+            tiles.invalidate_point(instance.latitude, instance.longitude)
+        percolator.percolate(instances)
+
+    def finish(self):
+        facets.bump_generation()
+        caching.invalidate('properties:list', 'properties:map_data', 'properties:featured', 'properties:search')
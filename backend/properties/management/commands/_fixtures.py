@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from properties.models import Property, Agent, PropertyImage, PropertyAmenity
+
+def create_listings(size, prefix='fixture', images_per_listing=3, amenities_per_listing=2):
+    """
+    Bulk-create ``size`` active listings with images and amenities for one new
+    agent. Used by the tests and by the benchmark commands, which run inside
+    a transaction they roll back.
+    """
+    user = User.objects.create_user(username=f'{prefix}-agent')
+    agent = Agent.objects.create(
+        user=user, name=f'{prefix.title()} Agent', title='Agent', email=f'{prefix}@example.com',
+        phone='(555) 000-0000', agency='Premium Realty', license_number=f'{prefix.upper()}-0',
+        rating=Decimal('4.5'), total_sales=10, specializations=['residential', 'luxury'],
+    )
+
+    listings = []
+    for i in range(size):
+        latitude = Decimal('10.0') + Decimal(i % 1000) / 1000
+        longitude = Decimal('10.0') + Decimal(i // 1000) / 1000
+        listing = Property(
+            title=f'{prefix} listing {i}', description=f'{prefix} listing number {i}',
+            category='real_estate', real_estate_type='house', listing_type='sale',
+            address=f'{i} {prefix.title()} Street', city=f'{prefix.title()} City', state='Fixture State',
+            country='USA', postal_code='00000', latitude=latitude, longitude=longitude,
+            total_area=1000 + i, bedrooms=3, bathrooms=Decimal('2.0'), floors=2, year_built=2000,
+            price=Decimal('100000') + i,
+            utilities_available=['water'], dimensions_3d={'width': 10, 'length': 20, 'height': 5},
+            featured=True, agent=agent,
+        )
+        listing.set_derived_fields()
+        listings.append(listing)
+    listings = Property.objects.bulk_create(listings, batch_size=500)
+
+    PropertyImage.objects.bulk_create([
+        PropertyImage(property=listing, image=f'properties/{prefix}-{listing.pk}-{order}.jpg',
+                      caption=f'Image {order}', is_primary=(order == 1), order=order)
+        for listing in listings for order in range(images_per_listing)
+    ], batch_size=500)
+    PropertyAmenity.objects.bulk_create([
+        PropertyAmenity(property=listing, name=f'Amenity {n}', icon='star')
+        for listing in listings for n in range(amenities_per_listing)
+    ], batch_size=500)
+    return user, agent, listings
@@ -0,0 +1,187 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from properties.models import Property, Agent, PropertyImage, PropertyAmenity
+
+# (city, state, latitude, longitude, median price)
+CITIES = [
+    ('New York', 'New York', 40.7128, -74.0060, 1100000),
+    ('Los Angeles', 'California', 34.0522, -118.2437, 950000),
+    ('Beverly Hills', 'California', 34.0736, -118.4004, 3500000),
+    ('Malibu', 'California', 34.0259, -118.7798, 2800000),
+    ('San Francisco', 'California', 37.7749, -122.4194, 1300000),
+    ('Seattle', 'Washington', 47.6062, -122.3321, 850000),
+    ('Austin', 'Texas', 30.2672, -97.7431, 600000),
+    ('Houston', 'Texas', 29.7604, -95.3698, 350000),
+    ('Miami', 'Florida', 25.7617, -80.1918, 650000),
+    ('Miami Beach', 'Florida', 25.7907, -80.1300, 1200000),
+    ('Chicago', 'Illinois', 41.8781, -87.6298, 400000),
+    ('Denver', 'Colorado', 39.7392, -104.9903, 600000),
+    ('Boston', 'Massachusetts', 42.3601, -71.0589, 900000),
+    ('Phoenix', 'Arizona', 33.4484, -112.0740, 450000),
+    ('Nashville', 'Tennessee', 36.1627, -86.7816, 500000),
+]
+
+STREETS = ['Oak', 'Maple', 'Cedar', 'Pine', 'Elm', 'Sunset', 'Ocean', 'Hillside', 'Lake', 'Park', 'Main', 'Broadway']
+STREET_TYPES = ['Street', 'Avenue', 'Drive', 'Boulevard', 'Lane', 'Road']
+ADJECTIVES = ['Modern', 'Charming', 'Spacious', 'Luxury', 'Renovated', 'Contemporary', 'Classic', 'Sunny', 'Private']
+FEATURES = [
+    'gourmet kitchen', 'hardwood floors', 'panoramic views', 'private garden', 'rooftop terrace',
+    'smart home technology', 'walk-in closets', 'two-car garage', 'swimming pool', 'home office',
+]
+REAL_ESTATE_AMENITIES = [
+    ('Swimming Pool', 'waves'), ('Parking', 'car'), ('WiFi', 'wifi'), ('Security', 'shield'),
+    ('Gym', 'dumbbell'), ('Garden', 'trees'), ('Air Conditioning', 'wind'), ('Fireplace', 'flame'),
+]
+LAND_AMENITIES = [
+    ('Utilities Available', 'zap'), ('Road Access', 'navigation'), ('Development Rights', 'building'),
+    ('Water Access', 'droplet'), ('Fenced', 'fence'),
+]
+SPECIALIZATIONS = ['residential', 'luxury', 'commercial', 'land', 'rentals', 'first-time buyers', 'investment']
+
+REAL_ESTATE_TYPES = [value for value, _ in Property.REAL_ESTATE_TYPES]
+LAND_TYPES = [value for value, _ in Property.LAND_TYPES]
+LISTING_TYPES = ['sale'] * 6 + ['rent'] * 3 + ['lease', 'auction']
+STATUSES = ['active'] * 17 + ['pending', 'sold', 'off_market']
+
+
+class SyntheticDataGenerator:
+    """
+    Generates production-scale data with bulk_create in fixed-size batches,
+    so memory use stays flat regardless of the target count. Signals do not
+    fire for bulk inserts; derived indexes must be rebuilt afterwards.
+    """
+
+    def __init__(self, seed=None, batch_size=1000, images_per_property=5, amenities_per_property=4, stdout=None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.images_per_property = images_per_property
+        self.amenities_per_property = amenities_per_property
+        self.stdout = stdout
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def generate(self, agent_count, property_count):
+        agent_ids = self.create_agents(agent_count)
+        created = 0
+        while created < property_count:
+            size = min(self.batch_size, property_count - created)
+            self.create_property_batch(size, agent_ids)
+            created += size
+            self.log(f'Created {created}/{property_count} properties')
+        return agent_ids
+
+    def create_agents(self, count):
+        offset = User.objects.filter(username__startswith='generated_agent_').count()
+        password = make_password(None)
+        agent_ids = []
+        for start in range(0, count, self.batch_size):
+            indexes = range(offset + start, offset + min(start + self.batch_size, count))
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(username=f'generated_agent_{i}', email=f'agent{i}@example.com',
+                         first_name='Agent', last_name=str(i), password=password)
+                    for i in indexes
+                ])
+                agents = Agent.objects.bulk_create([
+                    Agent(
+                        user=user, name=f'Agent {i}', title=self.random.choice(['Agent', 'Senior Agent', 'Broker']),
+                        email=user.email, phone=f'(555) {i // 10000 % 1000:03d}-{i % 10000:04d}',
+                        agency=f'{self.random.choice(STREETS)} Realty', license_number=f'GEN{i:08d}',
+                        specializations=self.random.sample(SPECIALIZATIONS, self.random.randint(1, 3)),
+                        rating=Decimal(str(round(self.random.uniform(3.0, 5.0), 2))),
+                        total_sales=self.random.randint(0, 400),
+                    )
+                    for i, user in zip(indexes, users)
+                ])
+            agent_ids.extend(agent.pk for agent in agents)
+            self.log(f'Created {len(agent_ids)}/{count} agents')
+        return agent_ids
+
+    def build_property(self, agent_id):
+        rnd = self.random
+        city, state, latitude, longitude, median_price = rnd.choice(CITIES)
+        category = 'land' if rnd.random() < 0.2 else 'real_estate'
+        latitude = Decimal(str(round(latitude + rnd.gauss(0, 0.08), 6)))
+        longitude = Decimal(str(round(longitude + rnd.gauss(0, 0.08), 6)))
+
+        if category == 'real_estate':
+            property_type = rnd.choice(REAL_ESTATE_TYPES)
+            bedrooms = rnd.randint(1, 6)
+            total_area = int(rnd.gauss(600 + bedrooms * 450, 300))
+            fields = {
+                'real_estate_type': property_type,
+                'bedrooms': bedrooms,
+                'bathrooms': Decimal(rnd.choice(['1.0', '1.5', '2.0', '2.5', '3.0', '3.5', '4.0'])),
+                'floors': rnd.randint(1, 3),
+                'year_built': rnd.randint(1920, 2024),
+            }
+        else:
+            property_type = rnd.choice(LAND_TYPES)
+            lot_size = Decimal(str(round(rnd.uniform(0.1, 40), 2)))
+            total_area = int(lot_size * 43560)
+            fields = {
+                'land_type': property_type,
+                'lot_size': lot_size,
+                'zoning': rnd.choice(['Residential R1', 'Commercial C2', 'Agricultural A1', 'Mixed Use']),
+                'buildable': rnd.random() < 0.8,
+                'utilities_available': rnd.sample(['water', 'electricity', 'gas', 'fiber', 'sewer'], rnd.randint(0, 4)),
+            }
+        label = property_type.replace('_', ' ').title()
+        total_area = max(total_area, 300)
+        price = Decimal(int(median_price * rnd.lognormvariate(0, 0.5)) // 1000 * 1000)
+
+        listing = Property(
+            title=f'{rnd.choice(ADJECTIVES)} {label} in {city}',
+            description=(
+                f'{rnd.choice(ADJECTIVES)} {label.lower()} with {rnd.choice(FEATURES)} '
+                f'and {rnd.choice(FEATURES)}. Close to downtown {city}.'
+            ),
+            category=category,
+            listing_type=rnd.choice(LISTING_TYPES),
+            status=rnd.choice(STATUSES),
+            address=f'{rnd.randint(1, 9999)} {rnd.choice(STREETS)} {rnd.choice(STREET_TYPES)}',
+            city=city, state=state, country='USA', postal_code=f'{rnd.randint(10000, 99999)}',
+            latitude=latitude, longitude=longitude,
+            total_area=total_area,
+            price=price,
+            featured=rnd.random() < 0.02,
+            premium_listing=rnd.random() < 0.05,
+            views=rnd.randint(0, 5000),
+            favorites=rnd.randint(0, 200),
+            agent_id=agent_id,
+            **fields,
+        )
+        # bulk_create skips save(), which sets the geohash and price per square foot
+        listing.set_derived_fields()
+        return listing
+
+    def create_property_batch(self, size, agent_ids):
+        rnd = self.random
+        with transaction.atomic():
+            properties = Property.objects.bulk_create(
+                [self.build_property(rnd.choice(agent_ids)) for _ in range(size)]
+            )
+            images = []
+            amenities = []
+            for listing in properties:
+                image_count = rnd.randint(1, self.images_per_property * 2 - 1) if self.images_per_property else 0
+                primary = rnd.randrange(image_count) if image_count else None
+                images.extend(
+                    PropertyImage(property_id=listing.pk, image=f'properties/generated/{listing.pk}-{order}.jpg',
+                                  caption=f'Photo {order + 1}', is_primary=(order == primary), order=order)
+                    for order in range(image_count)
+                )
+                choices = REAL_ESTATE_AMENITIES if listing.category == 'real_estate' else LAND_AMENITIES
+                amenity_count = min(len(choices), rnd.randint(0, self.amenities_per_property * 2))
+                amenities.extend(
+                    PropertyAmenity(property_id=listing.pk, name=name, icon=icon)
+                    for name, icon in rnd.sample(choices, amenity_count)
+                )
+            PropertyImage.objects.bulk_create(images, batch_size=self.batch_size)
+            PropertyAmenity.objects.bulk_create(amenities, batch_size=self.batch_size)
@@ -0,0 +1,94 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from properties import market
+from properties.geo import Viewport
+from properties.models import Property
+from properties.search import filter_conditions
+from properties.views import SEARCH_SORT_ORDERINGS
+
+# Filters accepted by PropertyViewSet (filterset_fields and price__gte/lte)
+LIST_FILTERS = {
+    'none': {},
+    'category': {'category': 'real_estate'},
+    'real_estate_type': {'real_estate_type': 'house'},
+    'land_type': {'land_type': 'residential_land'},
+    'listing_type': {'listing_type': 'sale'},
+    'city': {'city': 'Austin'},
+    'state': {'state': 'Texas'},
+    'featured': {'featured': True},
+    'price range': {'price__gte': 100000, 'price__lte': 900000},
+}
+LIST_ORDERINGS = ['-created_at', 'price', '-price', 'total_area', '-total_area', '-views']
+
+# Filter bodies accepted by PropertySearchView
+SEARCH_FILTERS = {
+    'none': {},
+    'category': {'category': 'land'},
+    'price_range': {'price_range': {'min': 100000, 'max': 900000}},
+    'area_range': {'area_range': {'min': 1000, 'max': 3000}},
+    'city': {'location': {'city': 'Austin'}},
+    'state': {'location': {'state': 'Texas'}},
+    'bedrooms': {'bedrooms': [2, 3]},
+    'real_estate_type': {'real_estate_type': ['house', 'condo']},
+    'listing_type': {'listing_type': ['sale']},
+}
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN for each supported filter and sort combination and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help='Refresh the planner statistics (ANALYZE) before explaining')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        table = Property._meta.db_table
+        full_scan = re.compile(rf'^(.*\bSCAN {table}$|.*Seq Scan on {table}\b)', re.MULTILINE)
+        sort = re.compile(r'USE TEMP B-TREE FOR ORDER BY|\bSort\b')
+
+        scans = []
+        sorts = 0
+        for name, queryset in self.queries():
+            plan = queryset.explain()
+            if full_scan.search(plan):
+                scans.append(name)
+                self.stdout.write(self.style.ERROR(f'FULL SCAN  {name}'))
+            elif sort.search(plan):
+                sorts += 1
+                self.stdout.write(self.style.WARNING(f'SORT       {name}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'OK         {name}'))
+            if options['verbose_plans']:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        self.stdout.write(f'{sorts} queries sort without an index')
+        if scans:
+            raise CommandError(f'{len(scans)} queries scan the whole {table} table')
+        self.stdout.write(self.style.SUCCESS('No full table scans'))
+
+    def queries(self):
+        for filter_name, filters in LIST_FILTERS.items():
+            for ordering in LIST_ORDERINGS:
+                queryset = Property.objects.active().filter(**filters).order_by(ordering)[:20]
+                yield f'list {filter_name} ordered by {ordering}', queryset
+
+        for filter_name, filters in SEARCH_FILTERS.items():
+            for sort_by, ordering in SEARCH_SORT_ORDERINGS.items():
+                queryset = (
+                    Property.objects.active()
+                    .filter(*filter_conditions(filters).values())
+                    .order_by(ordering, '-id' if ordering.startswith('-') else 'id')[:21]
+                )
+                yield f'search {filter_name} sorted by {sort_by}', queryset
+
+        yield 'featured', Property.objects.active().filter(featured=True)[:6]
+        viewport = Viewport(south=30, west=-98, north=31, east=-97, zoom=16)
+        yield 'map viewport', viewport.filter(Property.objects.active())
+        yield 'market stats', market.segment_rows('sale', 'city', 'Austin')
+        yield 'market breakdown', market.breakdown_rows('sale', 'city')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from properties import caching, market
+from properties.models import Property
+
+DERIVED_FIELDS = ['geohash', 'price_per_sqft']
+
+class Command(BaseCommand):
+    help = 'Recompute the derived fields (geohash, price per square foot) of listings saved before they existed or drifted'
+
+    def handle(self, *args, **options):
+        stale = []
+        rows = Property.objects.values_list('pk', 'latitude', 'longitude', 'price', 'total_area', *DERIVED_FIELDS)
+        for pk, latitude, longitude, price, total_area, geohash, price_per_sqft in rows.iterator(chunk_size=2000):
+            listing = Property(pk=pk, latitude=latitude, longitude=longitude, price=price, total_area=total_area)
+            listing.set_derived_fields()
+            if (listing.geohash, listing.price_per_sqft) != (geohash, price_per_sqft):
+                stale.append((listing, listing.price_per_sqft != price_per_sqft))
+        Property.objects.bulk_update([listing for listing, _ in stale], DERIVED_FIELDS, batch_size=500)
+        self.stdout.write(f'Updated the derived fields of {len(stale)} properties')
+        if not stale:
+            return
+
+        caching.invalidate('properties:list', 'properties:map_data', 'properties:featured', 'properties:search')
+        if any(price_changed for _, price_changed in stale):
+            bins = market.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {bins} market statistics bins'))
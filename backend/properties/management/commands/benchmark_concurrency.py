@@ -0,0 +1,163 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from accounts.tokens import ProfileRefreshToken
+from properties.management.commands.benchmark_endpoints import percentile
+from properties.models import Property
+
+# URL conf and client for each way of serving the API
+MODES = {
+    'wsgi': ('premium_realty.urls', 'threads'),
+    'asgi-sync': ('premium_realty.urls', 'asyncio'),
+    'asgi': ('premium_realty.async_urls', 'asyncio'),
+}
+BENCHMARK_USERNAME = 'benchmark-concurrency'
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput and latency of the read endpoints served by the sync views '
+        'under WSGI, the same views under ASGI, and the async views under ASGI, at high '
+        'concurrency. Requests go through the Django handlers in-process, without a server.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 100],
+                            help='Concurrent requests in flight (one run per value)')
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Measured requests per mode and concurrency level')
+        parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+        parser.add_argument('--no-cache', action='store_true',
+                            help='Disable the response cache to measure uncached requests')
+        parser.add_argument('--output', default=str(Path(settings.BASE_DIR) / 'benchmark-results'),
+                            help='Directory the JSON results are written to')
+
+    def handle(self, *args, **options):
+        # Runs against the existing data: the requests come from several
+        # threads, which would not see fixtures made in a transaction
+        pks = list(Property.objects.active().values_list('pk', flat=True)[:1000])
+        if not pks:
+            raise CommandError('No active listings; run create_sample_data first')
+
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+        token = str(ProfileRefreshToken.for_user(user).access_token)
+        try:
+            if options['no_cache']:
+                with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+                    results = self.run(options, pks, token)
+            else:
+                results = self.run(options, pks, token)
+        finally:
+            user.delete()
+
+        run = {
+            'created_at': timezone.now().isoformat(),
+            'requests': options['requests'],
+            'cache': not options['no_cache'],
+            'properties': len(pks),
+            'modes': results,
+        }
+        output = Path(options['output'])
+        output.mkdir(parents=True, exist_ok=True)
+        path = output / f'concurrency-{timezone.now():%Y%m%d-%H%M%S}.json'
+        path.write_text(json.dumps(run, indent=2))
+        self.report(results)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+    def run(self, options, pks, token):
+        scenarios = self.scenarios(pks, token)
+        results = {}
+        for mode in options['modes']:
+            urlconf, client = MODES[mode]
+            results[mode] = {}
+            with override_settings(ROOT_URLCONF=urlconf):
+                for concurrency in options['concurrency']:
+                    self.stdout.write(f'Benchmarking {mode} at concurrency {concurrency}...')
+                    requests = [scenarios[i % len(scenarios)] for i in range(options['requests'])]
+                    if client == 'threads':
+                        self.send_threaded(scenarios, concurrency)
+                        timings, wall = self.send_threaded(requests, concurrency)
+                    else:
+                        asyncio.run(self.send_async(scenarios, concurrency))
+                        timings, wall = asyncio.run(self.send_async(requests, concurrency))
+                    results[mode][str(concurrency)] = self.summary(timings, wall)
+        return results
+
+    def scenarios(self, pks, token):
+        """(method, path, JSON body, headers) for each request of the mix."""
+        auth = {'Authorization': f'Bearer {token}'}
+        requests = [
+            ('GET', '/api/properties/', None, {}),
+            ('GET', '/api/properties/?ordering=price&page=3', None, {}),
+            ('GET', '/api/properties/featured/', None, {}),
+            ('GET', '/api/properties/map_data/?sw_lat=25&sw_lng=-125&ne_lat=49&ne_lng=-67&zoom=6', None, {}),
+            ('POST', '/api/properties/search/', {'sort_by': 'price_asc'}, auth),
+            ('GET', '/api/agents/', None, {}),
+        ]
+        requests.extend(('GET', f'/api/properties/{pk}/', None, {}) for pk in pks[:20])
+        return requests
+
+    def send_threaded(self, requests, concurrency):
+        local = threading.local()
+
+        def send(request):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            method, path, body, headers = request
+            start = time.perf_counter()
+            response = local.client.generic(method, path, json.dumps(body) if body else '',
+                                            content_type='application/json', headers=headers)
+            return (time.perf_counter() - start) * 1000, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = list(pool.map(send, requests))
+        return timings, time.perf_counter() - start
+
+    async def send_async(self, requests, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(request):
+            method, path, body, headers = request
+            # ASGIHandler gives each request its own context for thread-sensitive code
+            async with semaphore, ThreadSensitiveContext():
+                start = time.perf_counter()
+                response = await client.generic(method, path, json.dumps(body) if body else '',
+                                                content_type='application/json', headers=headers)
+                return (time.perf_counter() - start) * 1000, response.status_code
+
+        start = time.perf_counter()
+        timings = await asyncio.gather(*(send(request) for request in requests))
+        return timings, time.perf_counter() - start
+
+    def summary(self, timings, wall):
+        latencies = [elapsed for elapsed, _ in timings]
+        return {
+            'requests_per_second': round(len(timings) / wall, 1),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'errors': sum(1 for _, status in timings if status >= 400),
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"mode":<10} {"concurrency":>11} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"errors":>7}'
+        )
+        for mode, levels in results.items():
+            for concurrency, result in levels.items():
+                self.stdout.write(
+                    f'{mode:<10} {concurrency:>11} {result["requests_per_second"]:>9.1f} {result["p50_ms"]:>9.2f}'
+                    f' {result["p95_ms"]:>9.2f} {result["p99_ms"]:>9.2f} {result["errors"]:>7}'
+                )
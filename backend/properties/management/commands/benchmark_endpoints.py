@@ -0,0 +1,211 @@
+import json
+import math
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from properties.counters import counters
+from properties.management.commands._fixtures import create_listings
+from properties.models import Agent, Property
+from properties.tiles import tiles_for_point
+
+BENCHMARK_PASSWORD = 'benchmark-password-1234'
+TILE_ZOOM = 12
+
+class Rollback(Exception):
+    pass
+
+def percentile(timings, pct):
+    ordered = sorted(timings)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+class Command(BaseCommand):
+    help = 'Measure p50/p95 latency and queries per request for every API endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20,
+                            help='Measured requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=2,
+                            help='Unmeasured requests per endpoint before timing')
+        parser.add_argument('--size', type=int, default=0,
+                            help='Create this many fixture listings first instead of using the existing data')
+        parser.add_argument('--only', nargs='+', help='Benchmark only these endpoints')
+        parser.add_argument('--no-cache', action='store_true',
+                            help='Disable the response cache to measure uncached requests')
+        parser.add_argument('--output', default=str(Path(settings.BASE_DIR) / 'benchmark-results'),
+                            help='Directory the JSON results are written to')
+        parser.add_argument('--compare', help='Previous results file to compare against')
+
+    def handle(self, *args, **options):
+        if options['no_cache']:
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+                results = self.run(options)
+        else:
+            results = self.run(options)
+
+        run = {
+            'created_at': timezone.now().isoformat(),
+            'iterations': options['iterations'],
+            'cache': not options['no_cache'],
+            'properties': Property.objects.count(),
+            'agents': Agent.objects.count(),
+            'endpoints': results,
+        }
+        output = Path(options['output'])
+        output.mkdir(parents=True, exist_ok=True)
+        path = output / f'endpoints-{timezone.now():%Y%m%d-%H%M%S}.json'
+        path.write_text(json.dumps(run, indent=2))
+
+        previous = None
+        if options['compare']:
+            previous = json.loads(Path(options['compare']).read_text())['endpoints']
+        self.report(results, previous)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+    def run(self, options):
+        # Everything, including the writes made by POST endpoints, happens in
+        # a transaction that is rolled back at the end. Counter increments are
+        # flushed inside it rather than from the timer thread, which would
+        # block on the open write transaction.
+        flush_interval = counters.flush_interval
+        counters.flush_interval = 24 * 60 * 60
+        try:
+            with transaction.atomic():
+                scenarios = self.scenarios(options['size'])
+                if options['only']:
+                    unknown = set(options['only']) - set(scenarios)
+                    if unknown:
+                        raise CommandError(f'Unknown endpoints: {", ".join(sorted(unknown))}')
+                    scenarios = {name: scenarios[name] for name in options['only']}
+
+                results = {}
+                for name, request in scenarios.items():
+                    self.stdout.write(f'Benchmarking {name}...')
+                    results[name] = self.measure(name, request, options['warmup'], options['iterations'])
+                counters.flush()
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            counters.flush_interval = flush_interval
+        return results
+
+    def measure(self, name, request, warmup, iterations):
+        for _ in range(warmup):
+            request()
+
+        timings = []
+        queries = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = request()
+                timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(f'{name} returned {response.status_code}')
+            queries.append(len(context))
+
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': max(queries),
+        }
+
+    def scenarios(self, size):
+        if size:
+            create_listings(size, prefix='benchmark')
+
+        listing = Property.objects.active().order_by('id').first()
+        agent = Agent.objects.order_by('id').first()
+        if listing is None or agent is None:
+            raise CommandError('No data to benchmark; run create_sample_data --properties N or pass --size')
+
+        User.objects.create_superuser('benchmark-admin', 'benchmark@example.com', BENCHMARK_PASSWORD)
+        anonymous = APIClient()
+        client = APIClient()
+        tokens = client.post('/api/login/', {
+            'username': 'benchmark-admin', 'password': BENCHMARK_PASSWORD,
+        }, format='json').data
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+
+        lat, lng = float(listing.latitude), float(listing.longitude)
+        z, x, y = tiles_for_point(lat, lng)[TILE_ZOOM]
+        search_body = {'location': {'city': listing.city}, 'page_size': 20}
+        registrations = iter(range(10 ** 9))
+
+        def refresh():
+            # Refresh tokens rotate, so each request uses the one returned last
+            response = anonymous.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+            tokens['refresh'] = response.data.get('refresh', tokens['refresh'])
+            return response
+
+        def register():
+            n = next(registrations)
+            return anonymous.post('/api/register/', {
+                'username': f'benchmark-user-{n}', 'email': f'benchmark{n}@example.com',
+                'password1': BENCHMARK_PASSWORD, 'password2': BENCHMARK_PASSWORD,
+            }, format='json')
+
+        return {
+            'property list': lambda: anonymous.get('/api/properties/'),
+            'property list filtered': lambda: anonymous.get('/api/properties/', {
+                'city': listing.city, 'ordering': '-price',
+            }),
+            'property list search': lambda: anonymous.get('/api/properties/', {'search': listing.city}),
+            'property detail': lambda: anonymous.get(f'/api/properties/{listing.pk}/'),
+            'increment_views': lambda: client.post(f'/api/properties/{listing.pk}/increment_views/'),
+            'favorite': lambda: client.post(f'/api/properties/{listing.pk}/favorite/'),
+            'featured': lambda: anonymous.get('/api/properties/featured/'),
+            'map_data': lambda: anonymous.get('/api/properties/map_data/', {'city': listing.city}),
+            'map_data clusters': lambda: anonymous.get('/api/properties/map_data/', {
+                'sw_lat': lat - 1, 'sw_lng': lng - 1, 'ne_lat': lat + 1, 'ne_lng': lng + 1, 'zoom': 8,
+            }),
+            'map_data points': lambda: anonymous.get('/api/properties/map_data/', {
+                'sw_lat': lat - 0.01, 'sw_lng': lng - 0.01, 'ne_lat': lat + 0.01, 'ne_lng': lng + 0.01, 'zoom': 16,
+            }),
+            'search': lambda: client.post('/api/properties/search/', search_body, format='json'),
+            'search keyword': lambda: client.post('/api/properties/search/', {
+                **search_body, 'search': listing.title.split()[0],
+            }, format='json'),
+            'search facets': lambda: client.post('/api/properties/search/facets/', search_body, format='json'),
+            'tile': lambda: anonymous.get(f'/api/properties/tiles/{z}/{x}/{y}/'),
+            'cache stats': lambda: client.get('/api/cache/stats/'),
+            'agent list': lambda: anonymous.get('/api/agents/'),
+            'agent detail': lambda: anonymous.get(f'/api/agents/{agent.pk}/'),
+            'login': lambda: anonymous.post('/api/login/', {
+                'username': 'benchmark-admin', 'password': BENCHMARK_PASSWORD,
+            }, format='json'),
+            'register': register,
+            'user profile': lambda: client.get('/api/user/'),
+            'token refresh': refresh,
+        }
+
+    def report(self, results, previous=None):
+        header = f'{"endpoint":<24} {"p50 ms":>9} {"p95 ms":>9} {"queries":>8}'
+        if previous:
+            header += f' {"p50 change":>11} {"p95 change":>11} {"queries was":>12}'
+        self.stdout.write(header)
+
+        for name, result in results.items():
+            line = f'{name:<24} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} {result["queries"]:>8}'
+            before = (previous or {}).get(name)
+            if before:
+                line += (
+                    f' {self.change(before["p50_ms"], result["p50_ms"]):>11}'
+                    f' {self.change(before["p95_ms"], result["p95_ms"]):>11}'
+                    f' {before["queries"]:>12}'
+                )
+            self.stdout.write(line)
+
+    def change(self, before, after):
+        if not before:
+            return '-'
+        return f'{(after - before) / before:+.1%}'
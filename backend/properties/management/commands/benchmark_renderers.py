@@ -0,0 +1,77 @@
+import json
+import statistics
+import time
+
+import msgpack
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from premium_realty.middleware import compress
+from premium_realty.renderers import MessagePackRenderer, ORJSONRenderer
+from properties.management.commands._fixtures import create_listings
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = 'Compare encode time and response size of the JSON, orjson and MessagePack renderers and compression'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=2000,
+                            help='Fixture listings created (and rolled back) for the payloads')
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        renderers = {'json': JSONRenderer(), 'orjson': ORJSONRenderer(), 'msgpack': MessagePackRenderer()}
+        try:
+            with transaction.atomic():
+                payloads = self.payloads(options['size'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(f'{"payload":<10} {"renderer":<8} {"encode ms":>10} {"bytes":>10} '
+                          f'{"gzip":>9} {"gzip ms":>8} {"br":>9} {"br ms":>7}')
+        for name, data in payloads.items():
+            bodies = {}
+            for renderer_name, renderer in renderers.items():
+                body, encode_ms = self.time(lambda: renderer.render(data), options['repeat'])
+                bodies[renderer_name] = body
+                gzipped, gzip_ms = self.time(lambda: compress('gzip', body), options['repeat'])
+                brotli, brotli_ms = self.time(lambda: compress('br', body), options['repeat'])
+                self.stdout.write(
+                    f'{name:<10} {renderer_name:<8} {encode_ms:>10.2f} {len(body):>10} '
+                    f'{len(gzipped):>9} {gzip_ms:>8.2f} {len(brotli):>9} {brotli_ms:>7.2f}'
+                )
+
+            # All renderers must carry the same data
+            expected = json.loads(bodies['json'])
+            if json.loads(bodies['orjson']) != expected or msgpack.unpackb(bodies['msgpack']) != expected:
+                raise CommandError(f'Renderers disagree on the {name} payload')
+
+        self.stdout.write(self.style.SUCCESS('All renderers produce the same data'))
+
+    def payloads(self, size):
+        user, _, listings = create_listings(size, prefix='benchmark')
+        client = APIClient()
+        client.force_authenticate(user)
+        city = listings[0].city
+        # Rendered data straight from the views, before any renderer runs
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            return {
+                'list': client.get('/api/properties/', {'city': city}).data,
+                'map_data': client.get('/api/properties/map_data/', {'city': city}).data,
+                'search': client.post('/api/properties/search/', {
+                    'location': {'city': city}, 'page_size': 100,
+                }, format='json').data,
+            }
+
+    def time(self, encode, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = encode()
+            timings.append((time.perf_counter() - start) * 1000)
+        return result, statistics.median(timings)
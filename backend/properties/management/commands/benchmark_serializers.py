@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from properties.management.commands._fixtures import create_listings
+from properties.models import Property
+from properties.readers import PropertyReader
+from properties.serializers import PropertySerializer
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = 'Check PropertyReader output against PropertySerializer and benchmark both'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[20, 200, 2000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        request = APIRequestFactory().get('/api/properties/')
+
+        try:
+            with transaction.atomic():
+                _, agent, _ = create_listings(max(options['sizes']), prefix='benchmark')
+                base = Property.objects.filter(agent=agent).order_by('-created_at', 'id')
+
+                self.stdout.write(f'{"rows":>6} {"serializer ms":>14} {"reader ms":>10} {"speedup":>8}')
+                for size in options['sizes']:
+                    queryset = base[:size]
+
+                    def serializer_path(request=request):
+                        rows = queryset.with_details()
+                        return PropertySerializer(rows, many=True, context={'request': request}).data
+
+                    def reader_path(request=request):
+                        reader = PropertyReader(request)
+                        return reader.serialize(reader.values(queryset))
+
+                    # Output must be byte-for-byte identical, with and without a request
+                    for context_request in (request, None):
+                        expected = renderer.render(serializer_path(context_request))
+                        actual = renderer.render(reader_path(context_request))
+                        if expected != actual:
+                            raise CommandError(f'PropertyReader output differs from PropertySerializer at {size} rows')
+
+                    serializer_ms = self.time(serializer_path, options['repeat'])
+                    reader_ms = self.time(reader_path, options['repeat'])
+                    self.stdout.write(
+                        f'{size:>6} {serializer_ms:>14.1f} {reader_ms:>10.1f} {serializer_ms / reader_ms:>7.1f}x'
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('PropertyReader output matches PropertySerializer'))
+
+    def time(self, path, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            path()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -1,12 +1,31 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from properties.models import Property, Agent, PropertyImage, PropertyAmenity
+from properties.management.commands._generator import SyntheticDataGenerator
 from decimal import Decimal
 
 class Command(BaseCommand):
     help = 'Create sample data for the Premium Realty platform'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int,
+                            help='Generate this many synthetic properties instead of the hand-written samples')
+        parser.add_argument('--agents', type=int, default=None,
+                            help='Number of synthetic agents (default: one per 100 properties)')
+        parser.add_argument('--images-per-property', type=int, default=5,
+                            help='Average number of images per generated property')
+        parser.add_argument('--amenities-per-property', type=int, default=4,
+                            help='Average number of amenities per generated property')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows inserted per bulk_create batch')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Random seed for reproducible data sets')
+
     def handle(self, *args, **options):
+        if options['properties']:
+            return self.generate(options)
+
         self.stdout.write('Creating sample data...')
 
         # Create sample users and agents
@@ -214,3 +233,33 @@ class Command(BaseCommand):
                 f'Amenities: {PropertyAmenity.objects.count()}'
             )
         )
+
+    def generate(self, options):
+        property_count = options['properties']
+        agent_count = options['agents'] or max(1, property_count // 100)
+        self.stdout.write(f'Generating {property_count} properties and {agent_count} agents...')
+
+        generator = SyntheticDataGenerator(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            images_per_property=options['images_per_property'],
+            amenities_per_property=options['amenities_per_property'],
+            stdout=self.stdout,
+        )
+        generator.generate(agent_count, property_count)
+
+        # bulk_create skips the post_save handlers that maintain the search
+        # index and the market and agent statistics
+        call_command('rebuild_search_index', stdout=self.stdout)
+        call_command('rebuild_market_stats', stdout=self.stdout)
+        call_command('rebuild_agent_stats', stdout=self.stdout)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully generated data!\n'
+                f'Agents: {Agent.objects.count()}\n'
+                f'Properties: {Property.objects.count()}\n'
+                f'Images: {PropertyImage.objects.count()}\n'
+                f'Amenities: {PropertyAmenity.objects.count()}\n'
+                f'Run rebuild_similarity_index to refresh similar listings.'
+            )
+        )
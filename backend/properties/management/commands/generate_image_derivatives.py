@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from django.core.management.base import BaseCommand
+from properties import caching
+from properties.derivatives import render_derivatives
+from properties.images import (
+    IMAGE_FIELDS,
+    needs_derivatives,
+    read_source,
+    rendered_or_none,
+    store_derivatives,
+    worker_pool,
+)
+
+class Command(BaseCommand):
+    help = 'Render the resized WebP and JPEG versions of existing listing and agent images in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Worker processes (defaults to the number of CPUs)')
+        parser.add_argument('--force', action='store_true',
+                            help='Render images that already have derivatives, or failed before, again')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        with worker_pool(workers) as pool:
+            for model, (field, derivatives_field, endpoints) in IMAGE_FIELDS.items():
+                rendered, failed = self.backfill(pool, workers * 2, model, field, derivatives_field, options['force'])
+                if rendered or failed:
+                    caching.invalidate(*endpoints)
+                self.stdout.write(f'{model._meta.verbose_name_plural}: {rendered} rendered, {failed} failed')
+
+    def backfill(self, pool, max_pending, model, field, derivatives_field, force):
+        queryset = (
+            model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            .only('pk', field, derivatives_field).order_by('pk')
+        )
+        counts = {'rendered': 0, 'failed': 0}
+        pending = {}
+
+        def finish(futures):
+            for future in futures:
+                pk, name = pending.pop(future)
+                rendered = rendered_or_none(future.result, name)
+                store_derivatives(model, pk, name, rendered)
+                counts['rendered' if rendered else 'failed'] += 1
+
+        # The files are read here and rendered by the workers, with a bounded
+        # number in flight so memory does not grow with the number of images
+        for instance in queryset.iterator(chunk_size=500):
+            if not force and not needs_derivatives(instance):
+                continue
+            name = getattr(instance, field).name
+            data = read_source(getattr(instance, field))
+            if data is None:
+                store_derivatives(model, instance.pk, name, None)
+                counts['failed'] += 1
+                continue
+            pending[pool.submit(render_derivatives, data)] = (instance.pk, name)
+            if len(pending) >= max_pending:
+                finish(wait(pending, return_when=FIRST_COMPLETED).done)
+        finish(wait(pending).done)
+        return counts['rendered'], counts['failed']
@@ -0,0 +1,52 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from properties.imports import IMPORT_BATCH_SIZE, ListingImporter, detect_format
+
+class Command(BaseCommand):
+    help = 'Create or update listings from a CSV or JSON Lines feed, keyed by external_id'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Feed file, or - to read from standard input')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Feed format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help='Rows validated and written per transaction')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate the feed and report what would change without writing')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            format = options['format'] or detect_format(path)
+        except ValueError as e:
+            raise CommandError(f'{e}, or pass --format')
+
+        importer = ListingImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            if path == '-':
+                result = importer.run(sys.stdin, format)
+            else:
+                with open(path, newline='', encoding='utf-8-sig') as stream:
+                    result = importer.run(stream, format)
+        except OSError as e:
+            raise CommandError(str(e))
+        except UnicodeDecodeError:
+            raise CommandError('The feed must be UTF-8 encoded')
+
+        for error in result.errors:
+            messages = '; '.join(
+                f'{field}: {" ".join(messages)}' for field, messages in error['errors'].items()
+            )
+            self.stdout.write(self.style.ERROR(f'line {error["line"]} ({error["external_id"]}): {messages}'))
+        if result.failed > len(result.errors):
+            self.stdout.write(self.style.ERROR(f'... and {result.failed - len(result.errors)} more errors'))
+
+        summary = (
+            f'{result.created} created, {result.updated} updated, '
+            f'{result.failed} failed of {result.rows} rows'
+        )
+        if result.dry_run:
+            summary = f'Dry run, nothing written: {summary}'
+        style = self.style.WARNING if result.failed else self.style.SUCCESS
+        self.stdout.write(style(summary))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from properties import agent_stats
+
+class Command(BaseCommand):
+    help = 'Rebuild the agent specialization index and the per-agent active listing statistics'
+
+    def handle(self, *args, **options):
+        specializations, stats = agent_stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {specializations} agent specializations and rebuilt {stats} listing stat rows'
+        ))
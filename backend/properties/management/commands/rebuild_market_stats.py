@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from properties import market
+from properties.models import Property
+
+class Command(BaseCommand):
+    help = 'Recompute price per square foot where it drifted, then rebuild the market statistics tables'
+
+    def handle(self, *args, **options):
+        stale = []
+        rows = Property.objects.values_list('pk', 'price', 'total_area', 'price_per_sqft')
+        for pk, price, total_area, price_per_sqft in rows.iterator(chunk_size=2000):
+            expected = Property.compute_price_per_sqft(price, total_area)
+            if expected != price_per_sqft:
+                stale.append(Property(pk=pk, price_per_sqft=expected))
+        Property.objects.bulk_update(stale, ['price_per_sqft'], batch_size=500)
+        self.stdout.write(f'Fixed price per square foot of {len(stale)} properties')
+
+        bins = market.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {bins} market statistics bins'))
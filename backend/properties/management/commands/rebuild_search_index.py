@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from properties.search import get_search_backend
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for property listings'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f'Rebuilding search index with {type(backend).__name__}...')
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} properties'))
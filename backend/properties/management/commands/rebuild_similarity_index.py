@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from properties.similarity import similarity_index
+
+class Command(BaseCommand):
+    help = 'Recompute the stored similar-listings index for all active properties'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding similar properties index...')
+        count = similarity_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} properties'))
@@ -0,0 +1,49 @@
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from properties.models import SavedSearchMatch
+
+# Listings shown per saved search in one alert
+LISTINGS_PER_SEARCH = 10
+
+class Command(BaseCommand):
+    help = 'Email each user one digest of the new listings matching their saved searches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Print the digests without sending them or marking the matches notified')
+
+    def handle(self, *args, **options):
+        pending = (
+            SavedSearchMatch.objects.filter(notified_at__isnull=True)
+            .select_related('search__user', 'property')
+            .order_by('search__user_id', 'search_id', '-matched_at')
+        )
+        users = sent = 0
+        for user, matches in groupby(pending.iterator(chunk_size=1000), key=lambda match: match.search.user):
+            matches = list(matches)
+            users += 1
+            body = self.digest(matches)
+            if options['dry_run']:
+                self.stdout.write(f'To {user.email or user.username}:\n{body}')
+                continue
+            if user.email:
+                send_mail('New listings for your saved searches', body, settings.DEFAULT_FROM_EMAIL, [user.email])
+                sent += 1
+            # Marked per user, so a failure leaves the remaining digests pending
+            SavedSearchMatch.objects.filter(pk__in=[match.pk for match in matches]).update(notified_at=timezone.now())
+        self.stdout.write(self.style.SUCCESS(f'{sent} alerts sent for {users} users with new matches'))
+
+    def digest(self, matches):
+        lines = []
+        for search, search_matches in groupby(matches, key=lambda match: match.search):
+            search_matches = list(search_matches)
+            lines.append(f'{search.name}: {len(search_matches)} new listing(s)')
+            for match in search_matches[:LISTINGS_PER_SEARCH]:
+                listing = match.property
+                lines.append(f'  - {listing.title}, {listing.city} - {listing.currency} {listing.price:,.0f}')
+            lines.append('')
+        return '\n'.join(lines)
@@ -0,0 +1,26 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database to the replica files listed in DATABASE_REPLICAS'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Replica copies are only made for SQLite; use streaming replication for PostgreSQL')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('DATABASE_REPLICAS is not set')
+
+        connection.ensure_connection()
+        for path in settings.DATABASE_REPLICAS:
+            target = sqlite3.connect(path)
+            try:
+                # Online backup: consistent even while the primary is being written
+                connection.connection.backup(target)
+                # Replicas are opened read-only, which a WAL database does not allow
+                target.execute('PRAGMA journal_mode = DELETE')
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f'Copied primary database to {path}'))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+from properties.similarity import process_pending
+
+class Command(BaseCommand):
+    help = 'Refresh the similar-listing lists affected by listings changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Keep running, processing the queue every this many seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            count = process_pending()
+            self.stdout.write(self.style.SUCCESS(f'Processed {count} changed properties'))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,180 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import MarketStat
+from .summaries import SummaryTable
+
+# Each listing is counted in the whole market and in each of these segments,
+# always within its listing type (sale and rent prices do not mix)
+DIMENSIONS = ['city', 'state', 'category']
+KEY_FIELDS = ['listing_type', 'dimension', 'value', 'metric', 'bucket']
+# Listing fields the statistics are computed from
+STAT_FIELDS = {'status', 'listing_type', 'city', 'state', 'category', 'price', 'price_per_sqft', 'created_at'}
+
+DAYS_ON_MARKET_BUCKETS = [7, 30, 90, 180, 365]
+# Bin of zero and negative amounts
+NON_POSITIVE_BUCKET = -10 ** 6
+
+
+def value_bucket(value):
+    """
+    Bin of an amount: its decimal exponent and first two significant digits,
+    e.g. 253,000 -> 525 (2.5e5). Bins sort like the amounts and are at most
+    10% wide, which bounds the error of the medians computed from them.
+    """
+    value = Decimal(value)
+    if value <= 0:
+        return NON_POSITIVE_BUCKET
+    exponent = value.adjusted()
+    return exponent * 100 + int(value.scaleb(1 - exponent))
+
+
+def histogram_range(bucket):
+    # One significant digit: 200,000-300,000, 1,000,000-2,000,000, ...
+    if bucket == NON_POSITIVE_BUCKET:
+        return Decimal(0), Decimal(0)
+    exponent, digits = divmod(bucket, 100)
+    lower = Decimal(digits // 10).scaleb(exponent)
+    return lower, lower + Decimal(1).scaleb(exponent)
+
+
+def contributions(values):
+    """The bins a listing is counted in, with its value for each; none unless it is active."""
+    if values['status'] != 'active':
+        return {}
+    samples = [
+        ('price', value_bucket(values['price']), Decimal(values['price'])),
+        ('listed', values['created_at'].date().toordinal(), Decimal(0)),
+    ]
+    if values['price_per_sqft'] is not None:
+        samples.append(('price_per_sqft', value_bucket(values['price_per_sqft']), Decimal(values['price_per_sqft'])))
+    segments = [('all', '')] + [(dimension, values[dimension]) for dimension in DIMENSIONS]
+    return {
+        (values['listing_type'], dimension, value, metric, bucket): amount
+        for dimension, value in segments
+        for metric, bucket, amount in samples
+    }
+
+
+table = SummaryTable(MarketStat, KEY_FIELDS, STAT_FIELDS, contributions, ['market:stats'])
+record = table.record
+remove = table.remove
+rebuild = table.rebuild
+
+
+def _money(value):
+    return value.quantize(Decimal('0.01')) if value is not None else None
+
+
+def _percentile(bins, fraction):
+    # Mean of the bin holding the percentile
+    target = fraction * sum(count for _, count, _ in bins)
+    seen = 0
+    for _, count, total in bins:
+        seen += count
+        if seen >= target:
+            return total / count
+    return None
+
+
+def _amounts(bins):
+    """Mean, quartiles and histogram of a price metric from its (bucket, count, total) bins."""
+    count = sum(count for _, count, _ in bins)
+    if not count:
+        return {'mean': None, 'median': None, 'p25': None, 'p75': None, 'histogram': []}
+    histogram = {}
+    for bucket, bin_count, _ in bins:
+        lower, upper = histogram_range(bucket)
+        histogram.setdefault(lower, {'min': lower, 'max': upper, 'count': 0})['count'] += bin_count
+    return {
+        'mean': _money(sum(total for _, _, total in bins) / count),
+        'median': _money(_percentile(bins, Decimal('0.5'))),
+        'p25': _money(_percentile(bins, Decimal('0.25'))),
+        'p75': _money(_percentile(bins, Decimal('0.75'))),
+        'histogram': list(histogram.values()),
+    }
+
+
+def _days_on_market(bins):
+    # Bins of the listed metric are listing dates; newest first gives ascending days
+    today = timezone.now().date().toordinal()
+    days = [(today - bucket, count) for bucket, count, _ in reversed(bins)]
+    count = sum(count for _, count in days)
+    histogram = []
+    lower = 0
+    for upper in DAYS_ON_MARKET_BUCKETS + [None]:
+        histogram.append({
+            'min': lower,
+            'max': upper,
+            'count': sum(n for day, n in days if day >= lower and (upper is None or day < upper)),
+        })
+        lower = upper
+    median = None
+    seen = 0
+    for day, day_count in days:
+        seen += day_count
+        if seen >= count / 2:
+            median = day
+            break
+    return {
+        'mean': round(sum(day * n for day, n in days) / count, 1) if count else None,
+        'median': median,
+        'histogram': histogram,
+    }
+
+
+def _summary(rows):
+    metrics = defaultdict(list)
+    for metric, bucket, count, total in rows:
+        metrics[metric].append((bucket, count, total))
+    return {
+        'inventory': sum(count for _, count, _ in metrics['price']),
+        'price': _amounts(metrics['price']),
+        'price_per_sqft': _amounts(metrics['price_per_sqft']),
+        'days_on_market': _days_on_market(metrics['listed']),
+    }
+
+
+def segment_rows(listing_type, dimension='all', value=''):
+    return (
+        MarketStat.objects.filter(listing_type=listing_type, dimension=dimension, value=value, count__gt=0)
+        .order_by('metric', 'bucket')
+        .values_list('metric', 'bucket', 'count', 'total')
+    )
+
+
+def breakdown_rows(listing_type, dimension):
+    return (
+        MarketStat.objects.filter(listing_type=listing_type, dimension=dimension, count__gt=0)
+        .order_by('value', 'metric', 'bucket')
+        .values_list('value', 'metric', 'bucket', 'count', 'total')
+    )
+
+
+def segment_stats(listing_type, dimension='all', value=''):
+    """
+    Market statistics of the active listings of one segment, read from the
+    summary bins in one query. Means are exact; medians and quartiles are
+    the mean of the bin they fall in.
+    """
+    rows = segment_rows(listing_type, dimension, value)
+    segment = {dimension: value} if dimension != 'all' else {}
+    return {'listing_type': listing_type, **segment, **_summary(rows)}
+
+
+def breakdown(listing_type, dimension):
+    """Statistics of every segment of ``dimension`` (without histograms), by inventory."""
+    segments = defaultdict(list)
+    for value, *row in breakdown_rows(listing_type, dimension):
+        segments[value].append(row)
+
+    results = []
+    for value, segment_rows in segments.items():
+        summary = _summary(segment_rows)
+        for metric in ('price', 'price_per_sqft', 'days_on_market'):
+            summary[metric].pop('histogram')
+        results.append({dimension: value, **summary})
+    results.sort(key=lambda result: -result['inventory'])
+    return {'listing_type': listing_type, 'group_by': dimension, 'results': results}
@@ -1,7 +1,13 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .geo import encode_geohash
+
 class Agent(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
@@ -11,6 +17,7 @@ class Agent(models.Model):
     agency = models.CharField(max_length=100)
     license_number = models.CharField(max_length=50)
     profile_image = models.ImageField(upload_to='agents/', null=True, blank=True)
+    profile_image_derivatives = models.JSONField(default=dict, editable=False)  # see images.py
     specializations = models.JSONField(default=list)
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.0)
     total_sales = models.IntegerField(default=0)
@@ -19,6 +26,50 @@ class Agent(models.Model):
     def __str__(self):
         return self.name
 
+class AgentSpecialization(models.Model):
+    # Index of Agent.specializations (normalized to lower case), kept in sync by signals
+    agent = models.ForeignKey(Agent, related_name='specialization_index', on_delete=models.CASCADE)
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = [('name', 'agent')]
+
+class AgentListingStat(models.Model):
+    """Active listings of an agent in one category, maintained incrementally by agent_stats.py."""
+    agent = models.ForeignKey(Agent, related_name='listing_stats', on_delete=models.CASCADE)
+    category = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=20, decimal_places=2, default=0)  # sum of the prices
+
+    class Meta:
+        unique_together = [('agent', 'category')]
+
+class PropertyQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(status='active')
+
+    def with_details(self, relations=('agent', 'images', 'amenities')):
+        # Everything PropertySerializer renders, in three queries, or only
+        # the relations of a sparse fieldset
+        queryset = self.select_related('agent') if 'agent' in relations else self
+        return queryset.prefetch_related(*[name for name in ('images', 'amenities') if name in relations])
+
+    def with_cover_image(self):
+        return self.prefetch_related(
+            Prefetch('images', queryset=PropertyImage.objects.covers(), to_attr='cover_images')
+        )
+
+class PropertyImageQuerySet(models.QuerySet):
+    def covers(self):
+        # The first primary image of each property, else its first image
+        return self.annotate(
+            cover_rank=Window(
+                RowNumber(),
+                partition_by=[F('property_id')],
+                order_by=[F('is_primary').desc(), F('order').asc(), F('id').asc()],
+            )
+        ).filter(cover_rank=1)
+
 class Property(models.Model):
     CATEGORY_CHOICES = [
         ('real_estate', 'Real Estate'),
@@ -77,6 +128,7 @@ class Property(models.Model):
     postal_code = models.CharField(max_length=20)
     latitude = models.DecimalField(max_digits=10, decimal_places=8)
     longitude = models.DecimalField(max_digits=11, decimal_places=8)
+    geohash = models.CharField(max_length=12, db_index=True, blank=True, editable=False)
 
     # Dimensions and Details
     total_area = models.IntegerField()  # in square feet
@@ -89,7 +141,7 @@ class Property(models.Model):
     # Financial Information
     price = models.DecimalField(max_digits=12, decimal_places=2)
     currency = models.CharField(max_length=3, default='USD')
-    price_per_sqft = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    price_per_sqft = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, editable=False)
 
     # Land-specific fields
     zoning = models.CharField(max_length=100, null=True, blank=True)
@@ -103,6 +155,7 @@ class Property(models.Model):
 
     # Agent and Contact
     agent = models.ForeignKey(Agent, on_delete=models.CASCADE, related_name='properties')
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)  # partner feed id
 
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -112,23 +165,84 @@ class Property(models.Model):
     featured = models.BooleanField(default=False)
     premium_listing = models.BooleanField(default=False)
 
+    objects = PropertyQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Properties"
+        # Every public query filters on status='active'; see audit_query_plans
+        indexes = [
+            models.Index(fields=['latitude', 'longitude']),
+            models.Index(fields=['status', 'created_at'], name='property_status_created_idx'),
+            models.Index(fields=['status', 'price'], name='property_status_price_idx'),
+            models.Index(fields=['status', 'total_area'], name='property_status_area_idx'),
+            models.Index(fields=['status', 'category', 'created_at'], name='property_category_created_idx'),
+            models.Index(fields=['status', 'listing_type', 'created_at'], name='property_listing_created_idx'),
+            models.Index(fields=['status', 'city', 'created_at'], name='property_city_created_idx'),
+            models.Index(fields=['status', 'featured', 'created_at'], name='property_featured_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded values so signal handlers can tell what changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def loaded_value(self, field_name):
+        return getattr(self, '_loaded_values', {}).get(field_name)
+
+    def changed_fields(self):
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            # Nothing to compare against, so treat every field as changed
+            return {field.attname for field in self._meta.concrete_fields}
+        return {name for name, value in loaded.items() if getattr(self, name) != value}
+
+    @staticmethod
+    def compute_price_per_sqft(price, total_area):
+        if price is None or not total_area:
+            return None
+        value = (Decimal(price) / total_area).quantize(Decimal('0.01'))
+        # Out of range for the column (max_digits=8)
+        return value if value < Decimal('1000000') else None
+
+    def set_derived_fields(self):
+        # Also used by the bulk paths (imports, generators) that skip save()
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+        self.price_per_sqft = self.compute_price_per_sqft(self.price, self.total_area)
+
+    def save(self, *args, **kwargs):
+        self.set_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = set()
+            if {'latitude', 'longitude'} & set(update_fields):
+                derived.add('geohash')
+            if {'price', 'total_area'} & set(update_fields):
+                derived.add('price_per_sqft')
+            kwargs['update_fields'] = set(update_fields) | derived
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields
+        }
+
     def days_on_market(self):
         return (timezone.now().date() - self.created_at.date()).days
 
 class PropertyImage(models.Model):
     property = models.ForeignKey(Property, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='properties/')
+    derivatives = models.JSONField(default=dict, editable=False)  # see images.py
     caption = models.CharField(max_length=200, blank=True)
     is_primary = models.BooleanField(default=False)
     order = models.IntegerField(default=0)
 
+    objects = PropertyImageQuerySet.as_manager()
+
     class Meta:
         ordering = ['order']
 
@@ -142,3 +256,92 @@ class PropertyAmenity(models.Model):
 
     def __str__(self):
         return f"{self.property.title} - {self.name}"
+
+class Favorite(models.Model):
+    """A user's favorite listing. Property.favorites counts these rows (see signals.py)."""
+    user = models.ForeignKey(User, related_name='favorites', on_delete=models.CASCADE)
+    property = models.ForeignKey(Property, related_name='favorited_by', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [('user', 'property')]
+
+class SimilarProperty(models.Model):
+    property = models.ForeignKey(Property, related_name='similar_links', on_delete=models.CASCADE)
+    similar = models.ForeignKey(Property, related_name='similar_to_links', on_delete=models.CASCADE)
+    rank = models.PositiveSmallIntegerField()
+    distance = models.FloatField()
+
+    class Meta:
+        ordering = ['property', 'rank']
+        unique_together = [('property', 'rank')]
+        verbose_name_plural = "Similar properties"
+
+    def __str__(self):
+        return f"{self.property_id} -> {self.similar_id} ({self.rank})"
+
+class PendingSimilarity(models.Model):
+    """A listing whose changes have not reached the similar-listing lists yet, queued for update_similarity_index."""
+    property = models.OneToOneField(Property, primary_key=True, related_name='+', on_delete=models.CASCADE)
+    changed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "Pending similarity updates"
+
+class MarketStat(models.Model):
+    """
+    One histogram bin of the active listings of a market segment, maintained
+    incrementally by market.py. A segment is a listing type plus either the
+    whole market or one city, state or category.
+    """
+    listing_type = models.CharField(max_length=10)
+    dimension = models.CharField(max_length=20)  # all, city, state or category
+    value = models.CharField(max_length=100)
+    metric = models.CharField(max_length=20)  # price, price_per_sqft or listed
+    bucket = models.IntegerField()
+    count = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=20, decimal_places=2, default=0)  # sum of the binned values
+
+    class Meta:
+        unique_together = [('listing_type', 'dimension', 'value', 'metric', 'bucket')]
+
+class ResourceVersion(models.Model):
+    """Version of the data behind a cached API endpoint, advanced by caching.invalidate()."""
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+class SavedSearch(models.Model):
+    """A user's PropertySearchView filter body, matched against new and changed listings by percolator.py."""
+    user = models.ForeignKey(User, related_name='saved_searches', on_delete=models.CASCADE)
+    name = models.CharField(max_length=100)
+    filters = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = "Saved searches"
+
+    def __str__(self):
+        return f"{self.user} - {self.name}"
+
+class SavedSearchTerm(models.Model):
+    # Reverse index: a saved search is only checked against listings sharing one of its terms
+    search = models.ForeignKey(SavedSearch, related_name='terms', on_delete=models.CASCADE)
+    term = models.CharField(max_length=120)
+
+    class Meta:
+        unique_together = [('term', 'search')]
+
+class SavedSearchMatch(models.Model):
+    search = models.ForeignKey(SavedSearch, related_name='matches', on_delete=models.CASCADE)
+    property = models.ForeignKey(Property, related_name='saved_search_matches', on_delete=models.CASCADE)
+    matched_at = models.DateTimeField(auto_now_add=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [('search', 'property')]
+        indexes = [
+            models.Index(fields=['notified_at', 'search'], name='savedsearch_match_pending_idx'),
+        ]
+        verbose_name_plural = "Saved search matches"
@@ -0,0 +1,138 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+
+from .reads import Gather, count, fetch
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPagination:
+    """
+    Cursor pagination over a single sort column with ``id`` as tiebreaker.
+
+    Each page continues from the last row of the previous one with a
+    ``(column, id)`` comparison instead of an OFFSET, so deep pages cost the
+    same as the first. The continuation token is opaque to clients and is
+    bound to the ordering it was issued for.
+    """
+
+    default_page_size = 20
+    max_page_size = 100
+
+    def get_page_size(self, value):
+        try:
+            page_size = int(value) if value is not None else self.default_page_size
+        except (TypeError, ValueError):
+            page_size = self.default_page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, ordering, value, pk):
+        payload = json.dumps({'o': ordering, 'v': str(value), 'id': pk}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor, ordering):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            value, pk = payload['v'], int(payload['id'])
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise InvalidCursor('Invalid cursor')
+        if payload.get('o') != ordering:
+            raise InvalidCursor('Cursor does not match the requested sort order')
+        return value, pk
+
+    def paginate(self, queryset, ordering, cursor=None, page_size=None):
+        """
+        Return ``(rows, next_cursor)`` for one page of ``queryset`` ordered by
+        ``ordering`` (a field name, optionally prefixed with ``-``).
+        """
+        page_size = self.get_page_size(page_size)
+        queryset = self.page_queryset(queryset, ordering, cursor)
+        return self.page(list(queryset[:page_size + 1]), ordering, page_size)
+
+    async def apaginate(self, queryset, ordering, cursor=None, page_size=None):
+        """Async version of paginate() reading the page with the async ORM."""
+        page_size = self.get_page_size(page_size)
+        queryset = self.page_queryset(queryset, ordering, cursor)
+        return self.page([row async for row in queryset[:page_size + 1]], ordering, page_size)
+
+    def page_queryset(self, queryset, ordering, cursor=None):
+        descending = ordering.startswith('-')
+        field = ordering.lstrip('-')
+        queryset = queryset.order_by(ordering, '-id' if descending else 'id')
+        if cursor:
+            value, pk = self.decode_cursor(cursor, ordering)
+            lookup = 'lt' if descending else 'gt'
+            try:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk})
+                )
+            except (ValidationError, ValueError, TypeError):
+                # A tampered value the sort column cannot hold
+                raise InvalidCursor('Invalid cursor')
+        return queryset
+
+    def page(self, rows, ordering, page_size):
+        # rows holds one extra row when there is a next page
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            field = ordering.lstrip('-')
+            next_cursor = self.encode_cursor(ordering, self._cursor_value(last, field), self._cursor_value(last, 'id'))
+        return rows, next_cursor
+
+    def _cursor_value(self, row, field):
+        # Rows may be model instances or values() dicts
+        value = row[field] if isinstance(row, dict) else getattr(row, field)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+
+def _validate_page(paginator, pages, number):
+    if number in paginator.last_page_strings:
+        return pages.num_pages
+    try:
+        return pages.validate_number(number)
+    except InvalidPage as exc:
+        raise NotFound(paginator.invalid_page_message.format(page_number=number, message=str(exc)))
+
+
+def page_number_rows(paginator, request, queryset):
+    """
+    PageNumberPagination.paginate_queryset() as handler reads (see reads.py),
+    with the count and the requested page read together. Page numbers that
+    need the count first ("last" or malformed values) are resolved before
+    reading the page. Returns ``(rows, paginated)``; when ``paginated`` the
+    paginator is ready for get_paginated_response().
+    """
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return (yield fetch(queryset)), False
+
+    pages = paginator.django_paginator_class(queryset, page_size)
+    number = request.query_params.get(paginator.page_query_param, 1)
+    if str(number).isdigit() and int(number) > 0:
+        number = int(number)
+        bottom = (number - 1) * page_size
+        pages.count, rows = yield Gather(count(queryset), fetch(queryset[bottom:bottom + page_size]))
+        number = _validate_page(paginator, pages, number)
+    else:
+        pages.count = yield count(queryset)
+        number = _validate_page(paginator, pages, number)
+        bottom = (number - 1) * page_size
+        rows = yield fetch(queryset[bottom:bottom + page_size])
+
+    paginator.request = request
+    paginator.page = Page(rows, number, pages)
+    if paginator.template is not None and pages.num_pages > 1:
+        paginator.display_page_controls = True
+    return rows, True
@@ -0,0 +1,150 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import SavedSearch, SavedSearchMatch, SavedSearchTerm
+from .search import INDEXED_FIELDS, tokenize
+
+# Keys of a PropertySearchView body kept by a saved search (no sorting or paging)
+SAVED_FILTERS = {
+    'search', 'category', 'price_range', 'area_range', 'location', 'bedrooms', 'bathrooms',
+    'real_estate_type', 'land_type', 'listing_type',
+}
+# Listing fields the saved filters read; a change to one runs the listing again
+PERCOLATED_FIELDS = {
+    'status', 'category', 'price', 'total_area', 'city', 'state', 'bedrooms', 'bathrooms',
+    'real_estate_type', 'land_type', 'listing_type',
+} | set(INDEXED_FIELDS)
+
+# Decimal exponent of the largest price (max_digits=12, decimal_places=2)
+MAX_PRICE_BAND = 9
+TERM_QUERY_SIZE = 500
+
+
+def price_band(price):
+    price = Decimal(price)
+    return min(max(price.adjusted(), 0), MAX_PRICE_BAND) if price > 0 else 0
+
+
+def _substrings(text):
+    text = text.lower()
+    return {text[start:end] for start in range(len(text)) for end in range(start + 1, len(text) + 1)}
+
+
+def search_terms(filters):
+    """
+    Reverse-index terms of a saved search: those of its most selective
+    indexed constraint. A listing can only match if it has one of them.
+    """
+    location = filters.get('location') or {}
+    for field in ('city', 'state'):
+        if location.get(field):
+            return [f'{field}:{location[field].lower()}']
+    for field in ('real_estate_type', 'land_type', 'listing_type'):
+        if field in filters:
+            return [f'{field}:{value}' for value in filters[field]]
+    if 'category' in filters:
+        return [f'category:{filters["category"]}']
+    price_range = filters.get('price_range') or {}
+    if 'min' in price_range or 'max' in price_range:
+        lowest = price_band(price_range['min']) if 'min' in price_range else 0
+        highest = price_band(price_range['max']) if 'max' in price_range else MAX_PRICE_BAND
+        return [f'price:{band}' for band in range(lowest, highest + 1)]
+    return ['*']
+
+
+def listing_terms(listing):
+    """Every term a saved search matching ``listing`` could be indexed under."""
+    terms = {
+        '*',
+        f'category:{listing.category}',
+        f'listing_type:{listing.listing_type}',
+        f'price:{price_band(listing.price)}',
+    }
+    for field in ('real_estate_type', 'land_type'):
+        if getattr(listing, field):
+            terms.add(f'{field}:{getattr(listing, field)}')
+    # City and state filters are substring matches
+    for field in ('city', 'state'):
+        terms.update(f'{field}:{value}' for value in _substrings(getattr(listing, field)))
+    return terms
+
+
+def index(search):
+    with transaction.atomic():
+        search.terms.all().delete()
+        SavedSearchTerm.objects.bulk_create(
+            SavedSearchTerm(search=search, term=term) for term in set(search_terms(search.filters))
+        )
+
+
+def _within(value, bounds):
+    if value is None:
+        return False
+    if 'min' in bounds and value < Decimal(str(bounds['min'])):
+        return False
+    return 'max' not in bounds or value <= Decimal(str(bounds['max']))
+
+
+def _keyword_matches(query, listing):
+    # Prefix match of every query token, like the FTS5 index
+    text = set(tokenize(' '.join(getattr(listing, field) or '' for field in INDEXED_FIELDS)))
+    return all(any(token.startswith(prefix) for token in text) for prefix in tokenize(query))
+
+
+def matches(filters, listing):
+    """Whether an active listing passes a saved filter body, as filter_conditions() would."""
+    if 'category' in filters and listing.category != filters['category']:
+        return False
+    for key, field in (('price_range', 'price'), ('area_range', 'total_area')):
+        if key in filters and not _within(getattr(listing, field), filters[key]):
+            return False
+    location = filters.get('location') or {}
+    for field in ('city', 'state'):
+        if field in location and location[field].lower() not in getattr(listing, field).lower():
+            return False
+    for field in ('bedrooms', 'bathrooms'):
+        if field in filters:
+            allowed = filters[field] if isinstance(filters[field], list) else [filters[field]]
+            value = getattr(listing, field)
+            if value is None or Decimal(str(value)) not in {Decimal(str(option)) for option in allowed}:
+                return False
+    for field in ('real_estate_type', 'land_type', 'listing_type'):
+        if field in filters and getattr(listing, field) not in filters[field]:
+            return False
+    return _keyword_matches(filters.get('search'), listing)
+
+
+def percolate(listings):
+    """
+    Match new or changed listings against the saved searches and record the
+    new matches for notification. Candidates come from the term index in a
+    few queries per batch; only they are checked against their full filters.
+    Listings already matched by a search are not recorded again. Returns the
+    number of matches found.
+    """
+    listings = [listing for listing in listings if listing.status == 'active']
+    if not listings:
+        return 0
+    terms = {listing.pk: listing_terms(listing) for listing in listings}
+    all_terms = sorted(set().union(*terms.values()))
+    searches_by_term = defaultdict(set)
+    for start in range(0, len(all_terms), TERM_QUERY_SIZE):
+        rows = SavedSearchTerm.objects.filter(term__in=all_terms[start:start + TERM_QUERY_SIZE])
+        for term, search_id in rows.values_list('term', 'search_id'):
+            searches_by_term[term].add(search_id)
+
+    candidates = {
+        pk: set().union(*(searches_by_term.get(term, ()) for term in probes))
+        for pk, probes in terms.items()
+    }
+    searches = SavedSearch.objects.only('filters').in_bulk(set().union(*candidates.values()))
+    found = [
+        SavedSearchMatch(search_id=search_id, property_id=listing.pk)
+        for listing in listings
+        for search_id in sorted(candidates[listing.pk])
+        if search_id in searches and matches(searches[search_id].filters, listing)
+    ]
+    SavedSearchMatch.objects.bulk_create(found, batch_size=500, ignore_conflicts=True)
+    return len(found)
@@ -0,0 +1,184 @@
+import asyncio
+from collections import defaultdict
+from functools import lru_cache
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from .images import derivative_urls
+from .models import Agent, Property, PropertyAmenity, PropertyImage
+from .serializers import (
+    AgentSerializer,
+    ImageDerivativesField,
+    PropertyAmenitySerializer,
+    PropertyImageSerializer,
+    PropertySerializer,
+)
+
+# Serializer fields whose to_representation returns plain database values as-is
+IDENTITY_FIELD_TYPES = {
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.BooleanField,
+    serializers.EmailField,
+}
+
+# PropertySerializer fields that are not plain model columns
+NESTED_FIELDS = {'images', 'amenities', 'agent'}
+# Computed fields and the columns they are computed from
+COMPUTED_FIELDS = {
+    'days_on_market': {'created_at'},
+    'coordinates': {'latitude', 'longitude'},
+    'dimensions': {'dimensions_3d'},
+}
+
+
+@lru_cache(maxsize=None)
+def _serializer_fields(serializer_class):
+    return serializer_class().fields
+
+
+def _file_url(storage, request, name):
+    if not name:
+        return None
+    url = storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def _converter(field, model, request):
+    if isinstance(field, serializers.FileField):
+        storage = model._meta.get_field(field.source).storage
+        return lambda name: _file_url(storage, request, name)
+    if isinstance(field, ImageDerivativesField):
+        return lambda derivatives: derivative_urls(derivatives, request)
+    if type(field) in IDENTITY_FIELD_TYPES:
+        return None
+    if isinstance(field, serializers.JSONField) and not field.binary:
+        return None
+    return field.to_representation
+
+
+def _plan(serializer_class, model, request, names=None):
+    """(output name, values() key, converter) for each field of a flat ModelSerializer."""
+    fields = _serializer_fields(serializer_class)
+    return [
+        (name, field.source, _converter(field, model, request))
+        for name, field in fields.items()
+        if names is None or name in names
+    ]
+
+
+def _render(plan, row, prefix=''):
+    data = {}
+    for name, source, convert in plan:
+        value = row[prefix + source]
+        if value is None or convert is None:
+            data[name] = value
+        else:
+            data[name] = convert(value)
+    return data
+
+
+class PropertyReader:
+    """
+    Read-only fast path producing the same output as PropertySerializer.
+
+    Rows come from ``values()`` and child rows are fetched with one query per
+    relation and grouped in Python, so no model instances or per-object
+    serializers are created. The field list and the scalar conversions are
+    taken from the serializers themselves to keep the output identical.
+
+    ``fields`` limits the output to some of the serializer's fields (see
+    fieldsets.py); only the columns and relations they need are read.
+    """
+
+    def __init__(self, request=None, fields=None, using=None):
+        self.request = request
+        # Database of the child queries; None leaves it to the router
+        self.using = using
+        self.field_names = list(fields) if fields is not None else list(_serializer_fields(PropertySerializer))
+        self.flat_field_names = [name for name in self.field_names if name not in ('images', 'amenities')]
+        scalar_names = [name for name in self.field_names if name not in NESTED_FIELDS | set(COMPUTED_FIELDS)]
+        self.property_plan = _plan(PropertySerializer, Property, request, scalar_names)
+        self.agent_plan = _plan(AgentSerializer, Agent, request)
+        self.image_plan = _plan(PropertyImageSerializer, PropertyImage, request)
+        self.amenity_plan = _plan(PropertyAmenitySerializer, PropertyAmenity, request)
+
+        # The id groups child rows and breaks ties in cursors, so it is always read
+        value_fields = {'id'} | {source for _, source, _ in self.property_plan}
+        for name, sources in COMPUTED_FIELDS.items():
+            if name in self.field_names:
+                value_fields |= sources
+        if 'agent' in self.field_names:
+            value_fields |= {'agent_id'} | {f'agent__{source}' for _, source, _ in self.agent_plan}
+        self.value_fields = sorted(value_fields)
+
+    def values(self, queryset, *extra_fields):
+        extra_fields = [field for field in extra_fields if field not in self.value_fields]
+        return queryset.prefetch_related(None).values(*self.value_fields, *extra_fields)
+
+    def _children_rows(self, model, plan, ids):
+        sources = {source for _, source, _ in plan}
+        return model.objects.using(self.using).filter(property_id__in=ids).values('property_id', *sources)
+
+    def _group(self, plan, rows):
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[row['property_id']].append(_render(plan, row))
+        return grouped
+
+    def _children(self, model, plan, ids):
+        return self._group(plan, self._children_rows(model, plan, ids))
+
+    async def _achildren(self, model, plan, ids):
+        return self._group(plan, [row async for row in self._children_rows(model, plan, ids)])
+
+    def _child_relations(self, nested):
+        relations = {'images': (PropertyImage, self.image_plan), 'amenities': (PropertyAmenity, self.amenity_plan)}
+        return {name: relation for name, relation in relations.items() if nested and name in self.field_names}
+
+    def serialize(self, rows, nested=True):
+        """Render ``values()`` rows; ``nested=False`` leaves out images and amenities."""
+        rows = list(rows)
+        relations = self._child_relations(nested)
+        if not rows or not relations:
+            return self._build(rows, nested)
+        ids = [row['id'] for row in rows]
+        children = {name: self._children(model, plan, ids) for name, (model, plan) in relations.items()}
+        return self._build(rows, nested, children)
+
+    async def aserialize(self, rows, nested=True):
+        """Async version of serialize() taking already fetched rows."""
+        relations = self._child_relations(nested)
+        if not rows or not relations:
+            return self._build(rows, nested)
+        ids = [row['id'] for row in rows]
+        grouped = await asyncio.gather(*(self._achildren(model, plan, ids) for model, plan in relations.values()))
+        return self._build(rows, nested, dict(zip(relations, grouped)))
+
+    def _build(self, rows, nested, children=None):
+        field_names = self.field_names if nested else self.flat_field_names
+        wanted = set(field_names)
+        today = timezone.now().date()
+
+        results = []
+        for row in rows:
+            data = _render(self.property_plan, row)
+            for name, grouped in (children or {}).items():
+                data[name] = grouped.get(row['id'], [])
+            if 'agent' in wanted:
+                data['agent'] = _render(self.agent_plan, row, 'agent__') if row['agent_id'] is not None else None
+            if 'days_on_market' in wanted:
+                data['days_on_market'] = (today - row['created_at'].date()).days
+            if 'coordinates' in wanted:
+                data['coordinates'] = {
+                    'lat': float(row['latitude']),
+                    'lng': float(row['longitude'])
+                }
+            if 'dimensions' in wanted:
+                data['dimensions'] = row['dimensions_3d'] or {}
+            results.append({name: data[name] for name in field_names})
+        return results
@@ -0,0 +1,81 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+
+class Read:
+    """
+    A read a view handler needs. Handlers are generators that yield their
+    reads and return a response, so one handler serves both the DRF view
+    (run(), sync ORM) and the async view (arun(), async ORM).
+    """
+
+    def __init__(self, sync, asynchronous, *args):
+        self.sync = sync
+        self.asynchronous = asynchronous
+        self.args = args
+
+    def run(self):
+        return self.sync(*self.args)
+
+    async def arun(self):
+        return await self.asynchronous(*self.args)
+
+
+class Gather(Read):
+    """Independent reads, issued together by async views."""
+
+    def __init__(self, *reads):
+        self.reads = reads
+
+    def run(self):
+        return [read.run() for read in self.reads]
+
+    async def arun(self):
+        return await asyncio.gather(*(read.arun() for read in self.reads))
+
+
+async def _fetch(queryset):
+    return [row async for row in queryset]
+
+
+def fetch(queryset):
+    return Read(list, _fetch, queryset)
+
+
+def count(queryset):
+    return Read(queryset.count, queryset.acount)
+
+
+def blocking(function, *args):
+    # Sync-only code (e.g. reading the text index), run in a thread by async views
+    return Read(function, sync_to_async(function), *args)
+
+
+def run(handler):
+    """Run a handler with the sync ORM and return its response."""
+    value = error = None
+    while True:
+        try:
+            read = handler.throw(error) if error is not None else handler.send(value)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            value, error = read.run(), None
+        except Exception as exc:
+            # Raised at the handler's yield, so it can handle it
+            value, error = None, exc
+
+
+async def arun(handler):
+    """Run a handler with the async ORM and return its response."""
+    value = error = None
+    while True:
+        try:
+            read = handler.throw(error) if error is not None else handler.send(value)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            value, error = await read.arun(), None
+        except Exception as exc:
+            value, error = None, exc
@@ -0,0 +1,345 @@
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Property
+
+SEARCH_PARAM = 'search'
+SEARCH_RESULT_LIMIT = 1000
+
+# Columns kept in the text index, with their BM25 weights
+INDEXED_FIELDS = {
+    'title': 10.0,
+    'description': 1.0,
+    'address': 2.0,
+    'city': 3.0,
+}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall((query or '').lower())
+
+
+class DatabaseSearchBackend:
+    """
+    Unranked fallback that matches every term against the indexed columns
+    with ``icontains``. Works on any database but scans the table.
+    """
+
+    def condition(self, query):
+        condition = Q()
+        for token in tokenize(query):
+            token_condition = Q()
+            for field in INDEXED_FIELDS:
+                token_condition |= Q(**{f'{field}__icontains': token})
+            condition &= token_condition
+        return condition
+
+    def filter(self, queryset, query):
+        return queryset.filter(self.condition(query))
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT, queryset=None):
+        queryset = Property.objects.all() if queryset is None else queryset
+        return list(self.filter(queryset, query).order_by().values_list('id', flat=True)[:limit])
+
+    def ensure_table(self):
+        return False
+
+    def index(self, instance):
+        pass
+
+    def remove(self, property_id):
+        pass
+
+    def rebuild(self):
+        return Property.objects.count()
+
+
+class SQLiteFTSBackend:
+    """
+    SQLite FTS5 index over the listing text, ranked with BM25. The virtual
+    table mirrors Property ids as rowids and is kept in sync by signals.
+    """
+
+    table = 'properties_property_fts'
+
+    def __init__(self, using='default'):
+        self.using = using
+        self._ready = set()
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def ensure_table(self):
+        """Create the index table if needed. Returns True when it was created."""
+        key = str(self.connection.settings_dict['NAME'])
+        if key in self._ready:
+            return False
+        with self.connection.cursor() as cursor:
+            exists = self.table in self.connection.introspection.table_names(cursor)
+            if not exists:
+                columns = ', '.join(INDEXED_FIELDS)
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {self.table} USING fts5("
+                    f"{columns}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                )
+        self._ready.add(key)
+        return not exists
+
+    def match_expression(self, query):
+        # Quote every token so user input cannot inject FTS5 syntax, and make
+        # each one a prefix match for search-as-you-type
+        tokens = tokenize(query)
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def filter(self, queryset, query):
+        """Restrict ``queryset`` to every listing matching ``query``, unranked and unlimited."""
+        self.ensure_table()
+        match = RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [self.match_expression(query)])
+        return queryset.filter(pk__in=match)
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT, queryset=None):
+        """
+        Ids of the ``limit`` best matches of ``query``, best first. With a
+        ``queryset`` only its listings are ranked, so the limit cannot drop
+        the matches of a selective filter.
+        """
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        self.ensure_table()
+        weights = ', '.join(str(weight) for weight in INDEXED_FIELDS.values())
+        sql = f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s"
+        params = [expression]
+        # Follow the database router so searches can be served by a replica
+        using = router.db_for_read(Property)
+        if queryset is not None:
+            using = queryset.db
+            subquery, subquery_params = queryset.order_by().values('pk').query.get_compiler(using).as_sql()
+            sql += f" AND rowid IN ({subquery})"
+            params.extend(subquery_params)
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"{sql} ORDER BY bm25({self.table}, {weights}) LIMIT %s", [*params, limit])
+            return [row[0] for row in cursor.fetchall()]
+
+    def index(self, instance):
+        self.ensure_table()
+        columns = ', '.join(INDEXED_FIELDS)
+        placeholders = ', '.join(['%s'] * len(INDEXED_FIELDS))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [instance.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {columns}) VALUES (%s, {placeholders})",
+                [instance.pk] + [getattr(instance, field) or '' for field in INDEXED_FIELDS],
+            )
+
+    def remove(self, property_id):
+        self.ensure_table()
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [property_id])
+
+    def rebuild(self):
+        self.ensure_table()
+        columns = ', '.join(INDEXED_FIELDS)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {columns}) "
+                f"SELECT id, {columns} FROM {Property._meta.db_table}"
+            )
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+            cursor.execute(f"SELECT count(*) FROM {self.table}")
+            return cursor.fetchone()[0]
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    backend_path = getattr(settings, 'PROPERTY_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    if connections['default'].vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return DatabaseSearchBackend()
+
+
+def filter_conditions(filters):
+    """
+    Translate a PropertySearchView filter body into one Q object per filter,
+    keyed by filter name so callers can leave individual filters out.
+    """
+    conditions = {}
+
+    # Category filter
+    if 'category' in filters:
+        conditions['category'] = Q(category=filters['category'])
+
+    # Price range filter
+    if 'price_range' in filters:
+        price_range = filters['price_range']
+        condition = Q()
+        if 'min' in price_range:
+            condition &= Q(price__gte=price_range['min'])
+        if 'max' in price_range:
+            condition &= Q(price__lte=price_range['max'])
+        conditions['price_range'] = condition
+
+    # Area range filter
+    if 'area_range' in filters:
+        area_range = filters['area_range']
+        condition = Q()
+        if 'min' in area_range:
+            condition &= Q(total_area__gte=area_range['min'])
+        if 'max' in area_range:
+            condition &= Q(total_area__lte=area_range['max'])
+        conditions['area_range'] = condition
+
+    # Location filter
+    if 'location' in filters:
+        location = filters['location']
+        if 'city' in location:
+            conditions['city'] = Q(city__icontains=location['city'])
+        if 'state' in location:
+            conditions['state'] = Q(state__icontains=location['state'])
+
+    # Bedrooms and bathrooms filters
+    for field in ('bedrooms', 'bathrooms'):
+        if field in filters:
+            value = filters[field]
+            if isinstance(value, list):
+                conditions[field] = Q(**{f'{field}__in': value})
+            else:
+                conditions[field] = Q(**{field: value})
+
+    # Property and listing types
+    for field in ('real_estate_type', 'land_type', 'listing_type'):
+        if field in filters:
+            conditions[field] = Q(**{f'{field}__in': filters[field]})
+
+    return conditions
+
+
+def _number(value):
+    # 3, 3.0 and Decimal('3.00') filter alike; strings are left to the field
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        try:
+            return str(Decimal(str(value)).normalize())
+        except InvalidOperation:
+            pass
+    return value
+
+
+def _value_set(values, convert=lambda value: value):
+    values = [convert(value) for value in values]
+    try:
+        return sorted(set(values), key=str)
+    except TypeError:
+        return values
+
+
+def canonical_filters(filters):
+    """
+    The filters of a PropertySearchView body in a canonical form: keys that
+    do not filter are dropped, and values matching the same listings are
+    written the same way (``bedrooms: 3`` and ``[3.0]``, type lists in any
+    order, search text differing only in case or punctuation). Serialized
+    with sorted keys, it identifies a result set.
+    """
+    canonical = {}
+    if 'category' in filters:
+        canonical['category'] = filters['category']
+
+    for name in ('price_range', 'area_range'):
+        if name in filters:
+            bounds = filters[name]
+            canonical[name] = {bound: _number(bounds[bound]) for bound in ('min', 'max') if bound in bounds}
+
+    if 'location' in filters:
+        location = filters['location']
+        for name in ('city', 'state'):
+            if name in location:
+                value = location[name]
+                # icontains folds ASCII case on every database
+                if isinstance(value, str) and value.isascii():
+                    value = value.lower()
+                canonical[name] = value
+
+    for name in ('bedrooms', 'bathrooms'):
+        if name in filters:
+            value = filters[name]
+            if isinstance(value, list):
+                canonical[name] = _value_set(value, _number)
+            elif value is None:
+                # Matches missing values, which [None] does not
+                canonical[name] = None
+            else:
+                canonical[name] = [_number(value)]
+
+    for name in ('real_estate_type', 'land_type', 'listing_type'):
+        if name in filters:
+            value = filters[name]
+            canonical[name] = _value_set(value) if isinstance(value, list) else value
+
+    search = filters.get('search')
+    if search:
+        canonical['search'] = ' '.join(tokenize(search)) if isinstance(search, str) else search
+    return canonical
+
+
+def order_by_ids(queryset, ids):
+    """Order a queryset to follow the given list of ids, as ``search_rank``."""
+    if not ids:
+        # Still annotated, so callers can order by the rank of no results
+        return queryset.annotate(search_rank=Value(0, output_field=IntegerField())).order_by('search_rank', 'pk')
+    ranking = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.annotate(search_rank=ranking).order_by('search_rank', 'pk')
+
+
+def search_queryset(queryset, query, ranked=True):
+    """
+    Restrict a queryset to listings matching ``query``, optionally ordered by
+    relevance. Returns the queryset unchanged for blank queries.
+    """
+    if not tokenize(query):
+        return queryset
+    if not ranked:
+        return get_search_backend().filter(queryset, query)
+    return ranked_search(queryset, query)[0]
+
+
+def ranked_search(queryset, query):
+    """
+    Return ``(queryset, truncated)``: the best SEARCH_RESULT_LIMIT matches of
+    ``query`` among the listings of ``queryset``, ordered by relevance, and
+    whether further matches were left out.
+    """
+    # One extra id tells whether matches were left out
+    ids = get_search_backend().search(query, limit=SEARCH_RESULT_LIMIT + 1, queryset=queryset)
+    truncated = len(ids) > SEARCH_RESULT_LIMIT
+    ids = ids[:SEARCH_RESULT_LIMIT]
+    return order_by_ids(queryset.filter(pk__in=ids), ids), truncated
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for SearchFilter backed by the text index. Results are
+    ranked by relevance unless the client asked for an explicit ``ordering``,
+    so it must run after OrderingFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(SEARCH_PARAM, '')
+        ranked = not request.query_params.get('ordering')
+        return search_queryset(queryset, query, ranked=ranked)
@@ -0,0 +1,146 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import caching
+from .models import Property
+from .search import canonical_filters
+
+ENDPOINT = 'properties:search'
+SEARCH_CACHE_TIMEOUT = 60
+
+# Listed by cache_stats() with the response caches
+caching.CACHED_ENDPOINTS[ENDPOINT] = SEARCH_CACHE_TIMEOUT
+
+
+class SearchResultCache:
+    """
+    Ordered ids of PropertySearchView results, keyed by the canonical form of
+    the filters (see search.canonical_filters) and the sort order, so
+    equivalent bodies share an entry whatever their key order or spelling.
+
+    Entries hold the first SEARCH_CACHE_MAX_IDS ids with their cursor values
+    rather than rendered results: a page is read by primary key and rendered
+    with the requested fieldset, and its cursors are the ones the keyset
+    query would have issued. Pages past the cached ids fall back to that
+    query. Entries are dropped by a generation bump whenever a listing
+    changes (see signals.py).
+    """
+
+    def __init__(self, pagination):
+        self.pagination = pagination
+
+    @property
+    def max_ids(self):
+        return settings.SEARCH_CACHE_MAX_IDS
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'RESPONSE_CACHE_TIMEOUTS', {}).get(ENDPOINT, SEARCH_CACHE_TIMEOUT)
+
+    def _digest(self, filters, ordering):
+        canonical = {'filters': canonical_filters(filters), 'ordering': ordering}
+        return hashlib.sha1(json.dumps(canonical, sort_keys=True, default=str).encode()).hexdigest()
+
+    def key(self, filters, ordering):
+        return f'search:{caching.endpoint_generation(ENDPOINT)}:{self._digest(filters, ordering)}'
+
+    async def akey(self, filters, ordering):
+        return f'search:{await caching.aendpoint_generation(ENDPOINT)}:{self._digest(filters, ordering)}'
+
+    def _id_rows(self, queryset, ordering):
+        field = ordering.lstrip('-')
+        queryset = queryset.order_by(ordering, '-id' if ordering.startswith('-') else 'id')
+        # One extra id tells whether the list is complete
+        return queryset.values('id', field)[:self.max_ids + 1]
+
+    def _entry(self, rows, ordering, truncated):
+        field = ordering.lstrip('-')
+        rows = list(rows)
+        return {
+            'ids': [row['id'] for row in rows[:self.max_ids]],
+            'values': [str(self.pagination._cursor_value(row, field)) for row in rows[:self.max_ids]],
+            'complete': len(rows) <= self.max_ids,
+            'truncated': truncated,
+        }
+
+    def get(self, filters, ordering):
+        """The cached entry of a search, or None (counted as a miss)."""
+        if not self.max_ids:
+            return None
+        entry = cache.get(self.key(filters, ordering))
+        caching.record_lookup(ENDPOINT, hit=entry is not None)
+        return entry
+
+    async def aget(self, filters, ordering):
+        if not self.max_ids:
+            return None
+        entry = await cache.aget(await self.akey(filters, ordering))
+        await caching.arecord_lookup(ENDPOINT, hit=entry is not None)
+        return entry
+
+    def store(self, filters, queryset, ordering, truncated=False):
+        """
+        Read and cache the ordered ids of ``queryset``, with whether ranking
+        left out matches (see search.ranked_search); None when caching is off.
+        """
+        if not self.max_ids:
+            return None
+        # Keyed before reading, so a concurrent invalidation discards the entry
+        key = self.key(filters, ordering)
+        entry = self._entry(self._id_rows(queryset, ordering), ordering, truncated)
+        cache.set(key, entry, self.timeout)
+        return entry
+
+    async def astore(self, filters, queryset, ordering, truncated=False):
+        if not self.max_ids:
+            return None
+        key = await self.akey(filters, ordering)
+        entry = self._entry([row async for row in self._id_rows(queryset, ordering)], ordering, truncated)
+        await cache.aset(key, entry, self.timeout)
+        return entry
+
+    def page(self, entry, ordering, cursor=None, page_size=None):
+        """
+        Return ``(ids, next_cursor)`` for a page of a cached entry, as
+        KeysetPagination.paginate() would, or None when the entry does not
+        cover it.
+        """
+        if entry is None:
+            return None
+        ids, values = entry['ids'], entry['values']
+        page_size = self.pagination.get_page_size(page_size)
+        start = 0
+        if cursor:
+            value, pk = self.pagination.decode_cursor(cursor, ordering)
+            try:
+                position = ids.index(pk)
+            except ValueError:
+                return None
+            if values[position] != value:
+                return None
+            start = position + 1
+
+        end = start + page_size
+        if len(ids) <= end and not entry['complete']:
+            return None
+        next_cursor = None
+        if len(ids) > end:
+            next_cursor = self.pagination.encode_cursor(ordering, values[end - 1], ids[end - 1])
+        return ids[start:end], next_cursor
+
+    def _page_rows(self, reader, ids):
+        return reader.values(Property.objects.active().filter(pk__in=ids))
+
+    def _ordered(self, rows, ids):
+        rows = {row['id']: row for row in rows}
+        return [rows[pk] for pk in ids if pk in rows]
+
+    def rows(self, reader, ids):
+        """The ``reader.values()`` rows of a page of ids, in order."""
+        return self._ordered(self._page_rows(reader, ids), ids)
+
+    async def arows(self, reader, ids):
+        return self._ordered([row async for row in self._page_rows(reader, ids)], ids)
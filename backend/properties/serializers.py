@@ -1,10 +1,31 @@
 from rest_framework import serializers
-from .models import Property, PropertyImage, PropertyAmenity, Agent
+from . import agent_stats
+from .fieldsets import SparseFieldsMixin
+from .images import derivative_urls, image_url
+from .models import Property, PropertyImage, PropertyAmenity, Agent, SavedSearch
+from .percolator import SAVED_FILTERS
+
+def cover_image_url(obj, size):
+    # Uses Property.objects.with_cover_image() when prefetched
+    covers = getattr(obj, 'cover_images', None)
+    if covers is None:
+        covers = PropertyImage.objects.covers().filter(property=obj)
+    for image in covers:
+        return image_url(image.image, image.derivatives, size)
+    return None
+
+class ImageDerivativesField(serializers.ReadOnlyField):
+    """Resized versions of an image by size, each with WebP and JPEG URLs (see images.py)."""
+
+    def to_representation(self, value):
+        return derivative_urls(value, self.context.get('request'))
 
 class PropertyImageSerializer(serializers.ModelSerializer):
+    derivatives = ImageDerivativesField()
+
     class Meta:
         model = PropertyImage
-        fields = ['id', 'image', 'caption', 'is_primary', 'order']
+        fields = ['id', 'image', 'derivatives', 'caption', 'is_primary', 'order']
 
 class PropertyAmenitySerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,11 +33,26 @@ class PropertyAmenitySerializer(serializers.ModelSerializer):
         fields = ['name', 'icon']
 
 class AgentSerializer(serializers.ModelSerializer):
+    profile_image_derivatives = ImageDerivativesField()
+
     class Meta:
         model = Agent
-        fields = ['id', 'name', 'title', 'email', 'phone', 'agency', 'profile_image', 'rating', 'total_sales']
+        fields = ['id', 'name', 'title', 'email', 'phone', 'agency', 'profile_image',
+                  'profile_image_derivatives', 'rating', 'total_sales']
+
+class AgentDirectorySerializer(SparseFieldsMixin, AgentSerializer):
+    # Not nested in the property payloads
+    listing_stats = serializers.SerializerMethodField()
+
+    expandable_fields = ['listing_stats']
+
+    class Meta(AgentSerializer.Meta):
+        fields = AgentSerializer.Meta.fields + ['specializations', 'listing_stats']
+
+    def get_listing_stats(self, obj):
+        return agent_stats.summary(obj.listing_stats.all())
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     images = PropertyImageSerializer(many=True, read_only=True)
     amenities = PropertyAmenitySerializer(many=True, read_only=True)
     agent = AgentSerializer(read_only=True)
@@ -24,9 +60,12 @@ class PropertySerializer(serializers.ModelSerializer):
     coordinates = serializers.SerializerMethodField()
     dimensions = serializers.SerializerMethodField()
 
+    # Related objects, each loaded with its own join or query
+    expandable_fields = ['agent', 'images', 'amenities']
+
     class Meta:
         model = Property
-        fields = '__all__'
+        exclude = ['geohash', 'external_id']
 
     def get_coordinates(self, obj):
         return {
@@ -37,15 +76,64 @@ class PropertySerializer(serializers.ModelSerializer):
     def get_dimensions(self, obj):
         return obj.dimensions_3d or {}
 
+class PropertyCardSerializer(serializers.ModelSerializer):
+    coordinates = serializers.SerializerMethodField()
+    property_type = serializers.SerializerMethodField()
+    image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Property
+        fields = ['id', 'title', 'price', 'currency', 'coordinates', 'category', 'property_type',
+                  'listing_type', 'city', 'state', 'total_area', 'bedrooms', 'bathrooms', 'image']
+
+    def get_coordinates(self, obj):
+        return {
+            'lat': float(obj.latitude),
+            'lng': float(obj.longitude)
+        }
+
+    def get_property_type(self, obj):
+        return obj.real_estate_type or obj.land_type
+
+    def get_image(self, obj):
+        return cover_image_url(obj, 'card')
+
 class PropertyDetailSerializer(PropertySerializer):
     similar_properties = serializers.SerializerMethodField()
 
+    expandable_fields = PropertySerializer.expandable_fields + ['similar_properties']
+
+    SIMILAR_PROPERTIES_COUNT = 3
+    SIMILAR_CARD_FIELDS = ['id', 'title', 'price', 'currency', 'latitude', 'longitude', 'category',
+                           'real_estate_type', 'land_type', 'listing_type', 'city', 'state',
+                           'total_area', 'bedrooms', 'bathrooms']
+
+    @classmethod
+    def stored_similar(cls, property_id):
+        # Precomputed neighbour list (see similarity.py)
+        return (
+            Property.objects.filter(similar_to_links__property_id=property_id, status='active')
+            .order_by('similar_to_links__rank')
+            .only(*cls.SIMILAR_CARD_FIELDS)
+            .with_cover_image()[:cls.SIMILAR_PROPERTIES_COUNT]
+        )
+
+    @classmethod
+    def fallback_similar(cls, obj):
+        # Index not built yet for this listing
+        return (
+            Property.objects.filter(category=obj.category, city=obj.city, status='active')
+            .exclude(id=obj.id)
+            .only(*cls.SIMILAR_CARD_FIELDS)
+            .with_cover_image()[:cls.SIMILAR_PROPERTIES_COUNT]
+        )
+
     def get_similar_properties(self, obj):
-        similar = Property.objects.filter(
-            category=obj.category,
-            city=obj.city
-        ).exclude(id=obj.id)[:3]
-        return PropertySerializer(similar, many=True, context=self.context).data
+        # Async views fetch the similar listings alongside the property itself
+        similar = self.context.get('similar_properties')
+        if similar is None:
+            similar = list(self.stored_similar(obj.pk)) or self.fallback_similar(obj)
+        return PropertyCardSerializer(similar, many=True, context=self.context).data
 
 class PropertyMapSerializer(serializers.ModelSerializer):
     coordinates = serializers.SerializerMethodField()
@@ -66,9 +154,44 @@ class PropertyMapSerializer(serializers.ModelSerializer):
         return obj.real_estate_type or obj.land_type
 
     def get_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
-        if primary_image:
-            return primary_image.image.url
-        elif obj.images.exists():
-            return obj.images.first().image.url
-        return None
+        return cover_image_url(obj, 'thumbnail')
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SavedSearch
+        fields = ['id', 'name', 'filters', 'created_at']
+        read_only_fields = ['created_at']
+
+    def validate_filters(self, filters):
+        # A search request body; sorting and paging keys are dropped
+        if not isinstance(filters, dict):
+            raise serializers.ValidationError('Expected a search filter object')
+        filters = {key: value for key, value in filters.items() if key in SAVED_FILTERS}
+        number = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+        for key in ('price_range', 'area_range'):
+            if key in filters:
+                bounds = filters[key]
+                if not isinstance(bounds, dict) or not set(bounds) <= {'min', 'max'}:
+                    raise serializers.ValidationError(f'{key} must be an object with min and/or max')
+                for bound in bounds.values():
+                    number.run_validation(bound)
+        location = filters.get('location', {})
+        if not isinstance(location, dict) or not set(location) <= {'city', 'state'} or not all(
+            isinstance(value, str) and len(value) <= 100 for value in location.values()
+        ):
+            raise serializers.ValidationError('location must be an object with city and/or state')
+        for key in ('bedrooms', 'bathrooms'):
+            if key in filters:
+                values = filters[key] if isinstance(filters[key], list) else [filters[key]]
+                for value in values:
+                    number.run_validation(value)
+        for key in ('real_estate_type', 'land_type', 'listing_type'):
+            if key in filters and not (
+                isinstance(filters[key], list) and all(isinstance(value, str) for value in filters[key])
+            ):
+                raise serializers.ValidationError(f'{key} must be a list')
+        for key in ('category', 'search'):
+            if key in filters and not isinstance(filters[key], str):
+                raise serializers.ValidationError(f'{key} must be a string')
+        return filters
@@ -0,0 +1,183 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import agent_stats, caching, facets, images, market, percolator, similarity, tiles
+from .counters import counters
+from .models import Agent, Favorite, Property, PropertyAmenity, PropertyImage, SavedSearch, SimilarProperty
+from .search import INDEXED_FIELDS, get_search_backend
+from .similarity import FEATURE_FIELDS
+
+
+def create_search_index(sender, **kwargs):
+    backend = get_search_backend()
+    if backend.ensure_table():
+        backend.rebuild()
+
+
+@receiver(post_save, sender=Property)
+def invalidate_property_tiles(sender, instance, created, **kwargs):
+    if created:
+        tiles.invalidate_point(instance.latitude, instance.longitude)
+        return
+
+    if not tiles.TILE_FIELDS & instance.changed_fields():
+        return
+    old_latitude = instance.loaded_value('latitude')
+    old_longitude = instance.loaded_value('longitude')
+    if old_latitude is not None and old_longitude is not None:
+        tiles.invalidate_point(old_latitude, old_longitude)
+    tiles.invalidate_point(instance.latitude, instance.longitude)
+
+
+@receiver(post_delete, sender=Property)
+def invalidate_deleted_property_tiles(sender, instance, **kwargs):
+    tiles.invalidate_point(instance.latitude, instance.longitude)
+
+
+@receiver(post_save, sender=Property)
+def update_search_index(sender, instance, created, **kwargs):
+    if created or set(INDEXED_FIELDS) & instance.changed_fields():
+        get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Property)
+def remove_from_search_index(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def invalidate_facets(sender, **kwargs):
+    facets.bump_generation()
+
+
+@receiver(post_save, sender=Property)
+def queue_similar_properties(sender, instance, created, **kwargs):
+    if created or set(FEATURE_FIELDS) & instance.changed_fields():
+        similarity.enqueue([instance.pk])
+
+
+@receiver(pre_delete, sender=Property)
+def collect_similar_referrers(sender, instance, **kwargs):
+    # The links pointing at this listing are cascaded away with it
+    instance._similar_referrers = list(
+        SimilarProperty.objects.filter(similar=instance).values_list('property_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Property)
+def queue_similar_referrers(sender, instance, **kwargs):
+    similarity.enqueue(getattr(instance, '_similar_referrers', []))
+
+
+@receiver(post_save, sender=Property)
+def update_market_stats(sender, instance, created, **kwargs):
+    if created or market.STAT_FIELDS & instance.changed_fields():
+        market.record([instance])
+
+
+@receiver(post_delete, sender=Property)
+def remove_market_stats(sender, instance, **kwargs):
+    market.remove(instance)
+
+
+@receiver(post_save, sender=Property)
+def update_agent_listing_stats(sender, instance, created, **kwargs):
+    if created or agent_stats.STAT_FIELDS & instance.changed_fields():
+        agent_stats.record([instance])
+
+
+@receiver(post_delete, sender=Property)
+def remove_agent_listing_stats(sender, instance, **kwargs):
+    agent_stats.remove(instance)
+
+
+@receiver(post_save, sender=Agent)
+def index_agent_specializations(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or 'specializations' in update_fields:
+        agent_stats.index_specializations(instance)
+
+
+@receiver(post_save, sender=Property)
+def percolate_saved_searches(sender, instance, created, **kwargs):
+    if created or percolator.PERCOLATED_FIELDS & instance.changed_fields():
+        transaction.on_commit(lambda: percolator.percolate([instance]))
+
+
+@receiver(post_save, sender=Favorite)
+def count_favorite(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: counters.increment(instance.property_id, 'favorites'))
+
+
+@receiver(post_delete, sender=Favorite)
+def uncount_favorite(sender, instance, **kwargs):
+    transaction.on_commit(lambda: counters.increment(instance.property_id, 'favorites', -1))
+
+
+@receiver(post_save, sender=SavedSearch)
+def index_saved_search(sender, instance, **kwargs):
+    percolator.index(instance)
+
+
+# Fields rendered by PropertyMapSerializer
+MAP_FIELDS = {
+    'title', 'price', 'latitude', 'longitude', 'category', 'real_estate_type', 'land_type',
+    'city', 'state', 'status',
+}
+
+
+@receiver(post_save, sender=Property)
+def invalidate_property_responses(sender, instance, created, **kwargs):
+    endpoints = ['properties:list', 'properties:search']
+    if created or MAP_FIELDS & instance.changed_fields():
+        endpoints.append('properties:map_data')
+    if instance.featured or instance.loaded_value('featured'):
+        endpoints.append('properties:featured')
+    caching.invalidate(*endpoints)
+
+
+@receiver(post_delete, sender=Property)
+def invalidate_deleted_property_responses(sender, instance, **kwargs):
+    endpoints = ['properties:list', 'properties:map_data', 'properties:search']
+    if instance.featured:
+        endpoints.append('properties:featured')
+    caching.invalidate(*endpoints)
+
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyImage)
+@receiver(post_save, sender=PropertyAmenity)
+@receiver(post_delete, sender=PropertyAmenity)
+def invalidate_property_child_responses(sender, instance, **kwargs):
+    endpoints = ['properties:list']
+    if sender is PropertyImage:
+        endpoints.append('properties:map_data')
+    if Property.objects.filter(pk=instance.property_id, featured=True).exists():
+        endpoints.append('properties:featured')
+    caching.invalidate(*endpoints)
+
+
+@receiver(post_save, sender=Agent)
+@receiver(post_delete, sender=Agent)
+def invalidate_agent_responses(sender, instance, **kwargs):
+    # Agents are nested in the property payloads
+    caching.invalidate('agents:list', 'properties:list', 'properties:featured')
+
+
+@receiver(pre_save, sender=PropertyImage)
+@receiver(pre_save, sender=Agent)
+def clear_stale_derivatives(sender, instance, **kwargs):
+    # Derivatives of a replaced or removed image
+    field, derivatives_field, _ = images.IMAGE_FIELDS[sender]
+    derivatives = getattr(instance, derivatives_field)
+    if derivatives and derivatives.get('source') != getattr(instance, field).name:
+        setattr(instance, derivatives_field, {})
+
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_save, sender=Agent)
+def render_image_derivatives(sender, instance, **kwargs):
+    if images.needs_derivatives(instance):
+        transaction.on_commit(lambda: images.schedule(instance))
@@ -0,0 +1,263 @@
+import math
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import PendingSimilarity, Property, SimilarProperty
+
+SIMILAR_LISTINGS_K = 10
+REBUILD_BATCH_SIZE = 1024
+# Memory for the distances of one rebuild block, which sets its size with many listings
+REBUILD_MEMORY_BYTES = 256 * 1024 * 1024
+DEQUEUE_BATCH_SIZE = 500
+
+# Fields that feed the feature vector
+FEATURE_FIELDS = [
+    'price', 'total_area', 'bedrooms', 'bathrooms', 'latitude', 'longitude',
+    'category', 'real_estate_type', 'land_type', 'status',
+]
+
+CATEGORIES = [value for value, _ in Property.CATEGORY_CHOICES]
+PROPERTY_TYPES = [value for value, _ in Property.REAL_ESTATE_TYPES + Property.LAND_TYPES]
+
+# Fixed scales keep distances stable as the inventory changes, which is what
+# lets the stored neighbour lists be updated incrementally. One unit of
+# distance is roughly: 2x in price or area, one bedroom or bathroom, ~50km.
+PRICE_SCALE = 1 / math.log10(2)
+AREA_SCALE = 1 / math.log10(2)
+ROOM_SCALE = 1.0
+COORDINATE_SCALE = 2.0
+CATEGORY_WEIGHT = 5.0
+TYPE_WEIGHT = 2.0
+
+FEATURE_COUNT = 6 + len(CATEGORIES) + len(PROPERTY_TYPES)
+
+
+def feature_vector(price, total_area, bedrooms, bathrooms, latitude, longitude,
+                   category, real_estate_type, land_type):
+    vector = np.zeros(FEATURE_COUNT, dtype=np.float64)
+    vector[0] = math.log10(max(float(price), 1.0)) * PRICE_SCALE
+    vector[1] = math.log10(max(float(total_area), 1.0)) * AREA_SCALE
+    vector[2] = float(bedrooms or 0) * ROOM_SCALE
+    vector[3] = float(bathrooms or 0) * ROOM_SCALE
+    vector[4] = float(latitude) * COORDINATE_SCALE
+    vector[5] = float(longitude) * COORDINATE_SCALE
+    if category in CATEGORIES:
+        vector[6 + CATEGORIES.index(category)] = CATEGORY_WEIGHT
+    property_type = real_estate_type or land_type
+    if property_type in PROPERTY_TYPES:
+        vector[6 + len(CATEGORIES) + PROPERTY_TYPES.index(property_type)] = TYPE_WEIGHT
+    return vector
+
+
+class SimilarityIndex:
+    """
+    Feature matrix of the active listings with NumPy nearest-neighbour
+    search. The results are stored as SimilarProperty rows, which is what
+    the detail view reads.
+
+    Requests only queue changed listings (see enqueue()); the lists are
+    recomputed by update_similarity_index. The matrix is loaded once per
+    process; each run re-reads only the queued listings and those added or
+    removed without a queue entry (see _unqueued()). Feature edits made with
+    queryset update() are picked up by the next rebuild.
+    """
+
+    def __init__(self, k=SIMILAR_LISTINGS_K):
+        self.k = k
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = np.empty((0, FEATURE_COUNT), dtype=np.float64)
+        # Distance to each listing's k-th stored neighbour
+        self.kth = np.empty(0, dtype=np.float64)
+        self.positions = {}
+
+    def _rows(self, queryset):
+        return queryset.filter(status='active').values_list('id', *FEATURE_FIELDS[:-1])
+
+    def load(self):
+        ids = []
+        vectors = []
+        for pk, *features in self._rows(Property.objects.order_by('id')).iterator(chunk_size=2000):
+            ids.append(pk)
+            vectors.append(feature_vector(*features))
+
+        self._reset()
+        if ids:
+            self.ids = np.array(ids, dtype=np.int64)
+            self.vectors = np.vstack(vectors)
+            self.kth = np.full(len(ids), np.inf, dtype=np.float64)
+        self.positions = {pk: position for position, pk in enumerate(ids)}
+
+        complete = (
+            SimilarProperty.objects.values('property_id')
+            .annotate(kth=Max('distance'), last_rank=Max('rank'))
+            .filter(last_rank=self.k - 1)
+        )
+        for row in complete.iterator():
+            position = self.positions.get(row['property_id'])
+            if position is not None:
+                self.kth[position] = row['kth']
+        self.loaded = True
+
+    def patch(self, property_ids):
+        """Re-read ``property_ids`` into the loaded matrix, adding and dropping listings as needed."""
+        vectors = {
+            pk: feature_vector(*features)
+            for pk, *features in self._rows(Property.objects.filter(pk__in=property_ids))
+        }
+        for pk, vector in vectors.items():
+            if pk in self.positions:
+                self.vectors[self.positions[pk]] = vector
+        removed = [self.positions[pk] for pk in property_ids if pk in self.positions and pk not in vectors]
+        added = [pk for pk in vectors if pk not in self.positions]
+        if not removed and not added:
+            return
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[removed] = False
+        self.ids = np.concatenate([self.ids[keep], np.array(added, dtype=np.int64)])
+        self.vectors = np.vstack([self.vectors[keep], *(vectors[pk][None, :] for pk in added)])
+        self.kth = np.concatenate([self.kth[keep], np.full(len(added), np.inf, dtype=np.float64)])
+        self.positions = {pk: position for position, pk in enumerate(self.ids.tolist())}
+
+    def _unqueued(self):
+        # Deleting a listing deletes its queue row too, and update() queues
+        # nothing; such listings show up as a difference in the active count
+        active = Property.objects.filter(status='active')
+        if active.count() == len(self.ids):
+            return []
+        return list(set(active.values_list('id', flat=True)).symmetric_difference(self.positions))
+
+    def distances(self, vector):
+        diff = self.vectors - vector
+        return np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+    def _ranked(self, candidates, distances):
+        # Sort by distance, then id, so ties are stable between rebuilds
+        order = np.lexsort((self.ids[candidates], distances[candidates]))
+        candidates = candidates[order]
+        return self.ids[candidates].tolist(), distances[candidates].tolist()
+
+    def nearest(self, property_id):
+        """Return ``(ids, distances)`` of the k nearest listings to ``property_id``."""
+        position = self.positions[property_id]
+        distances = self.distances(self.vectors[position])
+        distances[position] = np.inf
+
+        k = min(self.k, len(distances) - 1)
+        if k <= 0:
+            return [], []
+        return self._ranked(np.argpartition(distances, k - 1)[:k], distances)
+
+    def _links(self, property_id, similar_ids, distances):
+        if len(similar_ids) == self.k:
+            self.kth[self.positions[property_id]] = distances[-1]
+        return [
+            SimilarProperty(property_id=property_id, similar_id=similar_id, rank=rank, distance=distance)
+            for rank, (similar_id, distance) in enumerate(zip(similar_ids, distances))
+        ]
+
+    def _store(self, property_ids):
+        links = []
+        for property_id in property_ids:
+            if property_id in self.positions:
+                links.extend(self._links(property_id, *self.nearest(property_id)))
+        with transaction.atomic():
+            SimilarProperty.objects.filter(property_id__in=property_ids).delete()
+            SimilarProperty.objects.bulk_create(links, batch_size=1000)
+
+    def refresh(self, property_ids):
+        """
+        Recompute, from the current listings, the neighbour lists affected by
+        changes to ``property_ids``: their own, those that point at them, and
+        those they are now closer to than their current k-th neighbour.
+        """
+        if self.loaded:
+            property_ids = list(property_ids) + self._unqueued()
+            self.patch(property_ids)
+        else:
+            self.load()
+        affected = set(property_ids)
+        affected.update(
+            SimilarProperty.objects.filter(similar_id__in=property_ids).values_list('property_id', flat=True)
+        )
+        for property_id in property_ids:
+            position = self.positions.get(property_id)
+            if position is None:
+                # No longer active: only its own list and its referrers change
+                continue
+            closer = self.distances(self.vectors[position]) < self.kth
+            closer[position] = False
+            affected.update(self.ids[closer].tolist())
+        self._store(affected)
+
+    def block_size(self):
+        # A block needs its distance matrix and the argpartition indices, 16 bytes per pair
+        return max(1, min(REBUILD_BATCH_SIZE, REBUILD_MEMORY_BYTES // (16 * max(len(self.ids), 1))))
+
+    def rebuild(self):
+        # Changes queued before the load are covered by the rebuild
+        pending = list(PendingSimilarity.objects.values_list('property_id', 'changed_at'))
+        self.load()
+        count = len(self.ids)
+        k = min(self.k, count - 1)
+        norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        size = self.block_size()
+        self.kth[:] = np.inf
+        # Readers keep seeing the previous lists until the new ones are committed
+        with transaction.atomic():
+            SimilarProperty.objects.all().delete()
+            for start in range(0, count if k > 0 else 0, size):
+                block = self.vectors[start:start + size]
+                rows = np.arange(len(block))
+                # Squared distances between the block and every listing, computed in place
+                distances = block @ self.vectors.T
+                distances *= -2
+                distances += norms[start:start + size, None]
+                distances += norms[None, :]
+                np.maximum(distances, 0, out=distances)
+                np.sqrt(distances, out=distances)
+                distances[rows, start + rows] = np.inf
+                candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+                links = []
+                for offset in rows:
+                    similar_ids, row_distances = self._ranked(candidates[offset], distances[offset])
+                    links.extend(self._links(int(self.ids[start + offset]), similar_ids, row_distances))
+                SimilarProperty.objects.bulk_create(links, batch_size=1000)
+        _dequeue(pending)
+        return count
+
+
+similarity_index = SimilarityIndex()
+
+
+def enqueue(property_ids):
+    """Queue listings whose features changed for the next update_similarity_index run."""
+    now = timezone.now()
+    PendingSimilarity.objects.bulk_create(
+        [PendingSimilarity(property_id=property_id, changed_at=now) for property_id in set(property_ids)],
+        update_conflicts=True, unique_fields=['property'], update_fields=['changed_at'],
+    )
+
+
+def _dequeue(pending):
+    # Listings queued again meanwhile have a new changed_at and stay queued
+    for start in range(0, len(pending), DEQUEUE_BATCH_SIZE):
+        condition = Q()
+        for property_id, changed_at in pending[start:start + DEQUEUE_BATCH_SIZE]:
+            condition |= Q(property_id=property_id, changed_at=changed_at)
+        PendingSimilarity.objects.filter(condition).delete()
+
+
+def process_pending():
+    """Refresh the lists affected by the queued listings. Returns how many were processed."""
+    pending = list(PendingSimilarity.objects.values_list('property_id', 'changed_at'))
+    if pending:
+        similarity_index.refresh([property_id for property_id, _ in pending])
+        _dequeue(pending)
+    return len(pending)
@@ -0,0 +1,100 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from . import caching
+from .models import Property
+
+
+class SummaryTable:
+    """
+    Counts and sums over listings, kept in ``model`` rows keyed by
+    ``key_fields`` and updated incrementally as listings change.
+
+    ``contributions(values)`` maps the ``stat_fields`` values of one listing
+    to ``{key: amount}``: the rows it is counted in and what it adds to
+    their totals. Each model has ``count`` and ``total`` columns and a unique
+    constraint over the key fields. The cached ``endpoints`` are invalidated
+    on every change.
+    """
+
+    def __init__(self, model, key_fields, stat_fields, contributions, endpoints=()):
+        self.model = model
+        self.key_fields = key_fields
+        self.stat_fields = set(stat_fields)
+        self.contributions = contributions
+        self.endpoints = list(endpoints)
+
+    def _loaded_values(self, instance):
+        loaded = getattr(instance, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return {name: loaded.get(name, getattr(instance, name)) for name in self.stat_fields}
+
+    def _current_values(self, instance):
+        return {name: getattr(instance, name) for name in self.stat_fields}
+
+    def _add(self, changes, values, sign):
+        for key, amount in self.contributions(values).items():
+            change = changes[key]
+            change[0] += sign
+            change[1] += sign * amount
+
+    def _apply(self, changes):
+        changes = {key: change for key, change in changes.items() if change[0] or change[1]}
+        if not changes:
+            return
+        with transaction.atomic():
+            # Sorted so concurrent writers touch the rows in the same order
+            for key, (count, total) in sorted(changes.items()):
+                lookup = dict(zip(self.key_fields, key))
+                increment = {'count': F('count') + count, 'total': F('total') + total}
+                # A missing row has nothing to subtract from (removed with
+                # its parent, or rebuilt without the listing)
+                if self.model.objects.filter(**lookup).update(**increment) or count <= 0:
+                    continue
+                try:
+                    with transaction.atomic():
+                        self.model.objects.create(**lookup, count=count, total=total)
+                except IntegrityError:
+                    # Created by a concurrent writer
+                    self.model.objects.filter(**lookup).update(**increment)
+        caching.invalidate(*self.endpoints)
+
+    def record(self, instances):
+        """
+        Move saved listings from the rows of their loaded values to those of
+        their current values. Listings that were not loaded from the database
+        are treated as new.
+        """
+        changes = defaultdict(lambda: [0, Decimal(0)])
+        for instance in instances:
+            old = self._loaded_values(instance)
+            if old is not None:
+                self._add(changes, old, -1)
+            self._add(changes, self._current_values(instance), 1)
+        self._apply(changes)
+
+    def remove(self, instance):
+        changes = defaultdict(lambda: [0, Decimal(0)])
+        self._add(changes, self._loaded_values(instance) or self._current_values(instance), -1)
+        self._apply(changes)
+
+    def rebuild(self):
+        """Recompute every row from the listings. Returns the number of rows."""
+        changes = defaultdict(lambda: [0, Decimal(0)])
+        for values in Property.objects.active().values(*self.stat_fields).iterator(chunk_size=2000):
+            self._add(changes, values, 1)
+        with transaction.atomic():
+            self.model.objects.all().delete()
+            self.model.objects.bulk_create(
+                [
+                    self.model(**dict(zip(self.key_fields, key)), count=count, total=total)
+                    for key, (count, total) in changes.items()
+                ],
+                batch_size=1000,
+            )
+        caching.invalidate(*self.endpoints)
+        return len(changes)
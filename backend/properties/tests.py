@@ -0,0 +1,263 @@
+import io
+import json
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
+
+import msgpack
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from premium_realty.renderers import MessagePackRenderer, ORJSONRenderer
+from properties.management.commands._fixtures import create_listings
+from properties.fieldsets import select_fields
+from properties.geo import encode_geohash
+from properties.models import Agent, Property, PropertyImage
+from properties.readers import PropertyReader
+from properties.search import get_search_backend
+from properties.serializers import PropertySerializer
+from properties.views import PropertySearchView
+
+
+class PropertySearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, _, self.listings = create_listings(5, prefix='search')
+        get_search_backend().rebuild()
+        self.client.force_authenticate(self.user)
+
+    def search(self, body):
+        return self.client.post('/api/properties/search/', body, format='json')
+
+    def test_relevance_search_without_matches(self):
+        response = self.search({'search': 'zzzqqq'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'results': [], 'next': None, 'truncated': False})
+
+    def test_search_text_without_words(self):
+        response = self.search({'search': '!!!', 'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), len(self.listings))
+
+    def test_relevance_pages(self):
+        first = self.search({'search': 'search listing', 'page_size': 3})
+        second = self.search({'search': 'search listing', 'page_size': 3, 'cursor': first.data['next']})
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        self.assertCountEqual(ids, [listing.pk for listing in self.listings])
+        self.assertIsNone(second.data['next'])
+        self.assertFalse(second.data['truncated'])
+
+    def test_relevance_results_past_the_limit(self):
+        with mock.patch('properties.search.SEARCH_RESULT_LIMIT', 3):
+            first = self.search({'search': 'search listing', 'page_size': 2})
+            second = self.search({'search': 'search listing', 'page_size': 2, 'cursor': first.data['next']})
+        self.assertEqual(len(first.data['results'] + second.data['results']), 3)
+        self.assertIsNone(second.data['next'])
+        # The second page is read from the cached entry
+        self.assertTrue(first.data['truncated'])
+        self.assertTrue(second.data['truncated'])
+
+    def test_cached_ids_of_deactivated_listing(self):
+        self.search({'search': 'search listing', 'page_size': 100})
+        sold = self.listings[0]
+        # update() sends no signals, so the cached ids still include the listing
+        Property.objects.filter(pk=sold.pk).update(status='sold')
+        response = self.search({'search': 'search listing', 'page_size': 100})
+        ids = [row['id'] for row in response.data['results']]
+        self.assertNotIn(sold.pk, ids)
+        self.assertEqual(len(ids), len(self.listings) - 1)
+
+    def test_facets_with_search_that_is_not_text(self):
+        # Ignored, as by the search itself
+        for search in (123, {'a': 1}):
+            response = self.client.post('/api/properties/search/facets/', {'search': search}, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(sum(row['count'] for row in response.data['category']), len(self.listings))
+
+    def test_tampered_cursor(self):
+        # A relevance cursor whose rank is not a number
+        cursor = PropertySearchView.pagination.encode_cursor('search_rank', 'abc', self.listings[0].pk)
+        response = self.search({'search': 'search', 'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Invalid cursor'})
+
+
+class PropertyExportTests(APITestCase):
+    def setUp(self):
+        self.user, _, self.listings = create_listings(3, prefix='export')
+
+    def test_anonymous_export(self):
+        response = self.client.get('/api/properties/', {'export': 'csv'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_export(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/properties/', {'export': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), len(self.listings))
+
+
+class MapDataTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        _, _, self.listings = create_listings(3, prefix='map')
+
+    def test_points_without_viewport(self):
+        response = self.client.get('/api/properties/map_data/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['type'], 'points')
+        self.assertIs(response.data['truncated'], False)
+        self.assertEqual(len(response.data['results']), len(self.listings))
+
+    def test_backfill_derived_fields(self):
+        Property.objects.update(geohash='')
+        call_command('backfill_derived_fields', stdout=io.StringIO())
+        for listing in Property.objects.all():
+            self.assertEqual(listing.geohash, encode_geohash(listing.latitude, listing.longitude))
+
+
+@override_settings(ALLOWED_HOSTS=['a.example', 'b.example'])
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        create_listings(2, prefix='hosts')
+
+    def test_cached_per_host(self):
+        for host in ('a.example', 'b.example'):
+            response = self.client.get('/api/properties/', HTTP_HOST=host)
+            image = response.data['results'][0]['images'][0]['image']
+            self.assertTrue(image.startswith(f'http://{host}/'), image)
+
+
+class RendererTests(SimpleTestCase):
+    def test_dates_render_as_with_json_renderer(self):
+        data = {
+            'created_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'updated_at': datetime(2024, 5, 1, 12, 30, 15, tzinfo=dt_timezone.utc),
+            'date': date(2024, 5, 1),
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(msgpack.unpackb(MessagePackRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+
+class PropertyReaderTests(APITestCase):
+    """PropertyReader renders values() rows exactly as PropertySerializer renders instances."""
+
+    def setUp(self):
+        _, agent, self.listings = create_listings(3, prefix='reader')
+        Agent.objects.filter(pk=agent.pk).update(profile_image='agents/reader.jpg')
+        self.request = APIRequestFactory().get('/api/properties/')
+
+    def queryset(self, *listings):
+        return Property.objects.filter(pk__in=[listing.pk for listing in listings or self.listings]).order_by('id')
+
+    def serializer_output(self, instances, request, fields=None):
+        return JSONRenderer().render(PropertySerializer(instances, many=True, context={'request': request}, fields=fields).data)
+
+    def reader_output(self, rows, request, fields=None):
+        return JSONRenderer().render(PropertyReader(request, fields).serialize(rows))
+
+    def assertSameOutput(self, queryset, fields=None):
+        for request in (self.request, None):
+            with self.subTest(fields=fields, request=request is not None):
+                reader = PropertyReader(request, fields)
+                self.assertEqual(
+                    self.reader_output(reader.values(queryset), request, fields),
+                    self.serializer_output(queryset.with_details(), request, fields),
+                )
+
+    def test_full_output(self):
+        self.assertSameOutput(self.queryset())
+
+    def test_sparse_fieldsets(self):
+        for params in (
+            {'fields': 'id,title,price,coordinates,city'},
+            {'fields': 'id,days_on_market', 'expand': 'agent'},
+            {'fields': 'dimensions', 'expand': 'images,amenities'},
+            {'expand': 'agent'},
+        ):
+            self.assertSameOutput(self.queryset(), select_fields(params, PropertySerializer))
+
+    def test_listing_without_images(self):
+        listing = self.listings[0]
+        PropertyImage.objects.filter(property=listing).delete()
+        self.assertSameOutput(self.queryset(listing))
+        self.assertEqual(PropertyReader().serialize(PropertyReader().values(self.queryset(listing)))[0]['images'], [])
+
+    def test_listing_without_agent(self):
+        # The schema requires an agent, so it is dropped from the loaded row and instance
+        reader = PropertyReader(self.request)
+        row = reader.values(self.queryset(self.listings[0])).get()
+        row.update({name: None for name in row if name == 'agent_id' or name.startswith('agent__')})
+        instance = self.queryset(self.listings[0]).with_details().get()
+        instance.agent = None
+        self.assertEqual(self.reader_output([row], self.request), self.serializer_output([instance], self.request))
+
+
+# Maximum number of queries per request, independent of the result size
+QUERY_BUDGETS = {
+    # GET endpoints read their version for ETag / Last-Modified first
+    'property list': 5,
+    'property list 304': 1,
+    # A sparse fieldset without relations skips the image and amenity queries
+    'property list cards': 3,
+    # Includes the fallback query used before the similarity index is built
+    'property detail': 7,
+    'featured': 4,
+    'map_data': 3,
+    'map_data viewport': 3,
+    # A search result cache miss reads the ordered ids before the page
+    'search': 4,
+    # Listing stats are prefetched
+    'agent list': 4,
+    'agent specialization': 4,
+    'agent detail': 3,
+    'market stats': 1,
+    'market breakdown': 1,
+}
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class QueryBudgetTests(APITestCase):
+    """Every endpoint runs the same number of queries whatever the number of listings."""
+
+    def check_budgets(self, size):
+        user, agent, listings = create_listings(size, prefix='budget')
+        self.client.force_authenticate(user)
+
+        etag = self.client.get('/api/properties/', {'city': 'Budget City'})['ETag']
+        requests = {
+            'property list': lambda: self.client.get('/api/properties/', {'city': 'Budget City'}),
+            'property list 304': lambda: self.client.get(
+                '/api/properties/', {'city': 'Budget City'}, HTTP_IF_NONE_MATCH=etag
+            ),
+            'property list cards': lambda: self.client.get('/api/properties/', {
+                'city': 'Budget City', 'fields': 'id,title,price,coordinates,city,state,bedrooms,bathrooms',
+            }),
+            'property detail': lambda: self.client.get(f'/api/properties/{listings[0].pk}/'),
+            'featured': lambda: self.client.get('/api/properties/featured/'),
+            'map_data': lambda: self.client.get('/api/properties/map_data/', {'city': 'Budget City'}),
+            'map_data viewport': lambda: self.client.get('/api/properties/map_data/', {
+                'sw_lat': '9.9', 'sw_lng': '9.9', 'ne_lat': '11', 'ne_lng': '10.1', 'zoom': 16,
+            }),
+            'search': lambda: self.client.post('/api/properties/search/', {
+                'location': {'city': 'Budget City'}, 'page_size': 100,
+            }, format='json'),
+            'agent list': lambda: self.client.get('/api/agents/'),
+            'agent specialization': lambda: self.client.get('/api/agents/', {'specialization': 'residential,luxury'}),
+            'agent detail': lambda: self.client.get(f'/api/agents/{agent.pk}/'),
+            'market stats': lambda: self.client.get('/api/market/stats/', {'city': 'Budget City'}),
+            'market breakdown': lambda: self.client.get('/api/market/stats/', {'group_by': 'city'}),
+        }
+        for name, request in requests.items():
+            with self.subTest(name, size=size), self.assertNumQueries(QUERY_BUDGETS[name]):
+                response = request()
+            self.assertEqual(response.status_code, 304 if name.endswith('304') else 200, name)
+
+    def test_few_listings(self):
+        self.check_budgets(3)
+
+    def test_many_listings(self):
+        self.check_budgets(20)
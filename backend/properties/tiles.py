@@ -0,0 +1,202 @@
+import math
+import struct
+
+from django.core.cache import cache
+
+from .geo import CLUSTER_MAX_ZOOM, MAX_ZOOM, Viewport
+
+TILE_EXTENT = 4096
+TILE_LAYER = 'properties'
+TILE_CACHE_TIMEOUT = 60 * 60
+# Cluster tiles summarize every listing under them, so instead of being
+# invalidated on each change they expire quickly
+TILE_CLUSTER_CACHE_TIMEOUT = 60
+# Browsers and CDNs may reuse a tile briefly; the server-side cache is
+# invalidated precisely, so keep the shared max-age short
+TILE_MAX_AGE = 60
+TILE_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+
+# Fields that end up in a tile; a change to any of them invalidates the
+# tiles covering the listing's old and new position
+TILE_FIELDS = {'latitude', 'longitude', 'price', 'status', 'category', 'real_estate_type', 'land_type'}
+
+
+def tile_cache_key(z, x, y):
+    return f'tiles:{z}:{x}:{y}'
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def _project(latitude, longitude, z):
+    """Project a coordinate to fractional web mercator tile coordinates."""
+    n = 2 ** z
+    latitude = max(min(float(latitude), 85.05112878), -85.05112878)
+    lat_rad = math.radians(latitude)
+    tile_x = (float(longitude) + 180.0) / 360.0 * n
+    tile_y = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    return tile_x, tile_y
+
+
+def _tile_latitude(y, z):
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / 2 ** z))))
+
+
+def tile_viewport(z, x, y):
+    n = 2 ** z
+    return Viewport(
+        south=_tile_latitude(y + 1, z),
+        west=x / n * 360.0 - 180.0,
+        north=_tile_latitude(y, z),
+        east=(x + 1) / n * 360.0 - 180.0,
+        zoom=z,
+    )
+
+
+def tiles_for_point(latitude, longitude, min_zoom=0):
+    """Every (z, x, y) tile from ``min_zoom`` up that contains the given coordinate."""
+    tiles = []
+    for z in range(min_zoom, MAX_ZOOM + 1):
+        tile_x, tile_y = _project(latitude, longitude, z)
+        n = 2 ** z
+        tiles.append((z, min(int(tile_x), n - 1), min(int(tile_y), n - 1)))
+    return tiles
+
+
+def invalidate_point(latitude, longitude):
+    # Only the tiles of individual listings; cluster tiles expire on their own
+    tiles = tiles_for_point(latitude, longitude, min_zoom=CLUSTER_MAX_ZOOM)
+    cache.delete_many([tile_cache_key(*tile) for tile in tiles])
+
+
+# Protocol buffer encoding, just enough for the vector tile schema
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 31)
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _uint_field(field, value):
+    return _key(field, 0) + _varint(value)
+
+
+def _bytes_field(field, payload):
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _packed_field(field, values):
+    return _bytes_field(field, b''.join(_varint(value) for value in values))
+
+
+def _encode_value(value):
+    if isinstance(value, str):
+        return _bytes_field(1, value.encode('utf-8'))
+    return _key(3, 1) + struct.pack('<d', float(value))
+
+
+def encode_tile(z, x, y, rows):
+    """
+    Encode ``(id, latitude, longitude, attributes)`` rows as a single point
+    layer in Mapbox Vector Tile (v2) format. Features with a None id are
+    written without one.
+    """
+    keys = []
+    key_index = {}
+    values = []
+    value_index = {}
+    features = []
+
+    for pk, latitude, longitude, attributes in rows:
+        tile_x, tile_y = _project(latitude, longitude, z)
+        px = int(round((tile_x - x) * TILE_EXTENT))
+        py = int(round((tile_y - y) * TILE_EXTENT))
+
+        tags = []
+        for name, value in attributes.items():
+            if value is None:
+                continue
+            if name not in key_index:
+                key_index[name] = len(keys)
+                keys.append(name)
+            value_key = (type(value).__name__, value)
+            if value_key not in value_index:
+                value_index[value_key] = len(values)
+                values.append(value)
+            tags.extend([key_index[name], value_index[value_key]])
+
+        # MoveTo with a single point: command id 1, count 1
+        geometry = [(1 & 0x7) | (1 << 3), _zigzag(px), _zigzag(py)]
+        feature = (
+            (_uint_field(1, pk) if pk is not None else b'')
+            + _packed_field(2, tags)
+            + _uint_field(3, 1)
+            + _packed_field(4, geometry)
+        )
+        features.append(_bytes_field(2, feature))
+
+    layer = (
+        _uint_field(15, 2)
+        + _bytes_field(1, TILE_LAYER.encode('utf-8'))
+        + b''.join(features)
+        + b''.join(_bytes_field(3, key.encode('utf-8')) for key in keys)
+        + b''.join(_bytes_field(4, _encode_value(value)) for value in values)
+        + _uint_field(5, TILE_EXTENT)
+    )
+    return _bytes_field(3, layer)
+
+
+def _point_features(viewport, queryset):
+    rows = viewport.filter(queryset).order_by().values_list(
+        'id', 'latitude', 'longitude', 'price', 'category', 'real_estate_type', 'land_type'
+    )
+    for pk, latitude, longitude, price, category, real_estate_type, land_type in rows:
+        yield pk, latitude, longitude, {
+            'price': float(price),
+            'category': category,
+            'property_type': real_estate_type or land_type,
+        }
+
+
+def _cluster_features(viewport, queryset):
+    for row in viewport.cluster_rows(queryset):
+        yield None, row['latitude'], row['longitude'], {
+            'count': row['count'],
+            'min_price': float(row['min_price']),
+            'max_price': float(row['max_price']),
+        }
+
+
+def render_tile(queryset, z, x, y):
+    """
+    The vector tile of the listings in a tile: one point per listing from
+    CLUSTER_MAX_ZOOM up, one point per geohash cluster (as in map_data) below.
+    """
+    key = tile_cache_key(z, x, y)
+    tile = cache.get(key)
+    if tile is not None:
+        return tile
+
+    viewport = tile_viewport(z, x, y)
+    if viewport.clustered:
+        tile = encode_tile(z, x, y, _cluster_features(viewport, queryset))
+        cache.set(key, tile, TILE_CLUSTER_CACHE_TIMEOUT)
+    else:
+        tile = encode_tile(z, x, y, _point_features(viewport, queryset))
+        cache.set(key, tile, TILE_CACHE_TIMEOUT)
+    return tile
@@ -1,11 +1,38 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PropertyViewSet, PropertySearchView
+from . import async_views
+from .views import (
+    PropertyViewSet,
+    SavedSearchViewSet,
+    PropertySearchView,
+    PropertyFacetsView,
+    PropertyTileView,
+    PropertyImportView,
+    MarketStatsView,
+    CacheStatsView,
+)
 
 router = DefaultRouter()
 router.register(r'properties', PropertyViewSet)
+router.register(r'saved-searches', SavedSearchViewSet, basename='saved-search')
 
+# Explicit routes go first, otherwise properties/{pk}/ captures them
 urlpatterns = [
-    path('', include(router.urls)),
     path('properties/search/', PropertySearchView.as_view(), name='property-search'),
+    path('properties/search/facets/', PropertyFacetsView.as_view(), name='property-search-facets'),
+    path('properties/import/', PropertyImportView.as_view(), name='property-import'),
+    path('properties/tiles/<int:z>/<int:x>/<int:y>/', PropertyTileView.as_view(), name='property-tiles'),
+    path('market/stats/', MarketStatsView.as_view(), name='market-stats'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('', include(router.urls)),
+]
+
+# Async versions of the hot read endpoints, served ahead of the routes above
+# by premium_realty.async_urls (see ASYNC_VIEWS)
+async_urlpatterns = [
+    path('properties/', async_views.property_collection_view, name='property-list'),
+    path('properties/featured/', async_views.featured_view, name='property-featured'),
+    path('properties/map_data/', async_views.map_data_view, name='property-map-data'),
+    path('properties/search/', async_views.search_view, name='property-search'),
+    path('properties/<int:pk>/', async_views.property_detail_view, name='property-detail'),
 ]
@@ -1,23 +1,45 @@
+import io
+
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
-from .models import Property, Agent
+from django.core.exceptions import ValidationError
+from django.db.models import Count, F, Q
+from django.http import Http404, HttpResponse
+from premium_realty.database import read_from_replica
+from . import market, tiles
+from .agent_stats import specialization_names
+from .caching import cache_response, cache_stats, conditional_response
+from .counters import counters
+from .exports import EXPORT_CONTENT_TYPES, export_response
+from .facets import get_facets
+from .fieldsets import SparseFieldsetMixin, select_fields
+from .geo import MAP_POINT_LIMIT, Viewport, limit_points
+from .imports import IMPORT_FORMATS, ListingImporter, detect_format
+from .models import Property, Agent, AgentSpecialization, Favorite, SavedSearch
+from .pagination import InvalidCursor, KeysetPagination, page_number_rows
+from .reads import Gather, Read, blocking, fetch, run
+from .readers import PropertyReader
+from .search import FullTextSearchFilter, filter_conditions, ranked_search, search_queryset, tokenize
+from .search_cache import SearchResultCache
 from .serializers import (
     PropertySerializer, 
     PropertyDetailSerializer, 
-    AgentSerializer,
-    PropertyMapSerializer
+    AgentDirectorySerializer,
+    PropertyCardSerializer,
+    PropertyMapSerializer,
+    SavedSearchSerializer,
 )
 
-class PropertyViewSet(viewsets.ModelViewSet):
+class PropertyViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Property.objects.filter(status='active')
     serializer_class = PropertySerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['category', 'real_estate_type', 'land_type', 'listing_type', 'city', 'state', 'featured']
-    search_fields = ['title', 'description', 'address', 'city']
     ordering_fields = ['price', 'created_at', 'total_area', 'views']
     ordering = ['-created_at']
 
@@ -27,7 +49,11 @@ class PropertyViewSet(viewsets.ModelViewSet):
         return PropertySerializer
 
     def get_queryset(self):
-        queryset = Property.objects.filter(status='active')
+        queryset = Property.objects.active()
+        if self.action == 'map_data':
+            queryset = queryset.with_cover_image()
+        elif self.action in ('list', 'retrieve', 'featured'):
+            queryset = queryset.with_details([name for name in ('agent', 'images', 'amenities') if self.expanded(name)])
         
         # Filter by price range
         price_min = self.request.query_params.get('price__gte')
@@ -40,107 +66,353 @@ class PropertyViewSet(viewsets.ModelViewSet):
             
         return queryset
 
+    # The read handlers below (*_page) are generators yielding their reads
+    # (see reads.py), run here with the sync ORM and by async_views.py with
+    # the async one
+
+    def list_page(self, request):
+        # Same output as PropertySerializer, built from values() rows
+        queryset = yield blocking(self.filter_queryset, self.get_queryset())
+        reader = PropertyReader(request, self.get_fieldset())
+        rows, paginated = yield from page_number_rows(self.paginator, request, reader.values(queryset))
+        data = yield Read(reader.serialize, reader.aserialize, rows)
+        return self.get_paginated_response(data) if paginated else Response(data)
+
+    def detail_page(self, request, pk):
+        fields = self.get_fieldset()
+        with_similar = self.expanded('similar_properties')
+        queryset = yield blocking(self.filter_queryset, self.get_queryset())
+        # The listing and its precomputed neighbours are read together
+        try:
+            similar = PropertyDetailSerializer.stored_similar(pk) if with_similar else Property.objects.none()
+            property, similar = yield Gather(Read(queryset.get, queryset.aget, Q(pk=pk)), fetch(similar))
+        except (Property.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(request, property)
+
+        if with_similar and not similar:
+            similar = yield fetch(PropertyDetailSerializer.fallback_similar(property))
+        context = {**self.get_serializer_context(), 'similar_properties': similar}
+        return Response(PropertyDetailSerializer(property, context=context, fields=fields).data)
+
+    def featured_page(self, request):
+        reader = PropertyReader(request, self.get_fieldset())
+        rows = yield fetch(reader.values(self.get_queryset().filter(featured=True)))
+        return Response((yield Read(reader.serialize, reader.aserialize, rows)))
+
+    def map_page(self, request):
+        properties = yield blocking(self.filter_queryset, self.get_queryset())
+
+        try:
+            viewport = Viewport.from_query_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if viewport is not None and viewport.clustered:
+            rows = yield fetch(viewport.cluster_rows(properties))
+            return Response({
+                'type': 'clusters',
+                'zoom': viewport.zoom,
+                'results': [viewport.cluster(row) for row in rows],
+            })
+
+        if viewport is not None:
+            properties = viewport.filter(properties)
+        points, truncated = limit_points((yield fetch(properties[:MAP_POINT_LIMIT + 1])))
+        return Response({
+            'type': 'points',
+            'zoom': viewport.zoom if viewport is not None else None,
+            'truncated': truncated,
+            'results': PropertyMapSerializer(points, many=True).data,
+        })
+
+    def export(self, request, export):
+        # Full-table downloads are for signed-in users, as with search exports
+        if not request.user.is_authenticated:
+            self.permission_denied(request)
+        if export not in EXPORT_CONTENT_TYPES:
+            return Response({'error': 'export must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+        return export_response(self.filter_queryset(self.get_queryset()), export, request)
+
+    @conditional_response('properties:list')
+    @cache_response('properties:list', timeout=60)
+    @read_from_replica
+    def list(self, request, *args, **kwargs):
+        export = request.query_params.get('export')
+        if export:
+            return self.export(request, export)
+        return run(self.list_page(request))
+
+    @conditional_response('properties:detail', version_of='properties:list')
+    @read_from_replica
+    def retrieve(self, request, *args, **kwargs):
+        return run(self.detail_page(request, kwargs[self.lookup_url_kwarg or self.lookup_field]))
+
     @action(detail=True, methods=['post'])
     def increment_views(self, request, pk=None):
         property = self.get_object()
-        property.views += 1
-        property.save()
-        return Response({'views': property.views})
+        counters.increment(property.pk, 'views')
+        return Response({'views': counters.current_value(property, 'views')})
+
+    @action(detail=True, methods=['post', 'delete'], permission_classes=[IsAuthenticated])
+    def favorite(self, request, pk=None):
+        # Idempotent per user; the counter follows the Favorite rows (see signals.py)
+        property = self.get_object()
+        if request.method == 'POST':
+            Favorite.objects.get_or_create(user_id=request.user.id, property=property)
+        else:
+            Favorite.objects.filter(user_id=request.user.id, property=property).delete()
+        return Response({
+            'favorites': counters.current_value(property, 'favorites'),
+            'is_favorite': request.method == 'POST',
+        })
 
     @action(detail=False)
+    @conditional_response('properties:featured')
+    @cache_response('properties:featured', timeout=60 * 5)
+    @read_from_replica
     def featured(self, request):
-        featured_properties = self.get_queryset().filter(featured=True)
-        serializer = self.get_serializer(featured_properties, many=True)
-        return Response(serializer.data)
+        return run(self.featured_page(request))
 
     @action(detail=False)
+    @conditional_response('properties:map_data')
+    @cache_response('properties:map_data', timeout=60)
+    @read_from_replica
     def map_data(self, request):
-        properties = self.filter_queryset(self.get_queryset())
-        serializer = PropertyMapSerializer(properties, many=True)
-        return Response(serializer.data)
+        return run(self.map_page(request))
 
-class AgentViewSet(viewsets.ModelViewSet):
+class AgentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Agent.objects.all()
-    serializer_class = AgentSerializer
+    serializer_class = AgentDirectorySerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'agency', 'specializations']
+    search_fields = ['name', 'agency', '=specialization_index__name']
     ordering_fields = ['rating', 'total_sales', 'name']
     ordering = ['-rating']
 
+    def get_queryset(self):
+        queryset = Agent.objects.all()
+        if self.expanded('listing_stats'):
+            queryset = queryset.prefetch_related('listing_stats')
+
+        # Agents with every one of the comma-separated specializations
+        names = specialization_names(self.request.query_params.get('specialization', '').split(','))
+        if names:
+            matching = (
+                AgentSpecialization.objects.filter(name__in=names)
+                .values('agent_id')
+                .annotate(matched=Count('name'))
+                .filter(matched=len(names))
+                .values('agent_id')
+            )
+            queryset = queryset.filter(pk__in=matching)
+        return queryset
+
+    def list_page(self, request):
+        # A read handler, as in PropertyViewSet
+        queryset = yield blocking(self.filter_queryset, self.get_queryset())
+        rows, paginated = yield from page_number_rows(self.paginator, request, queryset)
+        data = self.get_serializer(rows, many=True).data
+        return self.get_paginated_response(data) if paginated else Response(data)
+
+    @conditional_response('agents:list')
+    @cache_response('agents:list', timeout=60 * 5)
+    @read_from_replica
+    def list(self, request, *args, **kwargs):
+        return run(self.list_page(request))
+
+    @conditional_response('agents:detail', version_of='agents:list')
+    @read_from_replica
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+class PropertyTileView(APIView):
+    @read_from_replica
+    def get(self, request, z, x, y):
+        if not tiles.is_valid_tile(z, x, y):
+            return Response({'error': 'Invalid tile coordinates'}, status=status.HTTP_400_BAD_REQUEST)
+
+        tile = tiles.render_tile(Property.objects.filter(status='active'), z, x, y)
+        response = HttpResponse(tile, content_type=tiles.TILE_CONTENT_TYPE)
+        response['Cache-Control'] = f'public, max-age={tiles.TILE_MAX_AGE}'
+        return response
+
+SEARCH_SORT_ORDERINGS = {
+    'price_asc': 'price',
+    'price_desc': '-price',
+    'area_asc': 'total_area',
+    'area_desc': '-total_area',
+    'date_asc': 'created_at',
+    'date_desc': '-created_at',
+}
+
 class PropertySearchView(APIView):
-    def post(self, request):
+    pagination = KeysetPagination()
+    results = SearchResultCache(pagination)
+
+    def get_ordering(self, filters):
+        # Keyword searches are ranked by relevance unless another sort is
+        # requested; text without any word (e.g. "!!!") does not search
+        search = filters.get('search')
+        if not isinstance(search, str) or not tokenize(search):
+            search = None
+        sort_by = filters.get('sort_by', 'relevance' if search else 'date_desc')
+        if search and sort_by == 'relevance':
+            return 'search_rank'
+        return SEARCH_SORT_ORDERINGS.get(sort_by, '-created_at')
+
+    def build_queryset(self, filters):
+        """
+        Return ``(queryset, ordering, truncated)`` for a search request body;
+        ``truncated`` when relevance ranking left out matches past
+        SEARCH_RESULT_LIMIT.
+        """
+        queryset = Property.objects.active()
+
+        queryset = queryset.filter(*filter_conditions(filters).values())
+
+        ordering = self.get_ordering(filters)
+        search = filters.get('search')
+        truncated = False
+        if ordering == 'search_rank':
+            queryset, truncated = ranked_search(queryset, search)
+        elif isinstance(search, str):
+            queryset = search_queryset(queryset, search, ranked=False)
+        return queryset, ordering, truncated
+
+    def search_page(self, request):
+        """A page of results; a read handler run by post() and the async view (see reads.py)."""
         filters = request.data
-        queryset = Property.objects.filter(status='active')
-
-        # Category filter
-        if 'category' in filters:
-            queryset = queryset.filter(category=filters['category'])
-
-        # Price range filter
-        if 'price_range' in filters:
-            price_range = filters['price_range']
-            if 'min' in price_range:
-                queryset = queryset.filter(price__gte=price_range['min'])
-            if 'max' in price_range:
-                queryset = queryset.filter(price__lte=price_range['max'])
-
-        # Area range filter
-        if 'area_range' in filters:
-            area_range = filters['area_range']
-            if 'min' in area_range:
-                queryset = queryset.filter(total_area__gte=area_range['min'])
-            if 'max' in area_range:
-                queryset = queryset.filter(total_area__lte=area_range['max'])
-
-        # Location filter
-        if 'location' in filters:
-            location = filters['location']
-            if 'city' in location:
-                queryset = queryset.filter(city__icontains=location['city'])
-            if 'state' in location:
-                queryset = queryset.filter(state__icontains=location['state'])
-
-        # Bedrooms filter
-        if 'bedrooms' in filters:
-            bedrooms = filters['bedrooms']
-            if isinstance(bedrooms, list):
-                queryset = queryset.filter(bedrooms__in=bedrooms)
+        reader = PropertyReader(fields=select_fields(request.query_params, PropertySerializer))
+        cursor, page_size = filters.get('cursor'), filters.get('page_size')
+        ordering = self.get_ordering(filters)
+        queryset = None
+        entry = yield Read(self.results.get, self.results.aget, filters, ordering)
+        if entry is None:
+            # The keyword part reads the text index synchronously
+            queryset, ordering, truncated = yield blocking(self.build_queryset, filters)
+            entry = yield Read(self.results.store, self.results.astore, filters, queryset, ordering, truncated)
+        else:
+            truncated = entry.get('truncated', False)
+        try:
+            page = self.results.page(entry, ordering, cursor, page_size)
+            if page is not None:
+                ids, next_cursor = page
+                properties = yield Read(self.results.rows, self.results.arows, reader, ids)
             else:
-                queryset = queryset.filter(bedrooms=bedrooms)
+                # Past the cached ids, or caching is off
+                if queryset is None:
+                    queryset, ordering, truncated = yield blocking(self.build_queryset, filters)
+                rows = reader.values(queryset, ordering.lstrip('-'))
+                properties, next_cursor = yield Read(
+                    self.pagination.paginate, self.pagination.apaginate, rows, ordering, cursor, page_size
+                )
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Bathrooms filter
-        if 'bathrooms' in filters:
-            bathrooms = filters['bathrooms']
-            if isinstance(bathrooms, list):
-                queryset = queryset.filter(bathrooms__in=bathrooms)
-            else:
-                queryset = queryset.filter(bathrooms=bathrooms)
+        return Response({
+            'results': (yield Read(reader.serialize, reader.aserialize, properties)),
+            'next': next_cursor,
+            'truncated': truncated,
+        })
 
-        # Property types
-        if 'real_estate_type' in filters:
-            queryset = queryset.filter(real_estate_type__in=filters['real_estate_type'])
-        
-        if 'land_type' in filters:
-            queryset = queryset.filter(land_type__in=filters['land_type'])
-
-        # Listing types
-        if 'listing_type' in filters:
-            queryset = queryset.filter(listing_type__in=filters['listing_type'])
-
-        # Sort
-        sort_by = filters.get('sort_by', '-created_at')
-        if sort_by == 'price_asc':
-            queryset = queryset.order_by('price')
-        elif sort_by == 'price_desc':
-            queryset = queryset.order_by('-price')
-        elif sort_by == 'area_asc':
-            queryset = queryset.order_by('total_area')
-        elif sort_by == 'area_desc':
-            queryset = queryset.order_by('-total_area')
-        elif sort_by == 'date_asc':
-            queryset = queryset.order_by('created_at')
-        else:  # date_desc
-            queryset = queryset.order_by('-created_at')
-
-        serializer = PropertySerializer(queryset, many=True)
-        return Response(serializer.data)
+    def export(self, filters, export):
+        # Full result set, streamed instead of paginated
+        if export not in EXPORT_CONTENT_TYPES:
+            return Response({'error': 'export must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset, ordering, _ = self.build_queryset(filters)
+        queryset = queryset.order_by(ordering, '-id' if ordering.startswith('-') else 'id')
+        return export_response(queryset, export, filename='search')
+
+    @read_from_replica
+    def post(self, request):
+        export = request.data.get('export')
+        if export:
+            return self.export(request.data, export)
+        return run(self.search_page(request))
+
+class PropertyFacetsView(APIView):
+    @read_from_replica
+    def post(self, request):
+        return Response(get_facets(request.data))
+
+class MarketStatsView(APIView):
+    @cache_response('market:stats', timeout=60 * 5)
+    @read_from_replica
+    def get(self, request):
+        params = request.query_params
+        listing_type = params.get('listing_type', 'sale')
+        if listing_type not in dict(Property.LISTING_TYPES):
+            return Response({'error': 'Invalid listing_type'}, status=status.HTTP_400_BAD_REQUEST)
+
+        group_by = params.get('group_by')
+        if group_by:
+            if group_by not in market.DIMENSIONS:
+                return Response({'error': 'group_by must be city, state or category'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            return Response(market.breakdown(listing_type, group_by))
+
+        segments = [dimension for dimension in market.DIMENSIONS if params.get(dimension)]
+        if len(segments) > 1:
+            return Response({'error': 'Filter by only one of city, state or category'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if segments:
+            return Response(market.segment_stats(listing_type, segments[0], params[segments[0]]))
+        return Response(market.segment_stats(listing_type))
+
+class SavedSearchViewSet(viewsets.ModelViewSet):
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        # request.user may be a TokenUser (stateless authentication)
+        return SavedSearch.objects.filter(user_id=self.request.user.id)
+
+    def perform_create(self, serializer):
+        serializer.save(user_id=self.request.user.id)
+
+    @action(detail=True)
+    def matches(self, request, pk=None):
+        # Listings that matched after the search was saved, newest match first
+        search = self.get_object()
+        properties = (
+            Property.objects.filter(saved_search_matches__search=search)
+            .annotate(matched_at=F('saved_search_matches__matched_at'))
+            .order_by('-matched_at', '-id')
+            .with_cover_image()
+        )
+        page = self.paginate_queryset(properties)
+        return self.get_paginated_response(
+            PropertyCardSerializer(page, many=True, context=self.get_serializer_context()).data
+        )
+
+class CacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
+
+class PropertyImportView(APIView):
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'A CSV or JSON Lines file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        format = request.data.get('format')
+        try:
+            format = format or detect_format(upload.name)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if format not in IMPORT_FORMATS.values():
+            return Response({'error': 'format must be csv or jsonl'}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        # Read the upload line by line rather than loading it into memory
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            result = ListingImporter(dry_run=dry_run).run(stream, format)
+        except UnicodeDecodeError:
+            return Response({'error': 'The file must be UTF-8 encoded'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict())
@@ -2,7 +2,9 @@ import axios from "axios";
 import {
   Property,
   PropertySearchFilters,
+  PropertySearchPage,
   PropertyListResponse,
+  PropertyMapData,
 } from "@/types/property";
 
 const API = axios.create({
@@ -86,8 +88,8 @@ class PropertyAPI {
     return this.request<Property>(`/properties/${id}/`);
   }
 
-  async getMapData(): Promise<any[]> {
-    return this.request<any[]>("/properties/map_data/");
+  async getMapData(): Promise<PropertyMapData> {
+    return this.request<PropertyMapData>("/properties/map_data/");
   }
 
   async incrementViews(id: number): Promise<void> {
@@ -96,10 +98,13 @@ class PropertyAPI {
     });
   }
 
-  async searchProperties(filters: PropertySearchFilters): Promise<Property[]> {
-    return this.request<Property[]>("/properties/search/", {
+  async searchProperties(
+    filters: PropertySearchFilters,
+    cursor?: string | null,
+  ): Promise<PropertySearchPage> {
+    return this.request<PropertySearchPage>("/properties/search/", {
       method: "POST",
-      body: JSON.stringify(filters),
+      body: JSON.stringify(cursor ? { ...filters, cursor } : filters),
     });
   }
 }
@@ -1,11 +1,17 @@
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import {
+  useInfiniteQuery,
+  useQuery,
+  useMutation,
+  useQueryClient,
+} from "@tanstack/react-query";
 import { propertyAPI } from "@/api";
 import { PropertySearchFilters } from "@/types/property";
 
-export function useProperties(filters?: PropertySearchFilters) {
+export function useProperties(filters?: PropertySearchFilters, enabled = true) {
   return useQuery({
     queryKey: ["properties", filters],
     queryFn: () => propertyAPI.getProperties(filters),
+    enabled,
     staleTime: 1000 * 60 * 5, // 5 minutes
   });
 }
@@ -39,10 +45,19 @@ export function useIncrementViews() {
   });
 }
 
-export function useSearchProperties() {
-  return useMutation({
-    mutationFn: (filters: PropertySearchFilters) =>
-      propertyAPI.searchProperties(filters),
+// Search results page by page; fetchNextPage() follows the `next` cursor
+export function useSearchProperties(
+  filters: PropertySearchFilters,
+  enabled = true,
+) {
+  return useInfiniteQuery({
+    queryKey: ["properties", "search", filters],
+    queryFn: ({ pageParam }) =>
+      propertyAPI.searchProperties(filters, pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next,
+    enabled,
+    staleTime: 1000 * 60 * 5, // 5 minutes
   });
 }
 
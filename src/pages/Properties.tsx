@@ -40,7 +40,7 @@ import { Footer } from "@/components/Footer";
 import { PropertyMap } from "@/components/PropertyMap";
 import { useState, useMemo } from "react";
 import { motion, AnimatePresence } from "framer-motion";
-import { useProperties } from "@/hooks/useProperties";
+import { useProperties, useSearchProperties } from "@/hooks/useProperties";
 import { PropertySearchFilters, PropertyCategory } from "@/types/property";
 import { Loader2 } from "lucide-react";
 
@@ -91,9 +91,15 @@ export default function Properties() {
     return apiFilters;
   }, [activeCategory, priceRange]);
 
-  // Fetch properties from Django API
-  const { data: propertiesResponse, isLoading, error } = useProperties(filters);
-  const properties = propertiesResponse?.results || [];
+  // Fetch properties from Django API: signed-in users page through the
+  // search endpoint with its cursor, visitors get the first list page
+  const signedIn = !!localStorage.getItem("token");
+  const listQuery = useProperties(filters, !signedIn);
+  const searchQuery = useSearchProperties(filters, signedIn);
+  const { isLoading, error } = signedIn ? searchQuery : listQuery;
+  const properties = signedIn
+    ? searchQuery.data?.pages.flatMap((page) => page.results) || []
+    : listQuery.data?.results || [];
 
   const formatPrice = (price: number, listing_type: string) => {
     if (listing_type === "rent") {
@@ -856,58 +862,14 @@ export default function Properties() {
               )}
             </AnimatePresence>
 
-            {/* Enhanced Pagination */}
-            <motion.div
-              className="mt-12 flex justify-center"
-              initial={{ opacity: 0, y: 20 }}
-              animate={{ opacity: 1, y: 0 }}
-              transition={{ delay: 0.8 }}
-            >
-              <div className="flex space-x-2">
-                <motion.div
-                  whileHover={{ scale: 1.05 }}
-                  whileTap={{ scale: 0.95 }}
-                >
-                  <Button
-                    variant="outline"
-                    className="hover:bg-luxury-blue hover:text-white transition-all"
-                  >
-                    Previous
-                  </Button>
-                </motion.div>
-                <motion.div
-                  whileHover={{ scale: 1.05 }}
-                  whileTap={{ scale: 0.95 }}
-                >
-                  <Button
-                    variant="outline"
-                    className="bg-luxury-blue text-white hover:bg-blue-600"
-                  >
-                    1
-                  </Button>
-                </motion.div>
-                <motion.div
-                  whileHover={{ scale: 1.05 }}
-                  whileTap={{ scale: 0.95 }}
-                >
-                  <Button
-                    variant="outline"
-                    className="hover:bg-luxury-blue hover:text-white transition-all"
-                  >
-                    2
-                  </Button>
-                </motion.div>
-                <motion.div
-                  whileHover={{ scale: 1.05 }}
-                  whileTap={{ scale: 0.95 }}
-                >
-                  <Button
-                    variant="outline"
-                    className="hover:bg-luxury-blue hover:text-white transition-all"
-                  >
-                    3
-                  </Button>
-                </motion.div>
+            {/* Load the next page of search results */}
+            {signedIn && searchQuery.hasNextPage && (
+              <motion.div
+                className="mt-12 flex justify-center"
+                initial={{ opacity: 0, y: 20 }}
+                animate={{ opacity: 1, y: 0 }}
+                transition={{ delay: 0.8 }}
+              >
                 <motion.div
                   whileHover={{ scale: 1.05 }}
                   whileTap={{ scale: 0.95 }}
@@ -915,12 +877,18 @@ export default function Properties() {
                   <Button
                     variant="outline"
                     className="hover:bg-luxury-blue hover:text-white transition-all"
+                    disabled={searchQuery.isFetchingNextPage}
+                    onClick={() => searchQuery.fetchNextPage()}
                   >
-                    Next
+                    {searchQuery.isFetchingNextPage ? (
+                      <Loader2 className="h-4 w-4 animate-spin" />
+                    ) : (
+                      "Load more"
+                    )}
                   </Button>
                 </motion.div>
-              </div>
-            </motion.div>
+              </motion.div>
+            )}
           </div>
         </div>
       </div>
@@ -223,6 +223,22 @@ export interface PropertySearchFilters {
 }
 
 // API Response Types for Django integration
+export interface PropertySearchPage {
+  results: Property[];
+  // Cursor of the next page, sent back as `cursor` with the same filters
+  next: string | null;
+  // Whether relevance ranking left out matches past the best 1000
+  truncated: boolean;
+}
+
+export interface PropertyMapData {
+  type: "points" | "clusters";
+  zoom: number | null;
+  // Whether listings were left out past the point limit
+  truncated?: boolean;
+  results: any[];
+}
+
 export interface PropertyListResponse {
   count: number;
   next?: string;